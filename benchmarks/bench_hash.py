@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark du calcul d'empreinte : lecture par blocs contre projection mémoire (mmap).
+
+Usage :
+    python -m benchmarks.bench_hash --taille-mo 1024 --repetitions 3 --algorithme blake2b
+
+Le résultat est affiché au format JSON (débit en Mo/s pour chaque méthode).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.hashing import hasher_fichier, creer_hasher, resoudre_algorithme
+
+
+def creer_fichier_test(dossier, taille_mo):
+    """Crée un fichier de `taille_mo` Mo au contenu pseudo-aléatoire reproductible."""
+    chemin = os.path.join(dossier, "bench_hash.bin")
+    bloc = os.urandom(1024 * 1024)
+    with open(chemin, "wb") as f:
+        for _ in range(taille_mo):
+            f.write(bloc)
+    return chemin
+
+
+def mesurer(chemin, algorithme, seuil_mmap, repetitions):
+    """Retourne le meilleur temps (en secondes) et le digest obtenu."""
+    meilleur = None
+    digest = None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        digest = hasher_fichier(chemin, creer_hasher(algorithme), seuil_mmap=seuil_mmap)
+        duree = time.perf_counter() - debut
+        meilleur = duree if meilleur is None else min(meilleur, duree)
+    return meilleur, digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare le hash par blocs et le hash par mmap.")
+    parser.add_argument("--taille-mo", type=int, default=512, help="Taille du fichier de test en Mo")
+    parser.add_argument("--repetitions", type=int, default=3, help="Nombre de mesures par méthode")
+    parser.add_argument("--algorithme", default=None, help="Algorithme d'empreinte")
+    parser.add_argument("--dossier", default=None, help="Dossier du fichier de test (tmpfs ou disque)")
+    args = parser.parse_args()
+
+    algorithme = resoudre_algorithme(args.algorithme)
+
+    with tempfile.TemporaryDirectory(dir=args.dossier) as dossier:
+        chemin = creer_fichier_test(dossier, args.taille_mo)
+
+        # Une première lecture pour que les deux méthodes partent du même état de cache
+        hasher_fichier(chemin, creer_hasher(algorithme))
+
+        duree_blocs, digest_blocs = mesurer(chemin, algorithme, float("inf"), args.repetitions)
+        duree_mmap, digest_mmap = mesurer(chemin, algorithme, 0, args.repetitions)
+
+    resultats = {
+        "algorithme": algorithme,
+        "taille_mo": args.taille_mo,
+        "repetitions": args.repetitions,
+        "blocs": {"secondes": round(duree_blocs, 4), "mo_par_s": round(args.taille_mo / duree_blocs, 1)},
+        "mmap": {"secondes": round(duree_mmap, 4), "mo_par_s": round(args.taille_mo / duree_mmap, 1)},
+        "acceleration": round(duree_blocs / duree_mmap, 2),
+        "digests_identiques": digest_blocs == digest_mmap,
+    }
+    print(json.dumps(resultats, indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark des organiseurs sur des arborescences synthétiques reproductibles.
+
+Usage :
+    python -m benchmarks.bench_organizers --fichiers 10000 100000 --modes simulation reel
+    python -m benchmarks.bench_organizers --fichiers 1000000 --dossier /dev/shm --organiseurs type date
+    python -m benchmarks.bench_organizers --fichiers 100000 --profondeur 3 --largeur 5 --strace
+
+Pour chaque taille, chaque organiseur et chaque mode (simulation / réel), un dossier neuf est généré
+à partir de la même graine, puis l'organiseur est exécuté dans un sous-processus isolé :
+le pic de mémoire (ru_maxrss) et les lectures / écritures (syscr / syscw de /proc/self/io, Linux
+uniquement) ne concernent donc que cet organiseur. La génération du dossier n'est pas chronométrée.
+
+syscr / syscw ne comptent que les appels de la famille read / write : ni stat, ni getdents, ni rename,
+ni unlink. Avec --strace (si strace est installé), les appels système de tous types sont comptés par
+`strace -f -c` lors d'une exécution supplémentaire sur un dossier régénéré, non chronométrée (strace
+ralentit fortement le processus). Le compte retenu est la différence avec une exécution à vide du même
+sous-processus, qui ne fait que les imports : c'est une approximation, au bruit de l'interpréteur près.
+
+Avec --profondeur et --largeur, les fichiers sont répartis dans une arborescence de sous-dossiers
+(`largeur` sous-dossiers par dossier, sur `profondeur` niveaux) et les organiseurs par type et par date
+(classiques et en flux) sont lancés en mode récursif. Les doublons sont toujours cherchés dans toute
+l'arborescence ; l'organisation par nom et le renommage ne traitent que la racine.
+
+Le sous-processus travaille dans un dossier temporaire : l'historique, l'index des empreintes et
+les journaux écrits par les organiseurs n'atteignent pas ceux de l'application. En mode réel,
+les doublons sont supprimés directement au lieu de passer par la corbeille, sauf avec --corbeille.
+
+Le résultat est affiché au format JSON (fichiers/s, lectures / écritures, appels système avec --strace
+et pic de mémoire par mesure).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import shutil
+import tempfile
+import subprocess
+
+RACINE_PROJET = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE_PROJET)
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+
+ORGANISEURS = ("type", "date", "nom", "doublons", "renommage", "type-flux", "date-flux")
+MODES = ("simulation", "reel")
+
+# Extensions tirées au hasard, pour répartir les fichiers entre plusieurs dossiers de type
+EXTENSIONS = [".jpg", ".png", ".pdf", ".txt", ".docx", ".mp3", ".mp4", ".zip", ".csv", ".py", ".xyz", ""]
+
+# Préfixes communs, pour que l'organisation par nom trouve des groupes
+PREFIXES = ["facture", "rapport", "photo_vacances", "releve", "contrat", "scan", "export", "note"]
+
+# Appels système regroupés par famille dans le compte de strace
+FAMILLES_APPELS = {
+    "stat": ("stat", "lstat", "fstat", "newfstatat", "statx", "stat64", "lstat64", "fstat64", "fstatat64"),
+    "getdents": ("getdents", "getdents64"),
+    "open": ("open", "openat", "openat2"),
+    "read": ("read", "pread64", "readv", "preadv"),
+    "write": ("write", "pwrite64", "writev", "pwritev"),
+    "rename": ("rename", "renameat", "renameat2"),
+    "unlink": ("unlink", "unlinkat"),
+    "mkdir": ("mkdir", "mkdirat"),
+}
+
+
+# ----------- GÉNÉRATION DES ARBORESCENCES -----------
+
+def tirer_taille(rng, taille_moyenne_ko, taille_max_ko):
+    """Tire une taille de fichier (en octets) selon une loi log-normale bornée."""
+    moyenne = max(1, taille_moyenne_ko * 1024)
+    taille = int(rng.lognormvariate(0, 1) * moyenne / 1.65)  # E[lognormale(0, 1)] ≈ 1.65
+    return max(0, min(taille, taille_max_ko * 1024))
+
+
+def lister_sous_dossiers(dossier, profondeur, largeur):
+    """Crée l'arborescence de `largeur` sous-dossiers par dossier sur `profondeur` niveaux et retourne tous ses dossiers."""
+    dossiers = [dossier]
+    niveau = [dossier]
+    for _ in range(profondeur):
+        suivant = []
+        for parent in niveau:
+            for j in range(largeur):
+                sous_dossier = os.path.join(parent, f"branche_{j:02d}")
+                os.mkdir(sous_dossier)
+                suivant.append(sous_dossier)
+        dossiers.extend(suivant)
+        niveau = suivant
+    return dossiers
+
+
+def generer_arborescence(dossier, nb_fichiers, graine=42, taille_moyenne_ko=4, taille_max_ko=1024,
+                         ratio_doublons=0.1, ratio_collisions=0.05, profondeur=0, largeur=4):
+    """
+    Génère un dossier synthétique reproductible.
+
+    Args:
+        dossier: Dossier (vide) à remplir
+        nb_fichiers: Nombre de fichiers à créer, répartis au hasard entre la racine et ses sous-dossiers
+        graine: Graine du générateur pseudo-aléatoire
+        taille_moyenne_ko: Taille moyenne des fichiers (loi log-normale)
+        taille_max_ko: Taille maximale d'un fichier
+        ratio_doublons: Part des fichiers dont le contenu copie un fichier précédent
+        ratio_collisions: Part des fichiers dont le nom existe déjà dans leur dossier de type,
+            ce qui oblige les organiseurs à résoudre un conflit de nom
+        profondeur: Nombre de niveaux de sous-dossiers (0 = tous les fichiers à la racine)
+        largeur: Nombre de sous-dossiers de chaque dossier
+
+    Returns:
+        Dictionnaire décrivant l'arborescence générée
+    """
+    from core.organizer_type import determiner_dossier_type
+
+    rng = random.Random(graine)
+    dossiers = lister_sous_dossiers(dossier, profondeur, largeur)
+    contenus = []
+    nb_doublons = 0
+    nb_collisions = 0
+    octets = 0
+    debut_annees = time.mktime((2015, 1, 1, 0, 0, 0, 0, 0, -1))
+    fin_annees = time.mktime((2025, 12, 31, 0, 0, 0, 0, 0, -1))
+
+    for i in range(nb_fichiers):
+        extension = rng.choice(EXTENSIONS)
+        nom = f"{rng.choice(PREFIXES)}_{i:07d}{extension}"
+
+        if contenus and rng.random() < ratio_doublons:
+            contenu = rng.choice(contenus)
+            nb_doublons += 1
+        else:
+            contenu = rng.randbytes(tirer_taille(rng, taille_moyenne_ko, taille_max_ko))
+            if len(contenus) < 1000:
+                contenus.append(contenu)
+            else:
+                contenus[rng.randrange(len(contenus))] = contenu
+
+        chemin = os.path.join(rng.choice(dossiers), nom)
+        with open(chemin, "wb") as f:
+            f.write(contenu)
+        date = rng.uniform(debut_annees, fin_annees)
+        os.utime(chemin, (date, date))
+        octets += len(contenu)
+
+        if rng.random() < ratio_collisions:
+            dossier_type = os.path.join(dossier, determiner_dossier_type(nom))
+            os.makedirs(dossier_type, exist_ok=True)
+            open(os.path.join(dossier_type, nom), "wb").close()
+            nb_collisions += 1
+
+    return {
+        "fichiers": nb_fichiers,
+        "dossiers": len(dossiers),
+        "profondeur": profondeur,
+        "largeur": largeur,
+        "octets": octets,
+        "doublons": nb_doublons,
+        "collisions": nb_collisions,
+    }
+
+
+# ----------- MESURE (SOUS-PROCESSUS) -----------
+
+def lire_io():
+    """
+    Retourne les compteurs syscr / syscw du processus courant, ou None hors Linux.
+    Ils ne comptent que les appels de lecture et d'écriture (voir --strace pour les autres).
+    """
+    try:
+        with open("/proc/self/io", "r") as f:
+            valeurs = dict(ligne.split(":", 1) for ligne in f if ":" in ligne)
+        return {"syscr": int(valeurs["syscr"]), "syscw": int(valeurs["syscw"])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def pic_memoire_mo():
+    """Retourne le pic de mémoire résidente du processus courant en Mo, ou None si indisponible."""
+    if not RESOURCE_AVAILABLE:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en Ko sous Linux et en octets sous macOS
+    return round(pic / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def charger_organiseur(organiseur):
+    """
+    Importe l'organiseur demandé et retourne une fonction (dossier, mode_simulation, recursif)
+    qui le lance et retourne le nombre de fichiers traités.
+    """
+    if organiseur == "type":
+        from core.organizer_type import classer_fichier_par_type
+        return lambda dossier, mode_simulation, recursif: classer_fichier_par_type(
+            dossier, mode_simulation, recursif=recursif)
+    if organiseur == "date":
+        from core.organizer_date import classer_par_date
+        return lambda dossier, mode_simulation, recursif: classer_par_date(dossier, mode_simulation, recursif=recursif)
+    if organiseur == "nom":
+        from core.organizer_name import classer_fichier_par_nom
+        return lambda dossier, mode_simulation, recursif: classer_fichier_par_nom(dossier, mode_simulation)
+    if organiseur == "doublons":
+        from core.organizer_utils import supprimer_doublons
+        return lambda dossier, mode_simulation, recursif: supprimer_doublons(dossier, mode_simulation)
+    if organiseur == "type-flux":
+        from core.pipeline import classer_fichier_par_type_flux
+        return lambda dossier, mode_simulation, recursif: classer_fichier_par_type_flux(
+            dossier, mode_simulation, recursif=recursif)
+    if organiseur == "date-flux":
+        from core.pipeline import classer_par_date_flux
+        return lambda dossier, mode_simulation, recursif: classer_par_date_flux(
+            dossier, mode_simulation, recursif=recursif)
+    if organiseur == "renommage":
+        from core.rename import renommer_fichiers
+        return lambda dossier, mode_simulation, recursif: renommer_fichiers(
+            dossier, mode_simulation).get("fichiers_traites", 0)
+    raise ValueError(f"Organiseur inconnu : {organiseur}")
+
+
+def mesurer(organiseur, dossier, mode_simulation, corbeille, journaux, recursif, a_vide=False):
+    """
+    Exécute et mesure un organiseur dans le processus courant (appelé dans le sous-processus).
+    Avec `a_vide`, seuls les imports sont faits : c'est la référence soustraite au compte de strace.
+    """
+    if not journaux:
+        from logs.logger import logger  # Le logger fixe son niveau à l'import : l'importer avant de le réduire
+        logger.setLevel(logging.WARNING)
+        logging.getLogger("core.rename").setLevel(logging.WARNING)
+    if not corbeille:
+        import core.plan
+        core.plan._supprimer = lambda suppression: os.remove(suppression.chemin)
+
+    executer = charger_organiseur(organiseur)
+    if a_vide:
+        return {}
+
+    io_avant = lire_io()
+    debut = time.perf_counter()
+    traites = executer(dossier, mode_simulation, recursif)
+    duree = time.perf_counter() - debut
+    io_apres = lire_io()
+
+    return {
+        "secondes": round(duree, 4),
+        "traites": traites,
+        "lectures_ecritures": None if io_avant is None or io_apres is None else {
+            cle: io_apres[cle] - io_avant[cle] for cle in io_avant
+        },
+        "pic_memoire_mo": pic_memoire_mo(),
+    }
+
+
+def commande_mesure(organiseur, dossier, mode, corbeille, journaux, recursif, a_vide=False):
+    """Retourne la ligne de commande du sous-processus de mesure."""
+    commande = [sys.executable, os.path.abspath(__file__), "--mesurer", organiseur, dossier, mode]
+    for option, active in (("--corbeille", corbeille), ("--journaux", journaux),
+                           ("--recursif", recursif), ("--a-vide", a_vide)):
+        if active:
+            commande.append(option)
+    return commande
+
+
+def mesurer_dans_sous_processus(organiseur, dossier, mode, corbeille, journaux, recursif):
+    """Mesure un organiseur dans un processus neuf, dont le dossier de travail est temporaire."""
+    commande = commande_mesure(organiseur, dossier, mode, corbeille, journaux, recursif)
+    with tempfile.TemporaryDirectory(prefix="bench_travail_") as dossier_travail:
+        sortie = subprocess.run(commande, cwd=dossier_travail, capture_output=True, text=True)
+    if sortie.returncode != 0:
+        return {"erreur": sortie.stderr.strip().splitlines()[-1] if sortie.stderr.strip() else "échec"}
+    return json.loads(sortie.stdout.strip().splitlines()[-1])
+
+
+# ----------- COMPTE DES APPELS SYSTÈME (STRACE) -----------
+
+def lire_resume_strace(chemin):
+    """Lit le résumé de `strace -c` et retourne {appel système: nombre d'appels}."""
+    appels = {}
+    with open(chemin, "r", encoding="utf-8", errors="replace") as f:
+        for ligne in f:
+            colonnes = ligne.split()
+            # % time, seconds, usecs/call, calls, [errors,] syscall
+            if len(colonnes) < 5 or not colonnes[3].isdigit() or colonnes[-1] == "total":
+                continue
+            appels[colonnes[-1]] = int(colonnes[3])
+    return appels
+
+
+def compter_appels_systeme(commande):
+    """Exécute la commande sous `strace -f -c` et retourne {appel système: nombre d'appels}, ou None en cas d'échec."""
+    with tempfile.TemporaryDirectory(prefix="bench_travail_") as dossier_travail:
+        resume = os.path.join(dossier_travail, "strace.txt")
+        sortie = subprocess.run(["strace", "-f", "-c", "-o", resume] + commande,
+                                cwd=dossier_travail, capture_output=True, text=True)
+        if sortie.returncode != 0 or not os.path.exists(resume):
+            return None
+        return lire_resume_strace(resume)
+
+
+def mesurer_appels_systeme(organiseur, dossier, mode, corbeille, recursif):
+    """
+    Compte les appels système d'un organiseur : exécution sous strace moins une exécution à vide.
+
+    Returns:
+        Dictionnaire {"total", "par_famille"} ou {"erreur"}
+    """
+    appels = compter_appels_systeme(commande_mesure(organiseur, dossier, mode, corbeille, False, recursif))
+    reference = compter_appels_systeme(commande_mesure(organiseur, dossier, mode, corbeille, False, recursif,
+                                                       a_vide=True))
+    if appels is None or reference is None:
+        return {"erreur": "échec de strace"}
+
+    differences = {nom: appels.get(nom, 0) - reference.get(nom, 0) for nom in set(appels) | set(reference)}
+    return {
+        "total": sum(differences.values()),
+        "par_famille": {famille: sum(differences.get(nom, 0) for nom in noms)
+                        for famille, noms in FAMILLES_APPELS.items()},
+    }
+
+
+# ----------- PROGRAMME PRINCIPAL -----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure les organiseurs sur des dossiers synthétiques.")
+    parser.add_argument("--fichiers", type=int, nargs="+", default=[10000],
+                        help="Nombre(s) de fichiers des dossiers générés (ex: 10000 100000 1000000)")
+    parser.add_argument("--organiseurs", nargs="+", choices=ORGANISEURS, default=list(ORGANISEURS))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--taille-moyenne-ko", type=float, default=4, help="Taille moyenne des fichiers en Ko")
+    parser.add_argument("--taille-max-ko", type=int, default=1024, help="Taille maximale d'un fichier en Ko")
+    parser.add_argument("--ratio-doublons", type=float, default=0.1, help="Part des fichiers en double")
+    parser.add_argument("--ratio-collisions", type=float, default=0.05, help="Part des noms déjà pris à destination")
+    parser.add_argument("--graine", type=int, default=42, help="Graine de génération")
+    parser.add_argument("--profondeur", type=int, default=0,
+                        help="Niveaux de sous-dossiers (0 = tous les fichiers à la racine)")
+    parser.add_argument("--largeur", type=int, default=4, help="Nombre de sous-dossiers de chaque dossier")
+    parser.add_argument("--strace", action="store_true",
+                        help="Compter tous les appels système avec strace (exécution supplémentaire)")
+    parser.add_argument("--dossier", default=None, help="Dossier des arborescences de test (tmpfs ou disque)")
+    parser.add_argument("--corbeille", action="store_true", help="Envoyer réellement les doublons à la corbeille")
+    parser.add_argument("--journaux", action="store_true", help="Conserver les journaux INFO des organiseurs")
+    parser.add_argument("--sortie", default=None, help="Fichier JSON où écrire les résultats")
+    parser.add_argument("--mesurer", nargs=3, metavar=("ORGANISEUR", "DOSSIER", "MODE"), help=argparse.SUPPRESS)
+    parser.add_argument("--recursif", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--a-vide", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mesurer:
+        organiseur, dossier, mode = args.mesurer
+        resultat = mesurer(organiseur, dossier, mode == "simulation", args.corbeille, args.journaux,
+                           args.recursif, args.a_vide)
+        print(json.dumps(resultat, ensure_ascii=False))
+        return
+
+    if args.strace and shutil.which("strace") is None:
+        parser.error("--strace demande que strace soit installé")
+
+    recursif = args.profondeur > 0
+
+    def generer(dossier):
+        return generer_arborescence(
+            dossier, nb_fichiers, args.graine, args.taille_moyenne_ko, args.taille_max_ko,
+            args.ratio_doublons, args.ratio_collisions, args.profondeur, args.largeur)
+
+    mesures = []
+    for nb_fichiers in args.fichiers:
+        for organiseur in args.organiseurs:
+            for mode in args.modes:
+                with tempfile.TemporaryDirectory(prefix="bench_organisation_", dir=args.dossier) as dossier:
+                    debut = time.perf_counter()
+                    arborescence = generer(dossier)
+                    generation = time.perf_counter() - debut
+
+                    resultat = mesurer_dans_sous_processus(organiseur, dossier, mode, args.corbeille, args.journaux,
+                                                           recursif)
+
+                if args.strace:
+                    # Dossier régénéré : l'exécution chronométrée a pu le modifier
+                    with tempfile.TemporaryDirectory(prefix="bench_organisation_", dir=args.dossier) as dossier:
+                        generer(dossier)
+                        resultat["appels_systeme"] = mesurer_appels_systeme(organiseur, dossier, mode,
+                                                                            args.corbeille, recursif)
+
+                if "secondes" in resultat:
+                    resultat["fichiers_par_s"] = round(nb_fichiers / resultat["secondes"], 1) if resultat["secondes"] else None
+                mesure = {"organiseur": organiseur, "mode": mode, "arborescence": arborescence,
+                          "generation_secondes": round(generation, 2), **resultat}
+                mesures.append(mesure)
+                print(f"{organiseur:>10} {mode:>10} {nb_fichiers:>8} fichiers : "
+                      f"{resultat.get('fichiers_par_s', resultat.get('erreur'))} fichiers/s", file=sys.stderr)
+
+    resultats = {
+        "graine": args.graine,
+        "profondeur": args.profondeur,
+        "largeur": args.largeur,
+        "taille_moyenne_ko": args.taille_moyenne_ko,
+        "taille_max_ko": args.taille_max_ko,
+        "ratio_doublons": args.ratio_doublons,
+        "ratio_collisions": args.ratio_collisions,
+        "corbeille": args.corbeille,
+        "mesures": mesures,
+    }
+    texte = json.dumps(resultats, indent=4, ensure_ascii=False)
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            f.write(texte)
+    print(texte)
+
+
+if __name__ == "__main__":
+    main()
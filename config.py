@@ -45,6 +45,82 @@ DEFAULT_TYPES_FICHIERS = {
     "Autres": []
 }
 
+# ----------- CONFIGURATION DU CALCUL DES EMPREINTES -----------
+
+# Algorithme d'empreinte : "blake2b" (toujours disponible), "xxh3_128" (si xxhash est installé),
+# "sha256" ou "md5"
+HASH_ALGORITHME = "blake2b"
+
+# Taille du tampon de lecture réutilisé par chaque thread de hash
+HASH_TAILLE_TAMPON = 1024 * 1024
+
+# Au-delà de cette taille, le fichier est projeté en mémoire (mmap) au lieu d'être lu par blocs
+HASH_SEUIL_MMAP = 64 * 1024 * 1024
+
+# Nombre total de threads de hash (hashlib libère le GIL pendant le calcul)
+HASH_NB_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+
+# Nombre de lectures simultanées autorisées par périphérique de stockage
+HASH_CONCURRENCE_PAR_DEFAUT = 4
+# Limites spécifiques par point de montage, ex: {"/mnt/nas": 2, "D:/": 8}
+HASH_CONCURRENCE_PAR_PERIPHERIQUE = {}
+
+# Nombre maximal d'empreintes conservées dans l'index persistant (les moins récemment utilisées sont oubliées)
+HASH_INDEX_MAX_ENTREES = 100000
+
+# ----------- CONFIGURATION DE L'EXTRACTION DE CONTENU -----------
+
+# Nombre de processus pour l'analyse du contenu des fichiers (renommage intelligent)
+EXTRACTION_NB_PROCESSUS = os.cpu_count() or 1
+
+# Durée maximale d'analyse d'un fichier (secondes) : au-delà, le fichier est ignoré
+EXTRACTION_DELAI_MAX = 60
+
+# En dessous de ce nombre de fichiers, l'analyse se fait dans un seul processus isolé
+EXTRACTION_SEUIL_PARALLELE = 8
+
+# Nombre maximal d'analyses conservées dans le cache d'extraction (les plus anciennes sont oubliées)
+EXTRACTION_CACHE_MAX_ENTREES = 10000
+
+# Nombre de caractères du contenu extrait conservés dans le cache
+EXTRACTION_CACHE_TAILLE_EXTRAIT = 300
+
+# Taille des blocs lus en début et en fin de fichier pour l'empreinte du cache d'extraction
+EXTRACTION_CACHE_TAILLE_BLOC = 64 * 1024
+
+# ----------- CONFIGURATION DU PARCOURS DES DOSSIERS -----------
+
+# Nombre de threads pour le parcours récursif des sous-dossiers
+SCAN_NB_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
+# Motifs (glob) des dossiers ignorés lors d'un parcours récursif
+SCAN_EXCLUSIONS = [".git", "__pycache__", "node_modules", "$RECYCLE.BIN", "System Volume Information"]
+
+# ----------- CONFIGURATION DES DÉPLACEMENTS -----------
+
+# Nombre de threads pour les copies entre périphériques différents
+DEPLACEMENT_NB_WORKERS = 4
+
+# Nombre de tentatives par fichier et délai initial (doublé à chaque nouvelle tentative)
+DEPLACEMENT_TENTATIVES = 4
+DEPLACEMENT_DELAI_INITIAL = 0.5
+
+# ----------- CONFIGURATION DE LA SURVEILLANCE -----------
+
+# Fichiers ignorés par la surveillance en temps réel : téléchargements et copies en cours, verrous
+WATCHER_SUFFIXES_TEMPORAIRES = [".part", ".partial", ".crdownload", ".download", ".tmp", ".temp", ".!qb", ".opdownload"]
+WATCHER_PREFIXES_TEMPORAIRES = ["~$", ".~lock.", ".goutputstream-"]
+
+# Pool partagé par tous les dossiers surveillés, servis à tour de rôle par lots de fichiers
+WATCHER_NB_WORKERS = 4
+WATCHER_TAILLE_LOT = 64
+
+# ----------- CONFIGURATION DE LA PLANIFICATION -----------
+
+# Décalage maximal (secondes) entre les réorganisations planifiées des différents dossiers,
+# pour ne pas les lancer toutes à la même minute
+PLANIFICATION_ETALEMENT_MAX = 15 * 60
+
 # ----------- CONFIGURATION DES PARAMÈTRES DYNAMIQUES -----------
 
 DEFAULT_RETENTION_DAYS = 30
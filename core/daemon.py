@@ -0,0 +1,179 @@
+# coding: utf-8
+# Ce fichier est le point d'entrée du service de surveillance sans interface graphique.
+# Il lance la surveillance en temps réel et les passages planifiés de tous les dossiers configurés,
+# écrit des journaux structurés (une ligne JSON par évènement) et tient à jour un fichier d'état
+# lisible par les outils de supervision. Aucun module Qt n'est importé.
+#
+# Usage :
+#     python -m core.daemon --journal logs/daemon.jsonl --statut json/daemon_status.json
+
+import os
+import sys
+import json
+import signal
+import logging
+import argparse
+import threading
+from datetime import datetime
+
+from logs.logger import logger
+from config import APP_NAME, APP_VERSION
+
+from .watcher import ServiceSurveillance, charger_dossiers_surveilles, boucle_planification, WATCHDOG_AVAILABLE
+
+
+DAEMON_STATUS_FILE = r"json/daemon_status.json"
+
+
+class FormateurJSON(logging.Formatter):
+    """Formate chaque enregistrement de journal en une ligne JSON."""
+
+    def format(self, record):
+        ligne = {
+            "horodatage": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "niveau": record.levelname,
+            "module": record.module,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            ligne["exception"] = self.formatException(record.exc_info)
+        return json.dumps(ligne, ensure_ascii=False)
+
+
+def configurer_journaux(chemin_journal=None, niveau="INFO"):
+    """
+    Passe les journaux de l'application au format JSON.
+
+    Args:
+        chemin_journal: Fichier où écrire les lignes JSON (None : sortie standard uniquement)
+        niveau: Niveau minimal des messages
+    """
+    formateur = FormateurJSON()
+    for journal in (logger, logging.getLogger("core.rename")):
+        journal.setLevel(niveau)
+        journal.propagate = False
+        for handler in list(journal.handlers):
+            journal.removeHandler(handler)
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(formateur)
+        journal.addHandler(console)
+
+        if chemin_journal:
+            os.makedirs(os.path.dirname(os.path.abspath(chemin_journal)), exist_ok=True)
+            fichier = logging.FileHandler(chemin_journal, encoding="utf-8")
+            fichier.setFormatter(formateur)
+            journal.addHandler(fichier)
+
+
+class EtatDaemon:
+    """Compteurs du service et écriture atomique du fichier d'état."""
+
+    def __init__(self, chemin, service):
+        self.chemin = chemin
+        self.service = service
+        self.demarre_le = datetime.now().isoformat(timespec="seconds")
+        self._verrou = threading.Lock()
+        self.fichiers_classes = 0
+        self.derniere_activite = None
+
+    def fichiers_traites(self, chemins):
+        """Rappel du service : compte les fichiers classés."""
+        with self._verrou:
+            self.fichiers_classes += len(chemins)
+            self.derniere_activite = datetime.now().isoformat(timespec="seconds")
+
+    def ecrire(self, etat="actif"):
+        pool = self.service.pool
+        with self._verrou:
+            statut = {
+                "application": APP_NAME,
+                "version": APP_VERSION,
+                "pid": os.getpid(),
+                "etat": etat,
+                "demarre_le": self.demarre_le,
+                "mis_a_jour_le": datetime.now().isoformat(timespec="seconds"),
+                "temps_reel": WATCHDOG_AVAILABLE,
+                "dossiers": [config["chemin"] for config in self.service.dossiers],
+                "dossiers_surveilles": sorted(self.service.gestionnaires),
+                "fichiers_en_stabilisation": {dossier: len(gestionnaire.en_attente)
+                                              for dossier, gestionnaire in self.service.gestionnaires.items()},
+                "taches_en_attente": pool.en_attente() if pool is not None else {},
+                "fichiers_classes": self.fichiers_classes,
+                "derniere_activite": self.derniere_activite,
+            }
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.chemin)), exist_ok=True)
+        chemin_temp = self.chemin + ".tmp"
+        try:
+            with open(chemin_temp, "w", encoding="utf-8") as f:
+                json.dump(statut, f, indent=4, ensure_ascii=False)
+            os.replace(chemin_temp, self.chemin)
+        except OSError as e:
+            logger.error(f"Impossible d'écrire le fichier d'état {self.chemin}: {e}")
+
+
+def executer(preferences="preferences.json", nb_workers=None, delai=1, chemin_statut=DAEMON_STATUS_FILE,
+             intervalle_statut=30, arret=None):
+    """
+    Lance le service jusqu'à ce que `arret` soit positionné (SIGINT / SIGTERM en ligne de commande).
+
+    Returns:
+        Code de sortie du processus
+    """
+    arret = arret or threading.Event()
+    try:
+        dossiers = charger_dossiers_surveilles(preferences)
+    except (OSError, KeyError, ValueError) as e:
+        logger.error(f"Configuration des dossiers surveillés illisible : {e}")
+        return 1
+
+    service = ServiceSurveillance(dossiers, nb_workers, delai)
+    etat = EtatDaemon(chemin_statut, service)
+    service.rappel = etat.fichiers_traites
+    service.demarrer()
+    etat.ecrire()
+    logger.info(f"Service démarré (pid {os.getpid()}) pour {len(dossiers)} dossier(s)")
+
+    def publier_etat():
+        while not arret.wait(intervalle_statut):
+            etat.ecrire()
+
+    thread_etat = threading.Thread(target=publier_etat, name="statut", daemon=True)
+    thread_etat.start()
+
+    try:
+        boucle_planification(service, dossiers, arret)
+    finally:
+        arret.set()
+        service.arreter()
+        thread_etat.join()
+        etat.ecrire("arrete")
+        logger.info("Service arrêté")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=f"{APP_NAME} : surveillance et organisation des dossiers sans interface.")
+    parser.add_argument("--preferences", default="preferences.json",
+                        help="Fichier des dossiers surveillés (watched_folders des paramètres s'il est absent)")
+    parser.add_argument("--nb-workers", type=int, default=None, help="Threads du pool partagé")
+    parser.add_argument("--delai", type=float, default=1, help="Délai de stabilisation des fichiers (secondes)")
+    parser.add_argument("--journal", default=None, help="Fichier des journaux JSON (en plus de la sortie standard)")
+    parser.add_argument("--niveau", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--statut", default=DAEMON_STATUS_FILE, help="Fichier d'état mis à jour périodiquement")
+    parser.add_argument("--intervalle-statut", type=float, default=30, help="Période de mise à jour de l'état (secondes)")
+    args = parser.parse_args(argv)
+
+    configurer_journaux(args.journal, args.niveau)
+
+    arret = threading.Event()
+    for signal_arret in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_arret, lambda *_: arret.set())
+
+    return executer(args.preferences, args.nb_workers, args.delai, args.statut, args.intervalle_statut, arret)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
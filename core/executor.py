@@ -0,0 +1,242 @@
+# coding: utf-8
+# Ce fichier exécute les déplacements d'un plan d'organisation.
+# Un déplacement sur le même système de fichiers est effectué immédiatement, sans copie.
+# Les copies entre périphériques différents passent par un fichier temporaire du dossier de destination ;
+# elles sont confiées à un pool de threads borné, et les échecs
+# sont retentés avec un délai exponentiel dans le thread concerné, sans bloquer les autres.
+# Une destination n'est jamais écrasée, même si elle apparaît entre la planification et le déplacement
+# (voir _placer_sans_ecraser).
+# L'avancement est signalé fichier par fichier et l'exécution peut être annulée entre deux fichiers.
+
+import os
+import time
+import errno
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from logs.logger import logger
+from config import DEPLACEMENT_NB_WORKERS, DEPLACEMENT_TENTATIVES, DEPLACEMENT_DELAI_INITIAL
+
+
+class OrganisationAnnulee(Exception):
+    """Levée (ou rendue comme erreur d'un déplacement non effectué) quand l'utilisateur annule l'organisation."""
+
+
+class _CachePeripheriques:
+    """Mémorise le périphérique (st_dev) de chaque dossier et les dossiers déjà créés."""
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._peripheriques = {}
+
+    def peripherique(self, dossier):
+        with self._verrou:
+            if dossier not in self._peripheriques:
+                try:
+                    self._peripheriques[dossier] = os.stat(dossier).st_dev
+                except OSError:
+                    self._peripheriques[dossier] = None
+            return self._peripheriques[dossier]
+
+    def preparer_dossier(self, dossier):
+        """Crée le dossier de destination s'il n'existe pas encore."""
+        if self.peripherique(dossier) is None:
+            os.makedirs(dossier, exist_ok=True)
+            with self._verrou:
+                self._peripheriques.pop(dossier, None)
+
+    def meme_peripherique(self, source, destination):
+        dossier_source = os.path.dirname(source)
+        dossier_destination = os.path.dirname(destination)
+        peripherique_source = self.peripherique(dossier_source)
+        return peripherique_source is not None and peripherique_source == self.peripherique(dossier_destination)
+
+
+def _supprimer_silencieusement(chemin):
+    try:
+        os.remove(chemin)
+    except OSError:
+        pass
+
+
+# Erreurs de os.link sur un système de fichiers sans liens physiques (FAT, exFAT, certains partages réseau)
+_LIENS_NON_SUPPORTES = {errno.EPERM, errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOSYS, errno.EMLINK}
+# Lier le lien symbolique lui-même, pas sa cible, quand la plateforme le permet
+_LIEN_SANS_SUIVRE = {"follow_symlinks": False} if os.link in os.supports_follow_symlinks else {}
+
+
+def _placer_sans_ecraser(chemin, destination):
+    """
+    Donne le nom `destination` au fichier `chemin` (même système de fichiers) sans jamais écraser
+    un fichier existant, même apparu au dernier moment : lève FileExistsError dans ce cas.
+    Sous POSIX, os.rename écrase la destination : un lien physique est créé (refusé par le système
+    si le nom est pris) puis l'ancien nom est retiré. Sans liens physiques, le nom est réservé par
+    un fichier vide créé avec O_EXCL, que le renommage remplace. Sous Windows, os.rename n'écrase pas.
+    """
+    if os.name == "nt":
+        os.rename(chemin, destination)
+        return
+
+    try:
+        os.link(chemin, destination, **_LIEN_SANS_SUIVRE)
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if e.errno not in _LIENS_NON_SUPPORTES:
+            raise
+        os.close(os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+        try:
+            os.rename(chemin, destination)
+        except BaseException:
+            _supprimer_silencieusement(destination)
+            raise
+        return
+
+    try:
+        os.remove(chemin)
+    except FileNotFoundError:
+        pass  # Ancien nom retiré entre-temps : le fichier reste accessible sous sa destination
+    except BaseException:
+        # Ancien nom non supprimable : retirer le lien pour ne pas laisser le fichier sous deux noms
+        _supprimer_silencieusement(destination)
+        raise
+
+
+def _renommer(source, destination):
+    """Déplacement sur le même périphérique : sans copie, sans écraser la destination."""
+    _placer_sans_ecraser(source, destination)
+
+
+def _copier(source, destination):
+    """
+    Déplacement entre périphériques : copie vers un nom temporaire du dossier de destination,
+    mise en place sans écraser la destination, puis suppression de la source.
+    En cas d'échec, rien n'est laissé à la destination : une reprise repart d'un état propre.
+    """
+    if os.path.lexists(destination):
+        raise FileExistsError(f"La destination existe déjà : {destination}")
+
+    dossier, nom = os.path.split(destination)
+    temporaire = os.path.join(dossier, f".{nom}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        shutil.copy2(source, temporaire, follow_symlinks=False)
+        _placer_sans_ecraser(temporaire, destination)
+    except BaseException:
+        _supprimer_silencieusement(temporaire)
+        raise
+
+    try:
+        os.remove(source)
+    except FileNotFoundError:
+        pass  # Source supprimée entre-temps : la copie est la seule version restante, on la garde
+    except BaseException:
+        # Source non supprimable (fichier verrouillé...) : annuler la copie pour ne pas dupliquer le fichier
+        _supprimer_silencieusement(destination)
+        raise
+
+
+def _avec_reprises(operation, source, destination, tentatives, delai_initial, deja_tente=0):
+    """
+    Exécute `operation(source, destination)` en réessayant avec un délai exponentiel.
+    Les erreurs définitives (fichier source disparu, destination occupée) ne sont pas retentées.
+    """
+    for tentative in range(deja_tente, tentatives):
+        if tentative:
+            time.sleep(delai_initial * (2 ** (tentative - 1)))
+        try:
+            operation(source, destination)
+            return
+        except (FileNotFoundError, FileExistsError):
+            raise
+        except OSError as e:
+            if tentative + 1 >= tentatives:
+                raise
+            logger.warning(f"Erreur lors du déplacement de {source} (tentative {tentative + 1}/{tentatives}): {e}")
+
+
+def executer_deplacements(deplacements, nb_workers=None, tentatives=None, delai_initial=None,
+                          progression=None, annulation=None):
+    """
+    Exécute une liste de déplacements (objets ayant `source` et `destination`).
+
+    Args:
+        deplacements: Déplacements à effectuer
+        nb_workers: Taille du pool pour les copies entre périphériques (DEPLACEMENT_NB_WORKERS par défaut)
+        tentatives: Nombre maximal de tentatives par fichier (DEPLACEMENT_TENTATIVES par défaut)
+        delai_initial: Délai avant la première reprise, doublé ensuite (DEPLACEMENT_DELAI_INITIAL par défaut)
+        progression: Fonction appelée avec (fichiers_termines, total) après chaque déplacement,
+            éventuellement depuis un thread du pool
+        annulation: threading.Event ; une fois positionné, plus aucun nouveau déplacement n'est lancé
+
+    Returns:
+        Liste de couples (deplacement, erreur) dans l'ordre des déplacements fournis,
+        `erreur` valant None pour un déplacement réussi et OrganisationAnnulee
+        pour un déplacement non lancé à cause d'une annulation.
+    """
+    nb_workers = nb_workers or DEPLACEMENT_NB_WORKERS
+    tentatives = tentatives or DEPLACEMENT_TENTATIVES
+    delai_initial = DEPLACEMENT_DELAI_INITIAL if delai_initial is None else delai_initial
+
+    cache = _CachePeripheriques()
+    resultats = [None] * len(deplacements)
+    taches = {}
+
+    # Borne le nombre de tâches en attente pour ne pas accumuler toute la file en mémoire
+    places = threading.BoundedSemaphore(nb_workers * 4)
+
+    verrou_progression = threading.Lock()
+    termines = 0
+
+    def signaler():
+        nonlocal termines
+        if progression is None:
+            return
+        with verrou_progression:
+            termines += 1
+            progression(termines, len(deplacements))
+
+    def liberer(_):
+        places.release()
+        signaler()
+
+    def soumettre(executeur, position, operation, deplacement, deja_tente):
+        places.acquire()
+        try:
+            future = executeur.submit(_avec_reprises, operation, deplacement.source, deplacement.destination,
+                                      tentatives, delai_initial, deja_tente)
+        except BaseException:
+            places.release()
+            raise
+        future.add_done_callback(liberer)
+        taches[position] = future
+
+    with ThreadPoolExecutor(max_workers=nb_workers, thread_name_prefix="deplacement") as executeur:
+        for position, deplacement in enumerate(deplacements):
+            if annulation is not None and annulation.is_set():
+                resultats[position] = (deplacement, OrganisationAnnulee())
+                continue
+            try:
+                cache.preparer_dossier(os.path.dirname(deplacement.destination))
+                if cache.meme_peripherique(deplacement.source, deplacement.destination):
+                    try:
+                        _renommer(deplacement.source, deplacement.destination)
+                        resultats[position] = (deplacement, None)
+                        signaler()
+                    except (FileNotFoundError, FileExistsError):
+                        raise
+                    except OSError as e:
+                        # Fichier verrouillé par exemple : les reprises se font dans le pool
+                        logger.warning(f"Erreur lors du déplacement de {deplacement.source}: {e}")
+                        soumettre(executeur, position, _renommer, deplacement, 1)
+                else:
+                    soumettre(executeur, position, _copier, deplacement, 0)
+            except Exception as e:
+                resultats[position] = (deplacement, e)
+                signaler()
+
+        for position, future in taches.items():
+            erreur = future.exception()
+            resultats[position] = (deplacements[position], erreur)
+
+    return resultats
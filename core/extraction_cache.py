@@ -0,0 +1,94 @@
+# coding: utf-8
+# Ce fichier gère le cache persistant des analyses de contenu du renommage intelligent.
+# Chaque analyse (extrait du texte, mots-clés, type de document) est indexée par une empreinte
+# du fichier : taille, date de modification en nanosecondes et hash de ses premiers et derniers octets.
+# L'empreinte ne dépend pas du chemin : un fichier déjà renommé ou déplacé est retrouvé dans le cache.
+# Le cache est un fichier JSON (sqlite3 est exclu de la version empaquetée) ; les entrées les plus
+# anciennes sont oubliées au-delà de EXTRACTION_CACHE_MAX_ENTREES.
+
+import os
+import json
+
+from logs.logger import logger
+from config import EXTRACTION_CACHE_MAX_ENTREES, EXTRACTION_CACHE_TAILLE_BLOC
+
+from .hashing import creer_hasher, resoudre_algorithme, hasher_extremites
+
+
+EXTRACTION_CACHE_FILE = r"json/extraction_cache.json"
+os.makedirs(os.path.dirname(EXTRACTION_CACHE_FILE), exist_ok=True)
+
+
+def charger_cache_extraction(version, chemin_cache=EXTRACTION_CACHE_FILE):
+    """
+    Charge le cache des analyses depuis le fichier JSON.
+
+    Args:
+        version: Version des analyses attendue ; un cache d'une autre version est ignoré
+        chemin_cache: Fichier JSON du cache
+
+    Returns:
+        Dictionnaire {"version", "entrees"} (vide si le fichier est absent, corrompu ou périmé)
+    """
+    vide = {"version": version, "entrees": {}}
+    if not os.path.exists(chemin_cache):
+        return vide
+
+    try:
+        with open(chemin_cache, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning(f"Cache d'extraction illisible, reconstruction : {e}")
+        return vide
+
+    if not isinstance(cache, dict) or cache.get("version") != version or not isinstance(cache.get("entrees"), dict):
+        return vide
+    return cache
+
+
+def sauvegarder_cache_extraction(cache, chemin_cache=EXTRACTION_CACHE_FILE):
+    """Sauvegarde le cache des analyses de façon atomique (fichier temporaire puis remplacement)."""
+    entrees = cache["entrees"]
+    # Les entrées sont rangées de la plus ancienne à la plus récente : on oublie les premières
+    for cle in list(entrees)[:max(0, len(entrees) - EXTRACTION_CACHE_MAX_ENTREES)]:
+        del entrees[cle]
+
+    chemin_temp = chemin_cache + ".tmp"
+    try:
+        with open(chemin_temp, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(chemin_temp, chemin_cache)
+    except OSError as e:
+        logger.error(f"Erreur lors de la sauvegarde du cache d'extraction : {e}")
+
+
+def empreinte_fichier(chemin, taille_bloc=EXTRACTION_CACHE_TAILLE_BLOC):
+    """
+    Retourne l'empreinte "taille:mtime_ns:hash partiel" d'un fichier, ou None s'il est illisible.
+    Le hash porte sur les `taille_bloc` premiers et derniers octets (ses 32 premiers caractères suffisent).
+    """
+    algorithme = resoudre_algorithme()
+    hasher = creer_hasher(algorithme)
+    try:
+        with open(chemin, "rb") as f:
+            stat_fichier = hasher_extremites(f, hasher, taille_bloc)
+    except OSError as e:
+        logger.warning(f"Empreinte impossible pour {chemin}, analyse sans cache : {e}")
+        return None
+    return f"{stat_fichier.st_size}:{stat_fichier.st_mtime_ns}:{algorithme}:{hasher.hexdigest()[:32]}"
+
+
+def rechercher_analyse(cache, empreinte):
+    """Retourne l'analyse mémorisée pour cette empreinte, ou None."""
+    entrees = cache["entrees"]
+    analyse = entrees.pop(empreinte, None)
+    if analyse is not None:
+        # Réinsérée en fin de dictionnaire : elle sera oubliée en dernier
+        entrees[empreinte] = analyse
+    return analyse
+
+
+def enregistrer_analyse(cache, empreinte, analyse):
+    """Ajoute ou met à jour l'analyse d'un fichier dans le cache."""
+    cache["entrees"].pop(empreinte, None)
+    cache["entrees"][empreinte] = analyse
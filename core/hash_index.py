@@ -0,0 +1,90 @@
+# coding: utf-8
+# Ce fichier gère l'index persistant des empreintes de fichiers utilisé par la suppression des doublons.
+# Chaque entrée est indexée par (périphérique, inode) et n'est réutilisée que si la taille et la date
+# de modification (en nanosecondes) du fichier n'ont pas changé depuis le dernier calcul, et si elle
+# a été calculée avec le même algorithme d'empreinte.
+# Les entrées les moins récemment utilisées sont oubliées au-delà de HASH_INDEX_MAX_ENTREES.
+
+import os
+import json
+
+from logs.logger import logger
+from config import HASH_INDEX_MAX_ENTREES
+
+
+HASH_INDEX_FILE = r"json/hash_index.json"
+os.makedirs(os.path.dirname(HASH_INDEX_FILE), exist_ok=True)
+
+
+def charger_index_hash(chemin_index=HASH_INDEX_FILE):
+    """
+    Charge l'index des empreintes depuis le fichier JSON.
+    Retourne un dictionnaire vide si le fichier est absent ou corrompu.
+    """
+    if not os.path.exists(chemin_index):
+        return {}
+
+    try:
+        with open(chemin_index, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        return index if isinstance(index, dict) else {}
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning(f"Index des empreintes illisible, reconstruction : {e}")
+        return {}
+
+
+def sauvegarder_index_hash(index, chemin_index=HASH_INDEX_FILE):
+    """
+    Sauvegarde l'index des empreintes de façon atomique (fichier temporaire puis remplacement).
+    """
+    # Les entrées sont rangées de la moins à la plus récemment utilisée : on oublie les premières
+    for cle in list(index)[:max(0, len(index) - HASH_INDEX_MAX_ENTREES)]:
+        del index[cle]
+
+    chemin_temp = chemin_index + ".tmp"
+    try:
+        with open(chemin_temp, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(chemin_temp, chemin_index)
+    except OSError as e:
+        logger.error(f"Erreur lors de la sauvegarde de l'index des empreintes : {e}")
+
+
+def cle_index(stat_fichier):
+    """Retourne la clé d'index (périphérique:inode) d'un résultat de os.stat."""
+    return f"{stat_fichier.st_dev}:{stat_fichier.st_ino}"
+
+
+def rechercher_hash(index, stat_fichier, algorithme):
+    """
+    Retourne l'empreinte connue pour ce fichier, ou None si elle est absente,
+    si le fichier a été modifié depuis (taille ou mtime_ns différents)
+    ou si elle a été calculée avec un autre algorithme.
+    """
+    cle = cle_index(stat_fichier)
+    entree = index.pop(cle, None)
+    if not entree:
+        return None
+
+    if entree.get("taille") != stat_fichier.st_size or entree.get("mtime_ns") != stat_fichier.st_mtime_ns:
+        return None
+
+    if entree.get("algorithme", "md5") != algorithme:
+        return None
+
+    # Réinsérée en fin de dictionnaire : elle sera oubliée en dernier
+    index[cle] = entree
+    return entree.get("hash")
+
+
+def enregistrer_hash(index, stat_fichier, empreinte, algorithme, chemin=None):
+    """Ajoute ou met à jour l'empreinte d'un fichier dans l'index."""
+    cle = cle_index(stat_fichier)
+    index.pop(cle, None)
+    index[cle] = {
+        "taille": stat_fichier.st_size,
+        "mtime_ns": stat_fichier.st_mtime_ns,
+        "algorithme": algorithme,
+        "hash": empreinte,
+        "chemin": chemin
+    }
@@ -0,0 +1,193 @@
+# coding: utf-8
+# Ce fichier gère le calcul parallèle des empreintes de fichiers.
+# Les fichiers sont répartis sur un pool de threads (hashlib libère le GIL pendant le calcul),
+# avec une limite de lectures simultanées par périphérique de stockage et un tampon de lecture
+# réutilisé par thread. Les résultats sont rendus dans l'ordre des chemins fournis.
+# L'algorithme d'empreinte est sélectionnable : BLAKE2b par défaut, xxHash si le paquet est installé.
+# Les gros fichiers sont projetés en mémoire (mmap) et passés au hasher sans copie.
+
+import os
+import mmap
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from logs.logger import logger
+from config import (HASH_ALGORITHME, HASH_TAILLE_TAMPON, HASH_SEUIL_MMAP, HASH_NB_WORKERS,
+                    HASH_CONCURRENCE_PAR_DEFAUT, HASH_CONCURRENCE_PAR_PERIPHERIQUE)
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+
+ALGORITHME_PAR_DEFAUT = "blake2b"
+
+# Constructeurs de hasher disponibles, indexés par nom d'algorithme
+ALGORITHMES_HASH = {
+    "blake2b": hashlib.blake2b,
+    "sha256": hashlib.sha256,
+    "md5": hashlib.md5,
+}
+if XXHASH_AVAILABLE:
+    ALGORITHMES_HASH["xxh3_128"] = xxhash.xxh3_128
+    ALGORITHMES_HASH["xxh64"] = xxhash.xxh64
+
+
+_tampons = threading.local()
+
+_verrou_limites = threading.Lock()
+_limites_peripheriques = {}
+_peripheriques_dossiers = {}
+
+
+def resoudre_algorithme(algorithme=None):
+    """
+    Retourne le nom de l'algorithme effectivement utilisé.
+    Un algorithme inconnu ou non installé est remplacé par BLAKE2b.
+    """
+    algorithme = (algorithme or HASH_ALGORITHME).lower()
+    if algorithme not in ALGORITHMES_HASH:
+        logger.warning(f"Algorithme de hash '{algorithme}' indisponible, utilisation de {ALGORITHME_PAR_DEFAUT}")
+        return ALGORITHME_PAR_DEFAUT
+    return algorithme
+
+
+def creer_hasher(algorithme=None):
+    """Crée un nouvel objet hasher pour l'algorithme demandé (ou celui de la configuration)."""
+    return ALGORITHMES_HASH[resoudre_algorithme(algorithme)]()
+
+
+def _obtenir_tampon():
+    """Retourne le tampon de lecture du thread courant (alloué une seule fois)."""
+    tampon = getattr(_tampons, "tampon", None)
+    if tampon is None:
+        tampon = bytearray(HASH_TAILLE_TAMPON)
+        _tampons.tampon = tampon
+    return tampon
+
+
+def _hasher_par_blocs(f, hasher):
+    """Lit le fichier ouvert dans le tampon du thread, sans allouer un nouvel objet bytes par bloc."""
+    tampon = _obtenir_tampon()
+    vue = memoryview(tampon)
+    while True:
+        lus = f.readinto(tampon)
+        if not lus:
+            break
+        hasher.update(vue[:lus])
+
+
+def _hasher_mmap(f, hasher):
+    """Projette le fichier ouvert en mémoire et passe une vue sans copie de la région au hasher."""
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as carte:
+        with memoryview(carte) as vue:
+            hasher.update(vue)
+
+
+def hasher_fichier(fichier, hasher, seuil_mmap=None):
+    """
+    Alimente `hasher` avec tout le contenu du fichier et retourne le digest hexadécimal.
+    Les fichiers d'au moins `seuil_mmap` octets (HASH_SEUIL_MMAP par défaut) sont projetés
+    en mémoire ; si la projection échoue, la lecture par blocs prend le relais.
+    """
+    seuil_mmap = HASH_SEUIL_MMAP if seuil_mmap is None else seuil_mmap
+    with open(fichier, 'rb', buffering=0) as f:
+        taille = os.fstat(f.fileno()).st_size
+        if taille and taille >= seuil_mmap:
+            try:
+                _hasher_mmap(f, hasher)
+                return hasher.hexdigest()
+            except (OSError, ValueError) as e:
+                logger.debug(f"Projection mémoire impossible pour {fichier}, lecture par blocs : {e}")
+                f.seek(0)
+        _hasher_par_blocs(f, hasher)
+    return hasher.hexdigest()
+
+
+def hasher_extremites(f, hasher, taille_bloc):
+    """
+    Alimente `hasher` avec les `taille_bloc` premiers et derniers octets du fichier ouvert `f`
+    (tout son contenu s'il fait moins de deux blocs) et retourne son os.stat.
+    """
+    stat_fichier = os.fstat(f.fileno())
+    hasher.update(f.read(taille_bloc))
+    if stat_fichier.st_size > 2 * taille_bloc:
+        f.seek(-taille_bloc, os.SEEK_END)
+    hasher.update(f.read(taille_bloc))
+    return stat_fichier
+
+
+def _concurrence_configuree(peripherique):
+    """Retourne la limite de lectures simultanées configurée pour un périphérique."""
+    for point_montage, limite in HASH_CONCURRENCE_PAR_PERIPHERIQUE.items():
+        try:
+            if os.stat(point_montage).st_dev == peripherique:
+                return limite
+        except OSError:
+            continue
+    return HASH_CONCURRENCE_PAR_DEFAUT
+
+
+def _limite_pour(chemin):
+    """Retourne le sémaphore limitant les lectures sur le périphérique contenant `chemin`."""
+    dossier = os.path.dirname(os.path.abspath(chemin))
+    with _verrou_limites:
+        peripherique = _peripheriques_dossiers.get(dossier)
+        if peripherique is None:
+            try:
+                peripherique = os.stat(dossier).st_dev
+            except OSError:
+                peripherique = -1
+            _peripheriques_dossiers[dossier] = peripherique
+
+        limite = _limites_peripheriques.get(peripherique)
+        if limite is None:
+            limite = threading.BoundedSemaphore(max(1, _concurrence_configuree(peripherique)))
+            _limites_peripheriques[peripherique] = limite
+        return limite
+
+
+def calculer_hashes(chemins, fonction_hash, nb_workers=None, progression=None, annulation=None):
+    """
+    Applique `fonction_hash` à chaque chemin sur un pool de threads.
+
+    Args:
+        chemins: Liste des chemins à traiter
+        fonction_hash: Fonction chemin -> empreinte (ou None en cas d'erreur)
+        nb_workers: Nombre de threads (HASH_NB_WORKERS par défaut)
+        progression: Fonction appelée avec (fichiers_termines, total) après chaque fichier,
+            éventuellement depuis un thread du pool
+        annulation: threading.Event ; une fois positionné, les fichiers restants ne sont plus lus
+            et leur empreinte vaut None
+
+    Returns:
+        Liste des empreintes, dans le même ordre que `chemins`.
+    """
+    chemins = list(chemins)
+    if not chemins:
+        return []
+
+    verrou_progression = threading.Lock()
+    termines = 0
+
+    def tache(chemin):
+        nonlocal termines
+        if annulation is not None and annulation.is_set():
+            return None
+        with _limite_pour(chemin):
+            empreinte = fonction_hash(chemin)
+        if progression is not None:
+            with verrou_progression:
+                termines += 1
+                progression(termines, len(chemins))
+        return empreinte
+
+    nb_workers = min(nb_workers or HASH_NB_WORKERS, len(chemins))
+    if nb_workers <= 1:
+        return [tache(chemin) for chemin in chemins]
+
+    with ThreadPoolExecutor(max_workers=nb_workers, thread_name_prefix="hash") as executeur:
+        return list(executeur.map(tache, chemins))
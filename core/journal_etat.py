@@ -0,0 +1,163 @@
+# coding: utf-8
+# Ce fichier gère le journal d'état des dossiers surveillés, pour les réorganisations incrémentales.
+# Pour chaque dossier organisé, le journal (un fichier JSON par dossier) mémorise la date du dernier
+# passage et, pour chaque répertoire parcouru, sa date de modification, ses sous-dossiers et ses fichiers.
+# Au passage suivant, un répertoire dont la date de modification n'a pas changé n'est pas relu :
+# ses sous-dossiers connus sont seulement vérifiés. Seuls les fichiers apparus depuis sont rendus.
+
+import os
+import json
+import time
+import hashlib
+
+from logs.logger import logger
+
+from .scanner import scanner_dossier, _est_exclu
+from config import SCAN_EXCLUSIONS
+
+
+JOURNAL_ETAT_DIR = r"json/etats"
+os.makedirs(JOURNAL_ETAT_DIR, exist_ok=True)
+
+# Une date de modification plus récente que ce délai n'est pas fiable (granularité du système de
+# fichiers) : le répertoire sera relu au prochain passage même si elle n'a pas changé.
+MARGE_MTIME_NS = 2 * 10**9
+
+
+def chemin_journal(dossier):
+    """Retourne le fichier du journal d'état associé à un dossier."""
+    cle = hashlib.sha1(os.path.normcase(os.path.abspath(dossier)).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(JOURNAL_ETAT_DIR, f"{cle}.json")
+
+
+def charger_journal(dossier):
+    """
+    Charge le journal d'état d'un dossier.
+    Retourne un journal vide (jamais parcouru) si le fichier est absent, corrompu ou d'un autre dossier.
+    """
+    dossier = os.path.abspath(dossier)
+    vide = {"dossier": dossier, "dernier_parcours": None, "repertoires": {}}
+    chemin = chemin_journal(dossier)
+    if not os.path.exists(chemin):
+        return vide
+
+    try:
+        with open(chemin, "r", encoding="utf-8") as f:
+            journal = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning(f"Journal d'état illisible pour {dossier}, parcours complet : {e}")
+        return vide
+
+    if not isinstance(journal, dict) or journal.get("dossier") != dossier:
+        return vide
+    journal.setdefault("repertoires", {})
+    return journal
+
+
+def sauvegarder_journal(journal):
+    """Sauvegarde le journal d'état de façon atomique (fichier temporaire puis remplacement)."""
+    chemin = chemin_journal(journal["dossier"])
+    chemin_temp = chemin + ".tmp"
+    try:
+        with open(chemin_temp, "w", encoding="utf-8") as f:
+            json.dump(journal, f, ensure_ascii=False)
+        os.replace(chemin_temp, chemin)
+    except OSError as e:
+        logger.error(f"Erreur lors de la sauvegarde du journal d'état de {journal['dossier']}: {e}")
+
+
+def _mtime_fiable(mtime_ns, maintenant_ns):
+    """Retourne la date de modification à mémoriser, ou 0 si elle est trop récente pour être fiable."""
+    return mtime_ns if maintenant_ns - mtime_ns > MARGE_MTIME_NS else 0
+
+
+def parcourir_nouveautes(dossier, journal, recursif=False, profondeur_max=None, exclusions=None):
+    """
+    Parcourt le dossier en ne relisant que les répertoires modifiés depuis le passage précédent,
+    et met à jour le journal en conséquence (sans le sauvegarder).
+
+    Args:
+        dossier: Le dossier racine
+        journal: Journal d'état chargé par charger_journal
+        recursif: Si True, descend aussi dans les sous-dossiers
+        profondeur_max: Profondeur maximale du parcours récursif (None pour illimitée)
+        exclusions: Motifs glob des sous-dossiers à ignorer (SCAN_EXCLUSIONS par défaut)
+
+    Returns:
+        Liste des fichiers (os.DirEntry) absents du journal, triée par chemin
+
+    Raises:
+        OSError: Si le dossier racine est illisible (les sous-dossiers illisibles sont ignorés)
+    """
+    dossier = os.path.abspath(dossier)
+    exclusions = SCAN_EXCLUSIONS if exclusions is None else exclusions
+    anciens = journal.get("repertoires", {})
+    repertoires = {}
+    nouveautes = []
+    maintenant_ns = time.time_ns()
+    relus = 0
+
+    a_parcourir = [(dossier, 0)]
+    while a_parcourir:
+        repertoire, profondeur = a_parcourir.pop()
+        relatif = os.path.relpath(repertoire, dossier)
+        try:
+            mtime_ns = os.stat(repertoire).st_mtime_ns
+        except OSError as e:
+            if repertoire == dossier:
+                raise
+            logger.warning(f"Répertoire inaccessible ignoré: {repertoire}: {e}")
+            continue
+
+        etat = anciens.get(relatif)
+        if etat is None or not etat.get("mtime_ns") or etat["mtime_ns"] != mtime_ns:
+            # Répertoire nouveau ou modifié : relire ses entrées
+            connus = set(etat.get("fichiers", [])) if etat else set()
+            fichiers = []
+            sous_dossiers = []
+            try:
+                for entree in scanner_dossier(repertoire, fichiers_seulement=False):
+                    try:
+                        if entree.is_dir(follow_symlinks=False):
+                            if not _est_exclu(entree, dossier, exclusions):
+                                sous_dossiers.append(entree.name)
+                        elif entree.is_file():
+                            fichiers.append(entree.name)
+                            if entree.name not in connus:
+                                nouveautes.append(entree)
+                    except OSError as e:
+                        logger.warning(f"Entrée illisible ignorée: {entree.path}: {e}")
+            except OSError as e:
+                if repertoire == dossier:
+                    raise
+                logger.warning(f"Répertoire inaccessible ignoré: {repertoire}: {e}")
+                continue
+            relus += 1
+            etat = {"mtime_ns": _mtime_fiable(mtime_ns, maintenant_ns),
+                    "sous_dossiers": sous_dossiers, "fichiers": fichiers}
+
+        repertoires[relatif] = etat
+        if recursif and (profondeur_max is None or profondeur < profondeur_max):
+            for nom in etat["sous_dossiers"]:
+                a_parcourir.append((os.path.join(repertoire, nom), profondeur + 1))
+
+    journal["repertoires"] = repertoires
+    journal["dernier_parcours"] = time.time()
+    logger.info(f"Parcours incrémental de {dossier}: {relus}/{len(repertoires)} répertoire(s) relu(s), "
+                f"{len(nouveautes)} nouveau(x) fichier(s)")
+    return sorted(nouveautes, key=lambda entree: entree.path)
+
+
+def oublier_entrees(journal, entrees):
+    """
+    Retire des fichiers du journal pour qu'ils soient rendus comme nouveaux au prochain passage
+    (ex: fichiers apparus pendant une organisation, qui n'ont pas encore été traités).
+    """
+    for entree in entrees:
+        relatif = os.path.relpath(os.path.dirname(entree.path), journal["dossier"])
+        etat = journal["repertoires"].get(relatif)
+        if etat is None:
+            continue
+        if entree.name in etat["fichiers"]:
+            etat["fichiers"].remove(entree.name)
+        etat["mtime_ns"] = 0
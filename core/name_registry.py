@@ -0,0 +1,70 @@
+# coding: utf-8
+# Ce fichier fournit le registre des noms utilisés dans les dossiers de destination.
+# Chaque dossier est listé une seule fois ; les noms attribués pendant la planification y sont ajoutés,
+# et un compteur par nom de base donne directement le prochain suffixe libre (_1, _2, ...),
+# sans sonder le système de fichiers avec os.path.exists pour chaque candidat.
+
+import os
+
+from logs.logger import logger
+
+
+FORMAT_SUFFIXE = "{base}_{numero}{extension}"
+
+
+class RegistreNoms:
+    """Registre des noms de fichiers occupés ou réservés, par dossier de destination."""
+
+    def __init__(self):
+        self._noms = {}
+        self._compteurs = {}
+
+    def _noms_dossier(self, dossier):
+        """Retourne l'ensemble des noms du dossier, lu une seule fois depuis le disque."""
+        cle = os.path.normcase(os.path.abspath(dossier))
+        noms = self._noms.get(cle)
+        if noms is None:
+            try:
+                noms = {os.path.normcase(nom) for nom in os.listdir(dossier)}
+            except FileNotFoundError:
+                noms = set()
+            except OSError as e:
+                logger.warning(f"Impossible de lister {dossier}: {e}")
+                noms = set()
+            self._noms[cle] = noms
+        return noms
+
+    def marquer(self, chemin):
+        """Marque `chemin` comme occupé sans vérifier s'il l'était déjà."""
+        dossier, nom = os.path.split(chemin)
+        self._noms_dossier(dossier).add(os.path.normcase(nom))
+
+    def liberer(self, chemin):
+        """Retire `chemin` du registre (par exemple lorsqu'un fichier quitte le dossier)."""
+        dossier, nom = os.path.split(chemin)
+        self._noms_dossier(dossier).discard(os.path.normcase(nom))
+
+    def reserver(self, chemin, format_suffixe=FORMAT_SUFFIXE):
+        """
+        Retourne `chemin` s'il est libre, sinon le premier chemin suffixé libre, et le réserve.
+        Le compteur de chaque nom de base reprend là où il s'était arrêté : des milliers de
+        fichiers portant le même nom ne coûtent donc qu'une recherche constante chacun.
+        """
+        dossier, nom = os.path.split(chemin)
+        noms = self._noms_dossier(dossier)
+
+        if os.path.normcase(nom) not in noms:
+            noms.add(os.path.normcase(nom))
+            return chemin
+
+        base, extension = os.path.splitext(nom)
+        cle = (os.path.normcase(os.path.abspath(dossier)), base, extension, format_suffixe)
+        numero = self._compteurs.get(cle, 1)
+        candidat = format_suffixe.format(base=base, numero=numero, extension=extension)
+        while os.path.normcase(candidat) in noms:
+            numero += 1
+            candidat = format_suffixe.format(base=base, numero=numero, extension=extension)
+
+        noms.add(os.path.normcase(candidat))
+        self._compteurs[cle] = numero + 1
+        return os.path.join(dossier, candidat)
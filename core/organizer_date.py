@@ -1,85 +1,66 @@
 # coding: utf-8
 
 import os
-import shutil
 
-import time
 from logs.logger import logger
 
 
+from .organizer_utils import obtenir_date_creation
+from .scanner import lister_fichiers, stat_entree, est_dans_dossier
+from .plan import PlanDeplacement, executer_plan
 
 
-
-
-from .organizer_utils import obtenir_date_creation, creer_dossier_si_absent, verifier_conflit_fichier
-
-from .history import  enregistrer_action,enregistrer_organisation
-
-
-
-
-def classer_par_date(dossier, mode_simulation=False, limite_traitement=None):
+def planifier_par_date(dossier, limite_traitement=None, recursif=False, profondeur_max=None, exclusions=None,
+                       entrees=None):
     """
-    Organise les fichiers par année/mois dans des sous-dossiers basés sur leur date de création.
+    Calcule le plan de classement des fichiers par année de création, sans rien déplacer.
     
     Args:
         dossier: Le dossier à organiser
-        mode_simulation: Si True, montre les actions sans les exécuter
         limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+        recursif: Si True, classe aussi les fichiers des sous-dossiers dans les dossiers d'année de la racine
+        profondeur_max: Profondeur maximale du parcours récursif (None pour illimitée)
+        exclusions: Motifs glob des sous-dossiers à ignorer en mode récursif
+        entrees: Fichiers (os.DirEntry) à classer au lieu de parcourir le dossier (réorganisation incrémentale)
+    
+    Returns:
+        PlanDeplacement
     """
-    fichiers = [f for f in os.listdir(dossier) if os.path.isfile(os.path.join(dossier, f))]
+    if entrees is None:
+        entrees = lister_fichiers(dossier, recursif, profondeur_max, exclusions)
+    plan = PlanDeplacement(dossier, mode="date")
     
     # Appliquer la limite si spécifiée
-    if limite_traitement and len(fichiers) > limite_traitement:
-        logger.info(f"Limitation à {limite_traitement} fichiers sur {len(fichiers)} au total")
-        fichiers = fichiers[:limite_traitement]
+    if limite_traitement and len(entrees) > limite_traitement:
+        logger.info(f"Limitation à {limite_traitement} fichiers sur {len(entrees)} au total")
+        entrees = entrees[:limite_traitement]
     
-    fichiers_traites = 0
-    for fichier in fichiers:
-        chemin_complet = os.path.join(dossier, fichier)
-        date_fichier = obtenir_date_creation(chemin_complet)
-       # Déterminer l'année et le trimestre
-        annee = str(date_fichier.year)
-        mois = date_fichier.strftime("%B").capitalize()  # Nom complet du mois en français
-        
-        chemin_destination = os.path.join(dossier, annee)
-        
-        if not mode_simulation:
-            creer_dossier_si_absent(chemin_destination)
-        
-        nouveau_chemin = os.path.join(chemin_destination, fichier)
-        nouveau_chemin = verifier_conflit_fichier(nouveau_chemin)
-        liste_actions = []
-
-        if mode_simulation:
-           if mode_simulation:
-            logger.info(f"[SIMULATION] Déplacement par date: {fichier} → {annee}/{os.path.basename(nouveau_chemin)}")
-        else:
-            try:
-                
-                liste_actions.append({
-                    "type": "Déplacement",
-                    "source": chemin_complet,
-                    "destination": nouveau_chemin,
-                   
-                })
-                enregistrer_organisation(liste_actions)
-                enregistrer_action("Organisation par date", f"Dossier : {dossier}", "nouveau sous dossier crée")
-
-                shutil.move(chemin_complet, nouveau_chemin)
+    for entree in entrees:
+        date_fichier = obtenir_date_creation(entree.path, stat_entree(entree))
+        dossier_destination = os.path.join(dossier, str(date_fichier.year))
+        if est_dans_dossier(entree, dossier_destination):
+            continue  # Déjà classé (mode récursif)
+        plan.ajouter(entree.path, os.path.join(dossier_destination, entree.name), "Classement par date")
+    
+    return plan
 
-                logger.info(f"Déplacé par date: {fichier} → {annee}/{os.path.basename(nouveau_chemin)}")
-                fichiers_traites += 1
 
-            except Exception as e:
-                logger.error(f"Erreur lors du déplacement de {fichier}: {e}")
-                # Attendre et réessayer une fois
-                try:
-                    time.sleep(1)  # Attendre 1 seconde
-                    shutil.move(chemin_complet, nouveau_chemin)
-                    logger.info(f"Déplacé après reprise: {fichier} → {annee}/{os.path.basename(nouveau_chemin)}")
-                    fichiers_traites += 1
-                except Exception as e2:
-                    logger.error(f"Échec définitif pour {fichier}: {e2}")
+def classer_par_date(dossier, mode_simulation=False, limite_traitement=None,
+                     recursif=False, profondeur_max=None, exclusions=None,
+                     progression=None, annulation=None):
+    """
+    Organise les fichiers par année dans des sous-dossiers basés sur leur date de création.
     
-    return fichiers_traites
+    Args:
+        dossier: Le dossier à organiser
+        mode_simulation: Si True, montre les actions sans les exécuter
+        limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+        recursif: Si True, traite aussi les fichiers des sous-dossiers
+        profondeur_max: Profondeur maximale du parcours récursif (None pour illimitée)
+        exclusions: Motifs glob des sous-dossiers à ignorer en mode récursif
+        progression: Fonction appelée avec (fichiers_traites, total, etape) au fil de l'exécution
+        annulation: threading.Event permettant d'interrompre l'organisation entre deux fichiers
+    """
+    plan = planifier_par_date(dossier, limite_traitement, recursif, profondeur_max, exclusions)
+    reussis, _ = executer_plan(plan, mode_simulation, progression, annulation)
+    return len(reussis)
@@ -1,15 +1,12 @@
 # coding: utf-8
 
 import os
-import shutil
-import datetime
-import time
 from logs.logger import logger
 import re
 from pathlib import Path
 from collections import defaultdict
-from .organizer_utils import creer_dossier_si_absent, verifier_conflit_fichier
-from .history import enregistrer_organisation
+from .scanner import lister_fichiers
+from .plan import PlanDeplacement, executer_plan
 
 
 def extraire_nom_base(nom_fichier):
@@ -143,27 +140,44 @@ def creer_nom_dossier_securise(nom):
     return nom_securise.strip()
 
 
-def classer_fichier_par_nom(dossier, mode_simulation=False, limite_traitement=None, seuil_minimum=2):
+def _groupe_existant(dossier, fichier):
+    """Retourne le dossier de groupe déjà présent dans `dossier` auquel le fichier appartient, ou None."""
+    candidats = [extraire_nom_base(fichier)]
+    mots = re.split(r'[-_\s]+', Path(fichier).stem)
+    if len(mots) > 1 and len(mots[0]) > 2:
+        candidats.append(f"Prefixe_{mots[0]}")
+    for nom_groupe in candidats:
+        nom_dossier = creer_nom_dossier_securise(nom_groupe)
+        if nom_groupe and os.path.isdir(os.path.join(dossier, nom_dossier)):
+            return nom_dossier
+    return None
+
+
+def planifier_par_nom(dossier, limite_traitement=None, seuil_minimum=2, entrees=None, rejoindre_groupes=False):
     """
-    Classe les fichiers par noms similaires dans des sous-dossiers.
+    Calcule le plan de classement des fichiers par noms similaires, sans rien déplacer.
     
     Args:
         dossier: Le dossier à organiser
-        mode_simulation: Si True, montre les actions sans les exécuter
         limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
         seuil_minimum: Nombre minimum de fichiers pour créer un groupe
+        entrees: Fichiers (os.DirEntry) du dossier à grouper à la place d'un parcours du dossier
+        rejoindre_groupes: Si True, un fichier sans groupe rejoint le dossier de son groupe s'il existe
+            déjà (ex: facture_003.pdf dans "facture" créé par un passage précédent)
     
     Returns:
-        Nombre de fichiers traités
+        PlanDeplacement
     """
-    logger.info(f"Début de l'organisation par nom dans: {dossier}")
+    plan = PlanDeplacement(dossier, mode="nom")
     
     # Récupérer tous les fichiers du dossier
-    tous_fichiers = [f for f in os.listdir(dossier) if os.path.isfile(os.path.join(dossier, f))]
+    if entrees is None:
+        entrees = lister_fichiers(dossier)
+    tous_fichiers = [entree.name for entree in entrees]
     
     if not tous_fichiers:
         logger.info("Aucun fichier trouvé dans le dossier")
-        return 0
+        return plan
     
     logger.info(f"Nombre total de fichiers trouvés: {len(tous_fichiers)}")
     
@@ -177,90 +191,57 @@ def classer_fichier_par_nom(dossier, mode_simulation=False, limite_traitement=No
     # Grouper les fichiers par noms similaires
     groupes = grouper_fichiers_par_nom(fichiers, seuil_minimum)
     
-    if not groupes:
-        logger.info("Aucun groupe de fichiers similaires trouvé")
-        return 0
-    
-    logger.info(f"Nombre de groupes détectés: {len(groupes)}")
-    
-    fichiers_traites = 0
-    liste_actions = []
+    if groupes:
+        logger.info(f"Nombre de groupes détectés: {len(groupes)}")
     
     for nom_groupe, fichiers_groupe in groupes.items():
-        logger.info(f"Traitement du groupe '{nom_groupe}' avec {len(fichiers_groupe)} fichiers")
-        
         # Créer un nom de dossier sécurisé
         nom_dossier = creer_nom_dossier_securise(nom_groupe)
-        dossier_destination = os.path.join(dossier, nom_dossier)
         
-        if not mode_simulation:
-            creer_dossier_si_absent(dossier_destination)
-        
-        # Traiter chaque fichier du groupe
         for fichier in fichiers_groupe:
-            chemin_source = os.path.join(dossier, fichier)
-            
-            if not os.path.exists(chemin_source):
-                logger.warning(f"Fichier introuvable: {fichier}")
+            plan.ajouter(os.path.join(dossier, fichier),
+                         os.path.join(dossier, nom_dossier, fichier),
+                         "Organisation par nom")
+    
+    if rejoindre_groupes:
+        groupes_fichiers = {fichier for fichiers_groupe in groupes.values() for fichier in fichiers_groupe}
+        for fichier in fichiers:
+            if fichier in groupes_fichiers:
                 continue
-            
-            # Vérifier les conflits et obtenir le chemin final
-            chemin_destination = os.path.join(dossier_destination, fichier)
-            chemin_destination = verifier_conflit_fichier(chemin_destination)
-            
-            if mode_simulation:
-                logger.info(f"[SIMULATION] Déplacement: {fichier} → {nom_dossier}/{os.path.basename(chemin_destination)}")
-            else:
-                try:
-                    date = datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-                    
-                    # Déplacer le fichier
-                    shutil.move(chemin_source, chemin_destination)
-                    
-                    # Enregistrer l'action
-                    action = {
-                        "type": "Organisation par nom",
-                        "source": chemin_source,
-                        "destination": chemin_destination,
-                        "date": date,
-                        "details": f"Déplacement de {fichier} vers {nom_dossier}/{os.path.basename(chemin_destination)}"
-                    }
-                    liste_actions.append(action)
-                    
-                    logger.info(f"Déplacé: {fichier} → {nom_dossier}/{os.path.basename(chemin_destination)}")
-                    fichiers_traites += 1
-                    
-                except FileNotFoundError:
-                    logger.error(f"Fichier introuvable lors du déplacement: {fichier}")
-                except Exception as e:
-                    logger.error(f"Erreur lors du déplacement de {fichier}: {e}")
-                    
-                    # Tentative de reprise après délai
-                    try:
-                        time.sleep(1)
-                        shutil.move(chemin_source, chemin_destination)
-                        logger.info(f"Déplacé après reprise: {fichier} → {nom_dossier}/{os.path.basename(chemin_destination)}")
-                        fichiers_traites += 1
-                        
-                        # Enregistrer l'action après reprise
-                        action = {
-                            "type": "Organisation par nom",
-                            "source": chemin_source,
-                            "destination": chemin_destination,
-                            "date": datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
-                            "details": f"Déplacement de {fichier} vers {nom_dossier}/{os.path.basename(chemin_destination)} (après reprise)"
-                        }
-                        liste_actions.append(action)
-                        
-                    except Exception as e2:
-                        logger.error(f"Échec définitif pour {fichier}: {e2}")
-    
-    # Enregistrer toutes les actions dans l'historique
-    if liste_actions and not mode_simulation:
-        enregistrer_organisation(liste_actions)
-    
-    logger.info(f"Organisation terminée. Fichiers traités: {fichiers_traites}")
-    return fichiers_traites
+            nom_dossier = _groupe_existant(dossier, fichier)
+            if nom_dossier:
+                plan.ajouter(os.path.join(dossier, fichier),
+                             os.path.join(dossier, nom_dossier, fichier),
+                             "Organisation par nom (groupe existant)")
+    
+    if not plan.deplacements:
+        logger.info("Aucun groupe de fichiers similaires trouvé")
+    return plan
+
+
+def classer_fichier_par_nom(dossier, mode_simulation=False, limite_traitement=None, seuil_minimum=2,
+                            progression=None, annulation=None):
+    """
+    Classe les fichiers par noms similaires dans des sous-dossiers.
+    
+    Args:
+        dossier: Le dossier à organiser
+        mode_simulation: Si True, montre les actions sans les exécuter
+        limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+        seuil_minimum: Nombre minimum de fichiers pour créer un groupe
+        progression: Fonction appelée avec (fichiers_traites, total, etape) au fil de l'exécution
+        annulation: threading.Event permettant d'interrompre l'organisation entre deux fichiers
+    
+    Returns:
+        Nombre de fichiers traités
+    """
+    logger.info(f"Début de l'organisation par nom dans: {dossier}")
+    
+    plan = planifier_par_nom(dossier, limite_traitement, seuil_minimum)
+    reussis, _ = executer_plan(plan, mode_simulation, progression, annulation)
+    
+    logger.info(f"Organisation terminée. Fichiers traités: {len(reussis)}")
+    return len(reussis)
 
 
 # Fonction utilitaire pour utilisation directe
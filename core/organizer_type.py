@@ -1,90 +1,79 @@
 # coding: utf-8
 
 import os
-import shutil
 
-import time
 from logs.logger import logger
-import re
 
 
-from .organizer_utils import creer_dossier_si_absent, verifier_conflit_fichier
-from .history import enregistrer_organisation, enregistrer_action
+from .scanner import lister_fichiers, est_dans_dossier
+from .plan import PlanDeplacement, executer_plan
 
 
 from config import DEFAULT_TYPES_FICHIERS
 
-def classer_fichier_par_type(dossier, mode_simulation=False, limite_traitement=None):
+def determiner_dossier_type(fichier):
     """
-    Classe les fichiers par type dans des sous-dossiers.
+    Retourne le nom du sous-dossier de type d'un fichier d'après son extension.
+    Une extension inconnue donne son propre nom (ex: '.xyz' -> 'Xyz'), l'absence d'extension 'Autres'.
+    """
+    _, extension = os.path.splitext(fichier)
+    extension = extension.lower()
+
+    for type_, extensions in DEFAULT_TYPES_FICHIERS.items():
+        if extension in extensions:
+            return type_
+
+    return extension.lstrip('.').capitalize() or "Autres"  # Enlever le point et mettre en majuscule
+
+def planifier_par_type(dossier, limite_traitement=None, recursif=False, profondeur_max=None, exclusions=None,
+                       entrees=None):
+    """
+    Calcule le plan de classement des fichiers par type, sans rien déplacer.
     
     Args:
         dossier: Le dossier à organiser
-        mode_simulation: Si True, montre les actions sans les exécuter
         limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+        recursif: Si True, classe aussi les fichiers des sous-dossiers dans les dossiers de type de la racine
+        profondeur_max: Profondeur maximale du parcours récursif (None pour illimitée)
+        exclusions: Motifs glob des sous-dossiers à ignorer en mode récursif
+        entrees: Fichiers (os.DirEntry) à classer au lieu de parcourir le dossier (réorganisation incrémentale)
+    
+    Returns:
+        PlanDeplacement
     """
-    fichiers = [f for f in os.listdir(dossier) if os.path.isfile(os.path.join(dossier, f))]
-    liste_actions = []
+    if entrees is None:
+        entrees = lister_fichiers(dossier, recursif, profondeur_max, exclusions)
+    plan = PlanDeplacement(dossier, mode="type")
     
     # Appliquer la limite si spécifiée
-    if limite_traitement and len(fichiers) > limite_traitement:
-        logger.info(f"Limitation à {limite_traitement} fichiers sur {len(fichiers)} au total")
-        fichiers = fichiers[:limite_traitement]
+    if limite_traitement and len(entrees) > limite_traitement:
+        logger.info(f"Limitation à {limite_traitement} fichiers sur {len(entrees)} au total")
+        entrees = entrees[:limite_traitement]
     
-    fichiers_traites = 0
-    for fichier in fichiers:
-        chemin_complet = os.path.join(dossier, fichier)
-
-        if os.path.isfile(chemin_complet):
-            _, extension = os.path.splitext(fichier)
-            extension = extension.lower()
-
-            destination = extension.lstrip('.').capitalize()  # Enlever le point et mettre en majuscule
-            for type_, extensions in DEFAULT_TYPES_FICHIERS.items():
-                if extension in extensions:
-                    destination = type_
-                    break
-
-            dossier_destination = os.path.join(dossier, destination)
-            
-            if not mode_simulation:
-                creer_dossier_si_absent(dossier_destination)
-            
-            nouveau_chemin = os.path.join(dossier_destination, fichier)
-            nouveau_chemin = verifier_conflit_fichier(nouveau_chemin)
-            
-            if mode_simulation:
-                logger.info(f"[SIMULATION] Déplacement: {fichier} → {destination}/{os.path.basename(nouveau_chemin)}")
-            else:
-                try:
-                    from datetime import datetime
-
-                    date = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-
-                   
-                    
-                    
-                    shutil.move(chemin_complet, nouveau_chemin)
-                   
+    for entree in entrees:
+        dossier_destination = os.path.join(dossier, determiner_dossier_type(entree.name))
+        if est_dans_dossier(entree, dossier_destination):
+            continue  # Déjà classé (mode récursif)
+        plan.ajouter(entree.path, os.path.join(dossier_destination, entree.name), "Classement par type")
+    
+    return plan
 
-                    
-                    fichiers_traites += 1
-               
-                    logger.info(f"Déplacé: {fichier} → {destination}/{os.path.basename(nouveau_chemin)}")
-                   
-                    
-                except FileNotFoundError:
-                    logger.error(f"Fichier introuvable lors du déplacement: {fichier}")
-                except Exception as e:
-                    logger.error(f"Erreur lors du déplacement de {fichier}: {e}")
-                    # Attendre et réessayer une fois
-                    try:
-                        time.sleep(1)  # Attendre 1 seconde
-                        shutil.move(chemin_complet, nouveau_chemin)
-                        logger.info(f"Déplacé après reprise: {fichier} → {destination}/{os.path.basename(nouveau_chemin)}")
-                        fichiers_traites += 1
-                    except Exception as e2:
-                        logger.error(f"Échec définitif pour {fichier}: {e2}")
-                   
+def classer_fichier_par_type(dossier, mode_simulation=False, limite_traitement=None,
+                             recursif=False, profondeur_max=None, exclusions=None,
+                             progression=None, annulation=None):
+    """
+    Classe les fichiers par type dans des sous-dossiers.
     
-    return fichiers_traites
\ No newline at end of file
+    Args:
+        dossier: Le dossier à organiser
+        mode_simulation: Si True, montre les actions sans les exécuter
+        limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+        recursif: Si True, traite aussi les fichiers des sous-dossiers
+        profondeur_max: Profondeur maximale du parcours récursif (None pour illimitée)
+        exclusions: Motifs glob des sous-dossiers à ignorer en mode récursif
+        progression: Fonction appelée avec (fichiers_traites, total, etape) au fil de l'exécution
+        annulation: threading.Event permettant d'interrompre l'organisation entre deux fichiers
+    """
+    plan = planifier_par_type(dossier, limite_traitement, recursif, profondeur_max, exclusions)
+    reussis, _ = executer_plan(plan, mode_simulation, progression, annulation)
+    return len(reussis)
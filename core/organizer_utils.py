@@ -14,6 +14,11 @@ import locale
 import send2trash
 
 from config import DEFAULT_TYPES_FICHIERS
+from .hash_index import charger_index_hash, sauvegarder_index_hash, rechercher_hash, enregistrer_hash
+from .hashing import hasher_fichier, hasher_extremites, calculer_hashes, creer_hasher, resoudre_algorithme
+from .scanner import lister_fichiers, stat_entree
+from .plan import PlanDeplacement, executer_plan
+from .executor import OrganisationAnnulee
 
 # Configurer la langue en français
 locale.setlocale(locale.LC_TIME, 'fr_FR.UTF-8')
@@ -21,6 +26,9 @@ locale.setlocale(locale.LC_TIME, 'fr_FR.UTF-8')
 
 # Dictionnaire d'extensions par type
 
+# Taille des blocs lus en début et en fin de fichier pour le hash partiel
+TAILLE_BLOC_PARTIEL = 64 * 1024
+
 
 
 def creer_dossier_si_absent(path):
@@ -29,26 +37,136 @@ def creer_dossier_si_absent(path):
         os.makedirs(path)
         logger.info(f"Dossier créé: {path}")
 
-def calculer_hash(fichier):
-    """Calcule le hash MD5 d'un fichier."""
-    hasher = hashlib.md5()
+def calculer_hash(fichier, index=None, algorithme=None):
+    """
+    Calcule l'empreinte d'un fichier (algorithme de la configuration par défaut, BLAKE2b).
+    Si un index d'empreintes est fourni, il est consulté d'abord et mis à jour
+    pour que les fichiers inchangés ne soient jamais relus.
+    """
+    algorithme = resoudre_algorithme(algorithme)
+    try:
+        if index is not None:
+            stat_fichier = os.stat(fichier)
+            empreinte = rechercher_hash(index, stat_fichier, algorithme)
+            if empreinte:
+                return empreinte
+
+        empreinte = hasher_fichier(fichier, creer_hasher(algorithme))
+
+        if index is not None:
+            enregistrer_hash(index, stat_fichier, empreinte, algorithme, fichier)
+        return empreinte
+    except Exception as e:
+        logger.error(f"Erreur lors du hash du fichier {fichier} : {e}")
+        return None
+
+def calculer_hash_partiel(fichier, taille_bloc=TAILLE_BLOC_PARTIEL, algorithme=None):
+    """
+    Calcule l'empreinte des premiers et derniers `taille_bloc` octets d'un fichier.
+    Pour un fichier de moins de deux blocs, le hash couvre donc tout son contenu.
+    """
+    hasher = creer_hasher(algorithme)
     try:
         with open(fichier, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hasher.update(chunk)
+            hasher_extremites(f, hasher, taille_bloc)
         return hasher.hexdigest()
     except Exception as e:
-        logger.error(f"Erreur lors du hash du fichier {fichier} : {e}")
+        logger.error(f"Erreur lors du hash partiel du fichier {fichier} : {e}")
         return None
 
-def obtenir_date_creation(chemin_fichier):
-    """Retourne la date de création ou de modification d'un fichier."""
+def _regrouper(chemins, valeurs):
+    """Regroupe les chemins selon leurs valeurs et ne conserve que les groupes d'au moins deux fichiers."""
+    groupes = {}
+    for chemin, valeur in zip(chemins, valeurs):
+        if valeur is not None:
+            groupes.setdefault(valeur, []).append(chemin)
+    return [groupe for groupe in groupes.values() if len(groupe) > 1]
+
+def trouver_doublons(chemins, index=None, taille_bloc=TAILLE_BLOC_PARTIEL, algorithme=None,
+                     progression=None, annulation=None):
+    """
+    Détecte les fichiers identiques en trois étapes pour limiter les lectures disque :
+    regroupement par taille, puis hash partiel (début/fin) des candidats restants,
+    puis hash complet uniquement pour les collisions à l'étape précédente.
+    Les deux étapes de hash sont réparties sur le pool de threads de `core.hashing`.
+
+    Args:
+        chemins: Liste des chemins à comparer
+        index: Index d'empreintes persistant utilisé pour le hash complet (optionnel)
+        taille_bloc: Taille des blocs lus pour le hash partiel
+        algorithme: Algorithme d'empreinte (celui de la configuration par défaut)
+        progression: Fonction appelée avec (fichiers_traites, total, etape) pendant les calculs d'empreintes
+        annulation: threading.Event ; une fois positionné, la recherche s'interrompt (OrganisationAnnulee)
+
+    Returns:
+        Liste de groupes de doublons, chaque groupe étant trié selon l'ordre de `chemins`
+        (le premier élément est le fichier conservé).
+    """
+    algorithme = resoudre_algorithme(algorithme)
+
+    def verifier_annulation():
+        if annulation is not None and annulation.is_set():
+            raise OrganisationAnnulee()
+
+    def signaler(etape):
+        if progression is None:
+            return None
+        return lambda termines, total: progression(termines, total, etape)
+
+    ordre = {chemin: position for position, chemin in enumerate(chemins)}
+    tailles = {}
+
+    def taille_fichier(chemin):
+        try:
+            tailles[chemin] = os.stat(chemin).st_size
+            return tailles[chemin]
+        except OSError as e:
+            logger.error(f"Impossible de lire la taille de {chemin} : {e}")
+            return None
+
+    # Étape 1 : seuls les fichiers partageant leur taille avec un autre sont candidats
+    candidats = [c for groupe in _regrouper(chemins, map(taille_fichier, chemins)) for c in groupe]
+    verifier_annulation()
+
+    # Étape 2 : hash partiel des candidats
+    partiels = calculer_hashes(candidats, lambda c: calculer_hash_partiel(c, taille_bloc, algorithme),
+                               progression=signaler("Recherche des doublons (empreintes partielles)"),
+                               annulation=annulation)
+    verifier_annulation()
+    cles = [(tailles[c], p) if p else None for c, p in zip(candidats, partiels)]
+
+    doublons = []
+    a_verifier = []
+    for groupe in _regrouper(candidats, cles):
+        if tailles[groupe[0]] <= 2 * taille_bloc:
+            # Le hash partiel a déjà couvert l'intégralité du contenu
+            doublons.append(groupe)
+        else:
+            a_verifier.extend(groupe)
+
+    # Étape 3 : hash complet uniquement pour les collisions de l'étape 2
+    complets = calculer_hashes(a_verifier, lambda c: calculer_hash(c, index, algorithme),
+                               progression=signaler("Recherche des doublons (empreintes complètes)"),
+                               annulation=annulation)
+    verifier_annulation()
+    cles = [(tailles[c], h) if h else None for c, h in zip(a_verifier, complets)]
+    doublons.extend(_regrouper(a_verifier, cles))
+
+    return [sorted(groupe, key=ordre.get) for groupe in doublons]
+
+def obtenir_date_creation(chemin_fichier, stat_fichier=None):
+    """
+    Retourne la date de création ou de modification d'un fichier.
+    Si `stat_fichier` est fourni (stat déjà obtenu lors du parcours), aucun appel système n'est fait.
+    """
     try:
+        if stat_fichier is None:
+            stat_fichier = os.stat(chemin_fichier)
         # Essayer d'obtenir la date de création (Windows) ou de status change (Unix)
-        date = os.path.getctime(chemin_fichier)
+        date = stat_fichier.st_ctime
         # Si pas disponible, utiliser la date de dernière modification
         if not date:
-            date = os.path.getmtime(chemin_fichier)
+            date = stat_fichier.st_mtime
         return datetime.datetime.fromtimestamp(date)
     except Exception as e:
         logger.warning(f"Impossible d'obtenir la date du fichier {chemin_fichier}: {e}")
@@ -86,11 +204,15 @@ def generer_nouveau_nom(fichier, date=None):
     
     return nouveau_nom
 
-def verifier_conflit_fichier(chemin_destination):
+def verifier_conflit_fichier(chemin_destination, registre=None):
     """
     Vérifie si un fichier existe déjà à l'emplacement de destination.
     Si oui, ajoute un suffixe numérique.
+    Avec un RegistreNoms, le suffixe libre est obtenu sans sonder le disque et le chemin est réservé.
     """
+    if registre is not None:
+        return registre.reserver(chemin_destination)
+
     chemin = Path(chemin_destination)
     compteur = 1
     nouveau_chemin = chemin_destination
@@ -105,112 +227,124 @@ def verifier_conflit_fichier(chemin_destination):
 
 
 
-def renommer_fichiers(dossier, mode_simulation=False, limite_traitement=None):
+def planifier_renommage(dossier, limite_traitement=None):
     """
-    Renomme les fichiers selon un format cohérent dans le dossier spécifié.
+    Calcule le plan de renommage des fichiers selon le format cohérent, sans rien renommer.
     
     Args:
         dossier: Le dossier contenant les fichiers à renommer
-        mode_simulation: Si True, montre les actions sans les exécuter
         limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+    
+    Returns:
+        PlanDeplacement
     """
-    fichiers = [f for f in os.listdir(dossier) if os.path.isfile(os.path.join(dossier, f))]
+    entrees = lister_fichiers(dossier)
+    plan = PlanDeplacement(dossier, mode="renommage")
     
     # Appliquer la limite si spécifiée
-    if limite_traitement and len(fichiers) > limite_traitement:
-        logger.info(f"Limitation à {limite_traitement} fichiers sur {len(fichiers)} au total")
-        fichiers = fichiers[:limite_traitement]
+    if limite_traitement and len(entrees) > limite_traitement:
+        logger.info(f"Limitation à {limite_traitement} fichiers sur {len(entrees)} au total")
+        entrees = entrees[:limite_traitement]
     
-    fichiers_traites = 0
-    for fichier in fichiers:
-        chemin_complet = os.path.join(dossier, fichier)
-        
+    for entree in entrees:
         # Générer le nouveau nom
-        date_fichier = obtenir_date_creation(chemin_complet)
-        nouveau_nom = generer_nouveau_nom(fichier, date_fichier)
-        nouveau_chemin = os.path.join(dossier, nouveau_nom)
-        
-        # Vérifier s'il y a déjà un fichier avec ce nom
-        nouveau_chemin = verifier_conflit_fichier(nouveau_chemin)
-        nouveau_nom = os.path.basename(nouveau_chemin)
+        date_fichier = obtenir_date_creation(entree.path, stat_entree(entree))
+        nouveau_nom = generer_nouveau_nom(entree.name, date_fichier)
         
-        if fichier == nouveau_nom:
-            logger.info(f"Pas besoin de renommer: {fichier}")
+        if entree.name == nouveau_nom:
+            logger.info(f"Pas besoin de renommer: {entree.name}")
             continue
         
-        if mode_simulation:
-            logger.info(f"[SIMULATION] Renommage: {fichier} → {nouveau_nom}")
-        else:
-            try:
-                os.rename(chemin_complet, nouveau_chemin)
-                logger.info(f"Renommé: {fichier} → {nouveau_nom}")
-                fichiers_traites += 1
-            except Exception as e:
-                logger.error(f"Erreur lors du renommage de {fichier}: {e}")
-                # Attendre et réessayer une fois
-                try:
-                    time.sleep(1)  # Attendre 1 seconde
-                    os.rename(chemin_complet, nouveau_chemin)
-                    logger.info(f"Renommé après reprise: {fichier} → {nouveau_nom}")
-                    fichiers_traites += 1
-                except Exception as e2:
-                    logger.error(f"Échec définitif pour {fichier}: {e2}")
-    
-    return fichiers_traites
-
-def supprimer_doublons(dossier, mode_simulation=False, limite_traitement=None):
+        plan.ajouter(entree.path, os.path.join(dossier, nouveau_nom), "Renommage")
+    
+    return plan
+
+def renommer_fichiers(dossier, mode_simulation=False, limite_traitement=None, progression=None, annulation=None):
     """
-    Supprime les fichiers en double dans le dossier donné.
+    Renomme les fichiers selon un format cohérent dans le dossier spécifié.
     
     Args:
-        dossier: Le dossier à analyser pour les doublons
+        dossier: Le dossier contenant les fichiers à renommer
         mode_simulation: Si True, montre les actions sans les exécuter
         limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+        progression: Fonction appelée avec (fichiers_traites, total, etape) au fil de l'exécution
+        annulation: threading.Event permettant d'interrompre le renommage entre deux fichiers
+    """
+    plan = planifier_renommage(dossier, limite_traitement)
+    reussis, _ = executer_plan(plan, mode_simulation, progression, annulation)
+    return len(reussis)
+
+def _cle_parcours(chemin, racine):
     """
-    fichiers_vus = {}
-    doublons_supprimes = 0
-    fichiers_traites = 0
+    Clé de tri reproduisant l'ordre d'un os.walk descendant : les fichiers d'un dossier passent
+    avant ceux de ses sous-dossiers. Le premier fichier d'un groupe de doublons (conservé) est donc
+    le moins profond.
+    """
+    parties = os.path.relpath(chemin, racine).split(os.sep)
+    return [(1, partie) for partie in parties[:-1]] + [(0, parties[-1])]
+
+def planifier_suppression_doublons(dossier, limite_traitement=None, algorithme=None,
+                                   progression=None, annulation=None, entrees=None):
+    """
+    Calcule le plan de suppression des fichiers en double dans le dossier et ses sous-dossiers.
     
-    # Collecter tous les fichiers
-    tous_fichiers = []
-    for racine, _, fichiers in os.walk(dossier):
-        for nom_fichier in fichiers:
-            tous_fichiers.append(os.path.join(racine, nom_fichier))
+    Args:
+        dossier: Le dossier à analyser pour les doublons
+        limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+        algorithme: Algorithme d'empreinte (celui de la configuration par défaut)
+        progression: Fonction appelée avec (fichiers_traites, total, etape) pendant les calculs d'empreintes
+        annulation: threading.Event ; une fois positionné, la recherche s'interrompt (OrganisationAnnulee)
+        entrees: Fichiers (os.DirEntry) de toute l'arborescence, déjà parcourue, à la place d'un parcours du dossier
+    
+    Returns:
+        PlanDeplacement ne contenant que des suppressions
+    """
+    algorithme = resoudre_algorithme(algorithme)
+    plan = PlanDeplacement(dossier, mode=f"doublons ({algorithme})")
+    index = charger_index_hash()
+    
+    # Collecter tous les fichiers (parcours parallèle des sous-dossiers), dans l'ordre d'os.walk
+    if entrees is None:
+        entrees = lister_fichiers(dossier, recursif=True, exclusions=[])
+    tous_fichiers = sorted((entree.path for entree in entrees), key=lambda chemin: _cle_parcours(chemin, dossier))
     
     # Appliquer la limite si spécifiée
     if limite_traitement and len(tous_fichiers) > limite_traitement:
         logger.info(f"Limitation à {limite_traitement} fichiers sur {len(tous_fichiers)} au total")
         tous_fichiers = tous_fichiers[:limite_traitement]
     
-    for chemin in tous_fichiers:
-        fichiers_traites += 1
-        hash_fichier = calculer_hash(chemin)
-        if not hash_fichier:
-            continue
+    try:
+        groupes = trouver_doublons(tous_fichiers, index, algorithme=algorithme,
+                                   progression=progression, annulation=annulation)
+    finally:
+        # Les empreintes déjà calculées restent utiles, même après une annulation
+        sauvegarder_index_hash(index)
+    
+    for groupe in groupes:
+        original = groupe[0]
+        for chemin in groupe[1:]:
+            logger.info(f"Doublon trouvé : {chemin} (identique à {original})")
+            plan.ajouter_suppression(chemin, original)
+    
+    logger.info(f"{len(plan.suppressions)} doublon(s) trouvé(s) sur {len(tous_fichiers)} fichiers analysés (empreintes {algorithme}).")
+    return plan
 
-        if hash_fichier in fichiers_vus:
-            logger.info(f"Doublon trouvé : {chemin} (identique à {fichiers_vus[hash_fichier]})")
-            if not mode_simulation:
-                try:
-                    send2trash.send2trash(chemin)  # Utiliser send2trash pour éviter la suppression définitive
-                    logger.info(f"Supprimé: {chemin}")
-                    doublons_supprimes += 1
-                except Exception as e:
-                    logger.error(f"Erreur en supprimant {chemin} : {e}")
-                    # Attendre et réessayer une fois
-                    try:
-                        time.sleep(1)  # Attendre 1 seconde
-                        os.remove(chemin)
-                        logger.info(f"Supprimé après reprise: {chemin}")
-                        doublons_supprimes += 1
-                    except Exception as e2:
-                        logger.error(f"Échec définitif pour {chemin}: {e2}")
-            else:
-                logger.info(f"[SIMULATION] Suppression: {chemin}")
-        else:
-            fichiers_vus[hash_fichier] = chemin
+def supprimer_doublons(dossier, mode_simulation=False, limite_traitement=None, progression=None, annulation=None):
+    """
+    Supprime les fichiers en double dans le dossier donné.
+    
+    Args:
+        dossier: Le dossier à analyser pour les doublons
+        mode_simulation: Si True, montre les actions sans les exécuter
+        limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+        progression: Fonction appelée avec (fichiers_traites, total, etape) au fil de l'analyse et des suppressions
+        annulation: threading.Event ; une fois positionné, l'analyse s'interrompt (OrganisationAnnulee)
+            ou les suppressions restantes ne sont pas effectuées
+    """
+    plan = planifier_suppression_doublons(dossier, limite_traitement, progression=progression, annulation=annulation)
+    reussis, _ = executer_plan(plan, mode_simulation, progression, annulation)
+    doublons_supprimes = len(reussis)
 
-    resultat = f"{doublons_supprimes} doublon(s) supprimé(s) sur {fichiers_traites} fichiers traités."
+    resultat = f"{doublons_supprimes} doublon(s) supprimé(s) sur {len(plan.suppressions)} trouvé(s)."
     logger.info(resultat)
     return doublons_supprimes
-
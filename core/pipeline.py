@@ -0,0 +1,217 @@
+# coding: utf-8
+# Ce fichier fournit les variantes en flux des organiseurs, pour les dossiers de plusieurs millions d'entrées.
+# Les entrées passent du parcours au classement puis à l'exécution par des files bornées : aucune liste
+# de toutes les entrées n'est construite et les premiers déplacements commencent dès que les premiers
+# fichiers sont découverts, sans attendre la fin du parcours. Le registre des noms de destination,
+# lui, grandit avec le contenu des dossiers de destination et le nombre de fichiers classés.
+# Les modes qui ont besoin de voir tout le dossier (groupement par nom, doublons) ne sont pas concernés.
+
+import os
+import queue
+import datetime
+import threading
+
+from logs.logger import logger
+
+from .scanner import scanner_dossier, parcourir_arborescence, stat_entree, est_dans_dossier
+from .organizer_utils import obtenir_date_creation
+from .organizer_type import determiner_dossier_type
+from .name_registry import RegistreNoms
+from .plan import Deplacement
+from .executor import executer_deplacements
+from .history import enregistrer_organisation
+
+
+TAILLE_FILE = 1000
+TAILLE_LOT = 256
+
+_FIN = object()
+
+# Période de vérification de l'arrêt du flux pendant l'attente d'une file
+ATTENTE_FILE = 0.1
+
+
+def iterer_fichiers(dossier, recursif=False, profondeur_max=None, exclusions=None):
+    """Produit les fichiers (os.DirEntry) du dossier au fil du parcours, sans construire de liste."""
+    if recursif:
+        return parcourir_arborescence(dossier, profondeur_max, exclusions)
+    return scanner_dossier(dossier)
+
+
+def classifier_par_type(dossier):
+    """Retourne la fonction qui associe à une entrée son dossier de type (ou None si déjà classée)."""
+    def classifier(entree):
+        dossier_destination = os.path.join(dossier, determiner_dossier_type(entree.name))
+        if est_dans_dossier(entree, dossier_destination):
+            return None
+        return dossier_destination, "Classement par type"
+    return classifier
+
+
+def classifier_par_date(dossier):
+    """Retourne la fonction qui associe à une entrée son dossier d'année (ou None si déjà classée)."""
+    def classifier(entree):
+        annee = str(obtenir_date_creation(entree.path, stat_entree(entree)).year)
+        dossier_destination = os.path.join(dossier, annee)
+        if est_dans_dossier(entree, dossier_destination):
+            return None
+        return dossier_destination, "Classement par date"
+    return classifier
+
+
+def _lancer_etage(nom, fonction, erreurs, arret):
+    """
+    Démarre un étage du flux dans un thread. Une exception est conservée pour l'appelant
+    et arrête tout le flux.
+    """
+    def executer():
+        try:
+            fonction()
+        except Exception as e:
+            logger.error(f"Erreur dans l'étage '{nom}' du flux : {e}")
+            erreurs.append(e)
+            arret.set()
+    thread = threading.Thread(target=executer, name=f"flux-{nom}", daemon=True)
+    thread.start()
+    return thread
+
+
+def _deposer(file_sortie, element, arret):
+    """Dépose un élément dans une file bornée ; abandonne (False) si le flux est arrêté entre-temps."""
+    while not arret.is_set():
+        try:
+            file_sortie.put(element, timeout=ATTENTE_FILE)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _prendre(file_entree, arret):
+    """Prend un élément d'une file ; retourne _FIN si le flux est arrêté entre-temps."""
+    while not arret.is_set():
+        try:
+            return file_entree.get(timeout=ATTENTE_FILE)
+        except queue.Empty:
+            continue
+    return _FIN
+
+
+def _lots(file_entree, taille_lot, arret):
+    """
+    Regroupe les éléments d'une file en lots : attend le premier élément, puis prend
+    ceux déjà disponibles (au plus `taille_lot`), pour ne jamais retarder l'exécution.
+    """
+    while True:
+        element = _prendre(file_entree, arret)
+        if element is _FIN:
+            return
+        lot = [element]
+        fin = False
+        while len(lot) < taille_lot:
+            try:
+                element = file_entree.get_nowait()
+            except queue.Empty:
+                break
+            if element is _FIN:
+                fin = True
+                break
+            lot.append(element)
+        yield lot
+        if fin:
+            return
+
+
+def executer_en_flux(entrees, classifier, mode_simulation=False, taille_file=TAILLE_FILE, taille_lot=TAILLE_LOT):
+    """
+    Fait passer des entrées par les étapes classement → planification → exécution, reliées par des files bornées.
+
+    Args:
+        entrees: Itérable d'os.DirEntry (voir iterer_fichiers)
+        classifier: Fonction entrée -> (dossier_destination, raison) ou None pour ignorer l'entrée
+        mode_simulation: Si True, montre les actions sans les exécuter
+        taille_file: Nombre maximal d'éléments en attente entre deux étapes
+        taille_lot: Nombre maximal de déplacements exécutés ensemble
+
+    Returns:
+        Nombre de fichiers traités (à traiter en mode simulation)
+    """
+    file_entrees = queue.Queue(maxsize=taille_file)
+    file_deplacements = queue.Queue(maxsize=taille_file)
+    erreurs = []
+    arret = threading.Event()
+    registre = RegistreNoms()
+
+    def parcourir():
+        try:
+            for entree in entrees:
+                if not _deposer(file_entrees, entree, arret):
+                    return
+        finally:
+            _deposer(file_entrees, _FIN, arret)
+
+    def planifier():
+        try:
+            while True:
+                entree = _prendre(file_entrees, arret)
+                if entree is _FIN:
+                    break
+                resultat = classifier(entree)
+                if resultat is None:
+                    continue
+                dossier_destination, raison = resultat
+                destination = registre.reserver(os.path.join(dossier_destination, entree.name))
+                if not _deposer(file_deplacements, Deplacement(entree.path, destination, raison), arret):
+                    return
+        finally:
+            _deposer(file_deplacements, _FIN, arret)
+
+    etages = [_lancer_etage("parcours", parcourir, erreurs, arret),
+              _lancer_etage("planification", planifier, erreurs, arret)]
+
+    fichiers_traites = 0
+    try:
+        for lot in _lots(file_deplacements, taille_lot, arret):
+            if mode_simulation:
+                for deplacement in lot:
+                    logger.info(f"[SIMULATION] {deplacement.raison}: {deplacement.source} → {deplacement.destination}")
+                fichiers_traites += len(lot)
+                continue
+
+            liste_actions = []
+            for deplacement, erreur in executer_deplacements(lot):
+                if erreur is None:
+                    fichiers_traites += 1
+                    liste_actions.append({
+                        "type": "Déplacement",
+                        "source": deplacement.source,
+                        "destination": deplacement.destination,
+                        "raison": deplacement.raison,
+                        "date": datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+                    })
+                else:
+                    logger.error(f"Échec définitif pour {deplacement.source}: {erreur}")
+            if liste_actions:
+                enregistrer_organisation(liste_actions)
+    finally:
+        # En cas d'erreur ici, les étages bloqués sur une file pleine s'arrêtent d'eux-mêmes
+        arret.set()
+        for etage in etages:
+            etage.join()
+    if erreurs:
+        raise erreurs[0]
+
+    logger.info(f"Organisation en flux terminée. Fichiers traités: {fichiers_traites}")
+    return fichiers_traites
+
+
+def classer_fichier_par_type_flux(dossier, mode_simulation=False, recursif=False, profondeur_max=None, exclusions=None):
+    """Variante en flux de classer_fichier_par_type : pas de liste des entrées, premiers déplacements immédiats."""
+    entrees = iterer_fichiers(dossier, recursif, profondeur_max, exclusions)
+    return executer_en_flux(entrees, classifier_par_type(dossier), mode_simulation)
+
+
+def classer_par_date_flux(dossier, mode_simulation=False, recursif=False, profondeur_max=None, exclusions=None):
+    """Variante en flux de classer_par_date : pas de liste des entrées, premiers déplacements immédiats."""
+    entrees = iterer_fichiers(dossier, recursif, profondeur_max, exclusions)
+    return executer_en_flux(entrees, classifier_par_date(dossier), mode_simulation)
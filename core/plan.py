@@ -0,0 +1,235 @@
+# coding: utf-8
+# Ce fichier définit le plan de déplacement produit par les organiseurs et son exécuteur.
+# Un organiseur décide d'abord de toutes les opérations (plan), que l'on peut inspecter, comparer,
+# sauvegarder sur disque puis exécuter plus tard, par exemple pendant une fenêtre de maintenance.
+
+import os
+import json
+import time
+import datetime
+from collections import namedtuple
+
+import send2trash
+
+from logs.logger import logger
+from .history import enregistrer_organisation
+from .executor import executer_deplacements, OrganisationAnnulee
+from .name_registry import RegistreNoms, FORMAT_SUFFIXE
+
+
+# Une opération du plan : déplacement (ou renommage) de `source` vers `destination`.
+# `taille` reprend, si elle est connue, la taille lue lors du parcours (évite un stat pour les rapports)
+Deplacement = namedtuple("Deplacement", ["source", "destination", "raison", "taille"], defaults=[None])
+
+# Une suppression de doublon : `chemin` est identique à `original`, qui est conservé
+Suppression = namedtuple("Suppression", ["chemin", "original"])
+
+
+
+class PlanDeplacement:
+    """
+    Plan d'organisation d'un dossier : liste ordonnée de déplacements et de suppressions.
+    Les chemins sont stockés relativement à la racine du plan lors de la sauvegarde.
+    """
+
+    def __init__(self, racine, mode="", deplacements=None, suppressions=None, date=None):
+        self.racine = os.path.abspath(racine)
+        self.mode = mode
+        self.date = date or datetime.datetime.now().isoformat(timespec="seconds")
+        self.deplacements = list(deplacements or [])
+        self.suppressions = list(suppressions or [])
+        self.registre = RegistreNoms()
+        for deplacement in self.deplacements:
+            self.registre.marquer(deplacement.destination)
+
+    def __len__(self):
+        return len(self.deplacements) + len(self.suppressions)
+
+    def __iter__(self):
+        return iter(self.deplacements)
+
+    def __repr__(self):
+        return (f"PlanDeplacement(racine={self.racine!r}, mode={self.mode!r}, "
+                f"deplacements={len(self.deplacements)}, suppressions={len(self.suppressions)})")
+
+    def destination_libre(self, chemin_destination, format_suffixe=FORMAT_SUFFIXE):
+        """
+        Retourne un chemin libre pour `chemin_destination` en tenant compte des fichiers existants
+        et des destinations déjà réservées par ce plan, puis le réserve.
+        """
+        return self.registre.reserver(chemin_destination, format_suffixe)
+
+    def ajouter(self, source, destination, raison, format_suffixe=FORMAT_SUFFIXE, taille=None):
+        """Ajoute un déplacement au plan après résolution des conflits de nom. Retourne l'opération."""
+        destination = self.destination_libre(os.path.abspath(destination), format_suffixe)
+        deplacement = Deplacement(os.path.abspath(source), destination, raison, taille)
+        self.deplacements.append(deplacement)
+        return deplacement
+
+    def ajouter_suppression(self, chemin, original):
+        """Ajoute la suppression d'un doublon au plan."""
+        self.suppressions.append(Suppression(os.path.abspath(chemin), os.path.abspath(original)))
+
+    def _relatif(self, chemin):
+        return os.path.relpath(chemin, self.racine)
+
+    def _absolu(self, chemin):
+        return os.path.normpath(os.path.join(self.racine, chemin))
+
+    def vers_dict(self):
+        """Retourne une représentation compacte et sérialisable du plan."""
+        return {
+            "racine": self.racine,
+            "mode": self.mode,
+            "date": self.date,
+            # La taille, si elle est connue, suit les trois premiers champs
+            "deplacements": [[self._relatif(d.source), self._relatif(d.destination), d.raison]
+                             + ([d.taille] if d.taille is not None else [])
+                             for d in self.deplacements],
+            "suppressions": [[self._relatif(s.chemin), self._relatif(s.original)]
+                             for s in self.suppressions]
+        }
+
+    @classmethod
+    def depuis_dict(cls, donnees):
+        """Reconstruit un plan à partir de `vers_dict`."""
+        plan = cls(donnees["racine"], donnees.get("mode", ""), date=donnees.get("date"))
+        plan.deplacements = [Deplacement(plan._absolu(s), plan._absolu(d), r, *taille)
+                             for s, d, r, *taille in donnees.get("deplacements", [])]
+        plan.suppressions = [Suppression(plan._absolu(c), plan._absolu(o))
+                             for c, o in donnees.get("suppressions", [])]
+        for deplacement in plan.deplacements:
+            plan.registre.marquer(deplacement.destination)
+        return plan
+
+    def sauvegarder(self, chemin_fichier):
+        """Sauvegarde le plan au format JSON."""
+        with open(chemin_fichier, "w", encoding="utf-8") as f:
+            json.dump(self.vers_dict(), f, indent=1, ensure_ascii=False)
+        logger.info(f"Plan sauvegardé ({len(self)} opérations) : {chemin_fichier}")
+
+    @classmethod
+    def charger(cls, chemin_fichier):
+        """Charge un plan sauvegardé par `sauvegarder`."""
+        with open(chemin_fichier, "r", encoding="utf-8") as f:
+            return cls.depuis_dict(json.load(f))
+
+    def comparer(self, autre):
+        """
+        Compare ce plan à un autre plan (par fichier source).
+
+        Returns:
+            Dictionnaire {"ajoutes": [...], "retires": [...], "modifies": [(ancien, nouveau), ...]}
+            décrivant ce qui change en passant de ce plan à `autre`.
+        """
+        avant = {d.source: d for d in self.deplacements}
+        apres = {d.source: d for d in autre.deplacements}
+        return {
+            "ajoutes": [apres[s] for s in apres if s not in avant],
+            "retires": [avant[s] for s in avant if s not in apres],
+            "modifies": [(avant[s], apres[s]) for s in avant
+                         if s in apres and avant[s].destination != apres[s].destination]
+        }
+
+    def resume(self):
+        """Retourne un résumé lisible du plan."""
+        lignes = [f"Plan '{self.mode}' pour {self.racine} ({self.date}) : "
+                  f"{len(self.deplacements)} déplacement(s), {len(self.suppressions)} suppression(s)"]
+        for d in self.deplacements:
+            lignes.append(f"  [{d.raison}] {self._relatif(d.source)} → {self._relatif(d.destination)}")
+        for s in self.suppressions:
+            lignes.append(f"  [doublon] {self._relatif(s.chemin)} (identique à {self._relatif(s.original)})")
+        return "\n".join(lignes)
+
+
+def _supprimer(suppression):
+    """Envoie un doublon à la corbeille, avec une suppression directe en reprise."""
+    try:
+        send2trash.send2trash(suppression.chemin)  # Utiliser send2trash pour éviter la suppression définitive
+    except Exception as e:
+        logger.error(f"Erreur en supprimant {suppression.chemin} : {e}")
+        # Attendre et réessayer une fois
+        time.sleep(1)
+        os.remove(suppression.chemin)
+
+
+def executer_plan(plan, mode_simulation=False, progression=None, annulation=None):
+    """
+    Exécute un plan : les suppressions de doublons d'abord, puis les déplacements.
+
+    Args:
+        plan: Le PlanDeplacement à appliquer
+        mode_simulation: Si True, montre les actions sans les exécuter
+        progression: Fonction appelée avec (operations_traitees, total, etape) au fil des opérations
+        annulation: threading.Event ; une fois positionné, les opérations restantes ne sont pas lancées.
+            Les opérations déjà effectuées restent enregistrées dans l'historique (donc annulables).
+
+    Returns:
+        Tuple (reussis, echecs) : opérations effectuées et couples (opération, erreur).
+        En mode simulation, les deux listes sont vides.
+    """
+    reussis = []
+    echecs = []
+    total = len(plan.suppressions) + len(plan.deplacements)
+
+    for position, suppression in enumerate(plan.suppressions, 1):
+        if annulation is not None and annulation.is_set():
+            break
+        if progression:
+            progression(position, total, "Suppression des doublons")
+        if mode_simulation:
+            logger.info(f"[SIMULATION] Suppression: {suppression.chemin} (identique à {suppression.original})")
+            continue
+        try:
+            _supprimer(suppression)
+            logger.info(f"Supprimé: {suppression.chemin}")
+            reussis.append(suppression)
+        except Exception as e:
+            logger.error(f"Échec définitif pour {suppression.chemin}: {e}")
+            echecs.append((suppression, e))
+
+    if mode_simulation:
+        for position, deplacement in enumerate(plan.deplacements, len(plan.suppressions) + 1):
+            if annulation is not None and annulation.is_set():
+                break
+            if progression:
+                progression(position, total, "Déplacement des fichiers")
+            nom_affiche = os.path.relpath(deplacement.destination, plan.racine)
+            logger.info(f"[SIMULATION] {deplacement.raison}: {os.path.basename(deplacement.source)} → {nom_affiche}")
+        return reussis, echecs
+
+    def signaler(termines, _):
+        progression(len(plan.suppressions) + termines, total, "Déplacement des fichiers")
+
+    liste_actions = []
+    annules = 0
+    for deplacement, erreur in executer_deplacements(plan.deplacements, progression=signaler if progression else None,
+                                                     annulation=annulation):
+        nom_affiche = os.path.relpath(deplacement.destination, plan.racine)
+        if erreur is None:
+            logger.info(f"Déplacé ({deplacement.raison}): {os.path.basename(deplacement.source)} → {nom_affiche}")
+            reussis.append(deplacement)
+            liste_actions.append({
+                "type": "Déplacement",
+                "source": deplacement.source,
+                "destination": deplacement.destination,
+                "raison": deplacement.raison,
+                "date": datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+            })
+        elif isinstance(erreur, OrganisationAnnulee):
+            annules += 1
+        elif isinstance(erreur, FileNotFoundError):
+            logger.error(f"Fichier introuvable lors du déplacement: {deplacement.source}")
+            echecs.append((deplacement, erreur))
+        else:
+            logger.error(f"Échec définitif pour {deplacement.source}: {erreur}")
+            echecs.append((deplacement, erreur))
+
+    if annules:
+        logger.info(f"Organisation annulée : {annules} déplacement(s) non effectué(s)")
+
+    # Enregistrer toutes les actions dans l'historique (annulables via annuler_derniere_organisation)
+    if liste_actions:
+        enregistrer_organisation(liste_actions)
+
+    return reussis, echecs
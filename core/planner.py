@@ -0,0 +1,146 @@
+# coding: utf-8
+# Ce fichier planifie une organisation combinée (type, date, nom, renommage, doublons) en un seul parcours.
+# Le dossier est lu une seule fois, la destination finale de chaque fichier est calculée en combinant
+# les options cochées (ex: type puis année), puis chaque fichier est déplacé en un seul appel.
+
+import os
+
+from logs.logger import logger
+
+from .scanner import lister_fichiers, stat_entree, est_dans_dossier
+from .organizer_utils import obtenir_date_creation, planifier_suppression_doublons
+from .organizer_type import determiner_dossier_type
+from .organizer_name import grouper_fichiers_par_nom, creer_nom_dossier_securise
+from .rename import generer_noms_intelligents, extraction_possible
+from .plan import PlanDeplacement, executer_plan
+from .executor import OrganisationAnnulee
+
+
+# Options reconnues par le planificateur, dans l'ordre d'imbrication des sous-dossiers
+MODES_ORGANISATION = ("type", "date", "nom", "renommage", "doublons")
+
+
+def planifier_organisation(dossier, options, limite_traitement=None, seuil_minimum=2,
+                           progression=None, annulation=None):
+    """
+    Calcule, en un seul parcours du dossier, la destination finale de chaque fichier.
+
+    Args:
+        dossier: Le dossier à organiser
+        options: Ensemble des modes cochés parmi MODES_ORGANISATION
+        limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+        seuil_minimum: Nombre minimum de fichiers pour former un groupe par nom
+        progression: Fonction appelée avec (fichiers_analyses, total, etape) pour chaque fichier
+        annulation: threading.Event vérifié avant chaque fichier ; lève OrganisationAnnulee s'il est positionné
+
+    Returns:
+        PlanDeplacement. Les doublons sont détectés parmi les fichiers parcourus
+        et sont supprimés au lieu d'être déplacés.
+    """
+    options = set(options)
+    inconnues = options - set(MODES_ORGANISATION)
+    if inconnues:
+        raise ValueError(f"Options d'organisation inconnues : {', '.join(sorted(inconnues))}")
+
+    plan = PlanDeplacement(dossier, mode="+".join(m for m in MODES_ORGANISATION if m in options))
+    if "doublons" in options:
+        # Comme supprimer_doublons, tout l'arbre est comparé : un seul parcours récursif,
+        # dont les fichiers de la racine sont ceux à organiser
+        arborescence = lister_fichiers(dossier, recursif=True, exclusions=[])
+        entrees = [entree for entree in arborescence if est_dans_dossier(entree, dossier)]
+    else:
+        entrees = lister_fichiers(dossier)
+    if limite_traitement and len(entrees) > limite_traitement:
+        logger.info(f"Limitation à {limite_traitement} fichiers sur {len(entrees)} au total")
+        entrees = entrees[:limite_traitement]
+
+    if "doublons" in options:
+        a_ecarter = set()
+        plan_doublons = planifier_suppression_doublons(dossier, limite_traitement, progression=progression,
+                                                       annulation=annulation, entrees=arborescence)
+        for suppression in plan_doublons.suppressions:
+            plan.ajouter_suppression(suppression.chemin, suppression.original)
+            a_ecarter.add(os.path.abspath(suppression.chemin))
+        entrees = [entree for entree in entrees if os.path.abspath(entree.path) not in a_ecarter]
+
+    groupes_nom = {}
+    if "nom" in options:
+        for nom_groupe, fichiers_groupe in grouper_fichiers_par_nom([e.name for e in entrees], seuil_minimum).items():
+            for fichier in fichiers_groupe:
+                groupes_nom[fichier] = creer_nom_dossier_securise(nom_groupe)
+
+    noms_generes = {}
+    if "renommage" in options:
+        # Analyse du contenu (cache d'extraction, puis pool de processus), avant le parcours principal
+        def signaler(termines, total):
+            progression(termines, total, "Analyse du contenu")
+
+        # Seuls les fichiers ayant un extracteur (PDF, Word, Excel, images, texte) sont lus
+        a_analyser = [entree.path for entree in entrees if extraction_possible(entree.name)]
+        for chemin, nom, erreur in generer_noms_intelligents(a_analyser,
+                                                             progression=signaler if progression else None,
+                                                             annulation=annulation):
+            if erreur is not None:
+                logger.error(f"Analyse du contenu impossible pour {chemin}: {erreur}")
+            else:
+                noms_generes[chemin] = nom
+
+    for position, entree in enumerate(entrees, 1):
+        if annulation is not None and annulation.is_set():
+            raise OrganisationAnnulee()
+        if progression:
+            progression(position, len(entrees), "Analyse des fichiers")
+
+        sous_dossiers = []
+        raisons = []
+
+        if "type" in options:
+            sous_dossiers.append(determiner_dossier_type(entree.name))
+            raisons.append("type")
+        if "date" in options:
+            sous_dossiers.append(str(obtenir_date_creation(entree.path, stat_entree(entree)).year))
+            raisons.append("date")
+        if entree.name in groupes_nom:
+            sous_dossiers.append(groupes_nom[entree.name])
+            raisons.append("nom")
+
+        nom_final = entree.name
+        if "renommage" in options:
+            nom_final = noms_generes.get(entree.path, entree.name)
+            if nom_final != entree.name:
+                raisons.append("renommage")
+
+        if not raisons:
+            continue
+
+        destination = os.path.join(dossier, *sous_dossiers, nom_final)
+        if destination == entree.path:
+            continue
+
+        plan.ajouter(entree.path, destination, "+".join(raisons))
+
+    logger.info(f"Plan d'organisation: {len(plan.deplacements)} déplacement(s), {len(plan.suppressions)} doublon(s)")
+    return plan
+
+
+def organiser_dossier(dossier, options, mode_simulation=False, limite_traitement=None,
+                      progression=None, annulation=None):
+    """
+    Organise un dossier selon plusieurs modes combinés en un seul parcours.
+
+    Args:
+        dossier: Le dossier à organiser
+        options: Ensemble des modes cochés parmi MODES_ORGANISATION
+        mode_simulation: Si True, montre les actions sans les exécuter
+        limite_traitement: Nombre maximum de fichiers à traiter (None pour tous)
+        progression: Fonction appelée avec (fichiers_traites, total, etape), pendant l'analyse puis l'exécution
+        annulation: threading.Event permettant d'interrompre l'organisation entre deux fichiers.
+            Une annulation pendant l'analyse lève OrganisationAnnulee ; pendant l'exécution,
+            les fichiers déjà déplacés le restent et sont comptés.
+
+    Returns:
+        Nombre de fichiers traités
+    """
+    plan = planifier_organisation(dossier, options, limite_traitement, progression=progression, annulation=annulation)
+    reussis, _ = executer_plan(plan, mode_simulation, progression, annulation)
+    return len(reussis)
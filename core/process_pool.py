@@ -0,0 +1,163 @@
+# coding: utf-8
+# Ce fichier exécute une fonction lourde (extraction de contenu PDF, DOCX, XLSX...) sur un pool de processus.
+# Le travail en cours est borné au nombre de processus : les éléments restants ne sont soumis qu'au fur
+# et à mesure. Chaque élément dispose d'un délai maximal ; un élément qui le dépasse est abandonné et
+# les processus sont remplacés. Si un processus meurt (plantage d'une bibliothèque native), les éléments
+# qu'il pouvait traiter sont repris un par un pour isoler le fichier fautif sans perdre les autres.
+
+import time
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from logs.logger import logger
+from config import EXTRACTION_NB_PROCESSUS, EXTRACTION_DELAI_MAX, EXTRACTION_SEUIL_PARALLELE
+
+
+def _initialiser_processus():
+    """
+    Retire les fichiers de log des processus du pool. En réimportant les modules de l'application,
+    ils ont recréé les FileHandler du processus principal : seul celui-ci écrit dans les fichiers,
+    les processus du pool n'écrivent que sur la console.
+    """
+    journaux = [logging.getLogger()] + [journal for journal in logging.Logger.manager.loggerDict.values()
+                                         if isinstance(journal, logging.Logger)]
+    for journal in journaux:
+        for handler in list(journal.handlers):
+            if isinstance(handler, logging.FileHandler):
+                journal.removeHandler(handler)
+                handler.close()
+
+
+def _nouveau_pool(nb_processus):
+    """
+    Crée le pool de processus. Les processus sont lancés par "spawn" sur toutes les plateformes :
+    un fork depuis l'application Qt, qui a plusieurs threads, pourrait copier des verrous détenus.
+    """
+    return ProcessPoolExecutor(max_workers=nb_processus, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_initialiser_processus)
+
+
+def _terminer(executeur):
+    """Arrête immédiatement les processus d'un pool (ProcessPoolExecutor ne sait pas annuler une tâche en cours)."""
+    for processus in list((getattr(executeur, "_processes", None) or {}).values()):
+        try:
+            processus.terminate()
+        except Exception:
+            pass
+    executeur.shutdown(wait=False, cancel_futures=True)
+
+
+def executer_isole(fonction, elements, nb_processus=None, delai_max=None, progression=None, annulation=None):
+    """
+    Applique `fonction` à chaque élément dans des processus séparés.
+
+    Args:
+        fonction: Fonction de niveau module (transmissible à un autre processus)
+        elements: Éléments à traiter (ex: chemins de fichiers)
+        nb_processus: Taille du pool (EXTRACTION_NB_PROCESSUS par défaut)
+        delai_max: Durée maximale de traitement d'un élément, en secondes (EXTRACTION_DELAI_MAX par défaut)
+        progression: Fonction appelée avec (elements_termines, total) après chaque élément
+        annulation: threading.Event ; une fois positionné, plus aucun élément n'est soumis
+
+    Yields:
+        Triplets (element, resultat, erreur) au fil des résultats, `erreur` valant None en cas de succès.
+        Même un petit lot est traité hors du processus courant (délai maximal et isolement des plantages) ;
+        en dessous de EXTRACTION_SEUIL_PARALLELE éléments, un seul processus est lancé.
+    """
+    elements = list(elements)
+    total = len(elements)
+    if not total:
+        return
+    if total < EXTRACTION_SEUIL_PARALLELE:
+        nb_processus = 1
+    else:
+        nb_processus = min(nb_processus or EXTRACTION_NB_PROCESSUS, total)
+    delai_max = EXTRACTION_DELAI_MAX if delai_max is None else delai_max
+    termines = 0
+
+    def signaler():
+        if progression:
+            progression(termines, total)
+
+    a_faire = deque(elements)
+    suspects = deque()  # Éléments en cours lors d'un plantage, repris un par un
+    en_cours = {}       # future -> (element, échéance, isolé)
+    executeur = _nouveau_pool(nb_processus)
+    casse = False
+
+    try:
+        while True:
+            annule = annulation is not None and annulation.is_set()
+
+            if casse and not en_cours:
+                executeur.shutdown(wait=False, cancel_futures=True)
+                executeur = _nouveau_pool(nb_processus)
+                casse = False
+
+            if not casse and not annule:
+                if suspects:
+                    if not en_cours:
+                        element = suspects.popleft()
+                        en_cours[executeur.submit(fonction, element)] = (element, time.monotonic() + delai_max, True)
+                else:
+                    while a_faire and len(en_cours) < nb_processus:
+                        element = a_faire.popleft()
+                        en_cours[executeur.submit(fonction, element)] = (element, time.monotonic() + delai_max, False)
+
+            if not en_cours:
+                if annule or not (a_faire or suspects):
+                    break
+                continue
+
+            prochaine_echeance = min(echeance for _, echeance, _ in en_cours.values())
+            termines_lot, _ = wait(en_cours, timeout=max(0, prochaine_echeance - time.monotonic()),
+                                   return_when=FIRST_COMPLETED)
+
+            if not termines_lot:
+                # Délai dépassé : abandonner l'élément, remplacer les processus et reprendre les autres
+                maintenant = time.monotonic()
+                for future, (element, echeance, isole) in list(en_cours.items()):
+                    del en_cours[future]
+                    if echeance <= maintenant:
+                        logger.error(f"Délai de {delai_max}s dépassé, élément abandonné : {element}")
+                        termines += 1
+                        signaler()
+                        yield element, None, TimeoutError(f"Délai de {delai_max}s dépassé")
+                    elif isole:
+                        suspects.appendleft(element)
+                    else:
+                        a_faire.appendleft(element)
+                _terminer(executeur)
+                executeur = _nouveau_pool(nb_processus)
+                continue
+
+            for future in termines_lot:
+                element, _, isole = en_cours.pop(future)
+                try:
+                    resultat = future.result()
+                except BrokenProcessPool:
+                    casse = True
+                    if isole:
+                        logger.error(f"Le processus de traitement s'est arrêté brutalement sur : {element}")
+                        termines += 1
+                        signaler()
+                        yield element, None, RuntimeError("Processus de traitement arrêté brutalement")
+                    else:
+                        suspects.append(element)
+                    continue
+                except Exception as e:
+                    termines += 1
+                    signaler()
+                    yield element, None, e
+                    continue
+                termines += 1
+                signaler()
+                yield element, resultat, None
+    finally:
+        if en_cours:
+            _terminer(executeur)
+        else:
+            executeur.shutdown(wait=True)
@@ -2,33 +2,65 @@ import os
 import time
 import logging
 import re
-# Imports pour l'extraction de contenu
-try:
-    import PyPDF2
-    import pdfplumber
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-
-try:
-    from docx import Document as DocxDocument
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-
-try:
-    import openpyxl
-    import pandas as pd
-    EXCEL_AVAILABLE = True
-except ImportError:
-    EXCEL_AVAILABLE = False
-
-try:
-    from PIL import Image
-    from PIL.ExifTags import TAGS
-    IMAGE_AVAILABLE = True
-except ImportError:
-    IMAGE_AVAILABLE = False
+import functools
+import importlib
+import importlib.util
+
+from core.scanner import lister_fichiers, stat_entree
+from core.plan import PlanDeplacement, executer_plan
+from core.executor import OrganisationAnnulee
+from core.process_pool import executer_isole
+from core.extraction_cache import (charger_cache_extraction, sauvegarder_cache_extraction,
+                                   empreinte_fichier, rechercher_analyse, enregistrer_analyse)
+from config import EXTRACTION_CACHE_TAILLE_EXTRAIT
+# Bibliothèques d'extraction de contenu : leur présence est vérifiée sans les importer (find_spec),
+# elles ne sont chargées qu'au premier fichier du type correspondant (voir _charger_module)
+def _module_disponible(nom):
+    """Indique si un module est installé, sans l'importer."""
+    try:
+        return importlib.util.find_spec(nom) is not None
+    except (ImportError, ValueError):
+        return False
+
+# Couche texte des PDF : pypdf (successeur de PyPDF2) ou PyPDF2
+MODULES_PDF_TEXTE = ("pypdf", "PyPDF2")
+PYPDF_AVAILABLE = any(_module_disponible(nom) for nom in MODULES_PDF_TEXTE)
+
+# Analyse de mise en page, plus lente : seulement si la couche texte ne donne rien
+PDFPLUMBER_AVAILABLE = _module_disponible("pdfplumber")
+
+PDF_AVAILABLE = PYPDF_AVAILABLE or PDFPLUMBER_AVAILABLE
+DOCX_AVAILABLE = _module_disponible("docx")
+EXCEL_AVAILABLE = _module_disponible("openpyxl")
+IMAGE_AVAILABLE = _module_disponible("PIL")
+
+# Format des suffixes ajoutés en cas de conflit de nom lors du renommage
+FORMAT_SUFFIXE_RENOMMAGE = "{base}_({numero}){extension}"
+
+# Nombre maximal de caractères extraits d'un document, et de pages lues dans un PDF
+TAILLE_MAX_CONTENU = 2000
+PAGES_PDF_MAX = 3
+
+# Nombre de lignes de données lues par feuille Excel (en plus de la ligne d'en-tête)
+LIGNES_EXCEL_MAX = 10
+
+# Types de documents reconnus dans le contenu, par ordre de priorité
+PATTERNS_TYPE_DOCUMENT = {
+    'facture': r'facture|invoice|bill',
+    'rapport': r'rapport|report|bilan',
+    'contrat': r'contrat|contract|accord',
+    'presentation': r'présentation|presentation|slide',
+    'budget': r'budget|finance|cost',
+    'planning': r'planning|schedule|agenda',
+    'analyse': r'analyse|analysis|étude',
+    'procedure': r'procédure|procedure|process',
+    'manuel': r'manuel|manual|guide',
+    'specification': r'spécification|specification|spec'
+}
+
+# Version des analyses mémorisées dans le cache d'extraction : elle change avec les bibliothèques
+# disponibles, pour qu'un fichier analysé sans elles le soit de nouveau une fois qu'elles sont installées
+VERSION_ANALYSE = f"3:{int(PYPDF_AVAILABLE)}{int(PDFPLUMBER_AVAILABLE)}{int(DOCX_AVAILABLE)}{int(EXCEL_AVAILABLE)}{int(IMAGE_AVAILABLE)}"
 
 # Configuration du logging
 logging.basicConfig(
@@ -41,6 +73,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=None)
+def _charger_module(*noms):
+    """
+    Importe, au premier appel seulement, le premier module disponible parmi `noms`.
+    
+    Returns:
+        Le module importé, ou None si aucun n'est installé
+    """
+    for nom in noms:
+        try:
+            return importlib.import_module(nom)
+        except ImportError:
+            continue
+    return None
+
 def nettoyer_nom_fichier(nom_fichier):
     """
     Nettoie un nom de fichier en supprimant les caractères invalides.
@@ -73,12 +120,46 @@ def nettoyer_nom_fichier(nom_fichier):
     
     return '_'.join(mots_nettoyes)
 
-def extraire_contenu_pdf(chemin_fichier):
+def _lire_pages_pdf(pages, extraire_texte, budget):
+    """
+    Concatène le texte des pages jusqu'à atteindre `budget` caractères.
+    Les pages suivantes ne sont ni analysées ni extraites.
+    """
+    morceaux = []
+    taille = 0
+    for page in pages:
+        texte_page = extraire_texte(page)
+        if texte_page and texte_page.strip():
+            morceaux.append(texte_page[:budget - taille])
+            taille += len(morceaux[-1])
+            if taille >= budget:
+                break
+    return "\n".join(morceaux)[:budget]
+
+def _pages_couche_texte(lecteur, nb_pages):
+    """Pages de PyPDF2/pypdf, chargées une à une (l'index évite de construire la liste complète)."""
+    for i in range(min(nb_pages, len(lecteur.pages))):
+        yield lecteur.pages[i]
+
+def _texte_pdfplumber(page):
+    try:
+        return page.extract_text()
+    finally:
+        fermer = getattr(page, "close", None)  # Libère les objets de mise en page (pdfplumber >= 0.10)
+        if fermer:
+            fermer()
+
+def extraire_contenu_pdf(chemin_fichier, budget=TAILLE_MAX_CONTENU, nb_pages=PAGES_PDF_MAX):
     """
     Extrait le contenu textuel d'un fichier PDF.
+    La couche texte (PyPDF2/pypdf) est lue en premier, sans analyse de mise en page ;
+    pdfplumber n'est utilisé que si elle est vide ou illisible, avec le même fichier ouvert.
+    L'extraction s'arrête dès que `budget` caractères sont obtenus.
     
     Args:
         chemin_fichier: Chemin vers le fichier PDF
+        budget: Nombre maximal de caractères extraits
+        nb_pages: Nombre maximal de pages lues
         
     Returns:
         str: Contenu textuel du PDF
@@ -90,27 +171,22 @@ def extraire_contenu_pdf(chemin_fichier):
         return contenu
     
     try:
-        # Essayer avec pdfplumber d'abord (meilleur pour l'extraction de texte)
-        with pdfplumber.open(chemin_fichier) as pdf:
-            for page in pdf.pages[:3]:  # Limiter aux 3 premières pages
-                texte_page = page.extract_text()
-                if texte_page:
-                    contenu += texte_page + "\n"
-                if len(contenu) > 2000:  # Limiter la taille
-                    break
+        with open(chemin_fichier, 'rb') as fichier:
+            if PYPDF_AVAILABLE:
+                try:
+                    lecteur = _charger_module(*MODULES_PDF_TEXTE).PdfReader(fichier, strict=False)
+                    contenu = _lire_pages_pdf(_pages_couche_texte(lecteur, nb_pages),
+                                              lambda page: page.extract_text(), budget)
+                except Exception as e:
+                    logger.debug(f"Couche texte illisible pour {chemin_fichier}: {e}")
+            
+            if not contenu.strip() and PDFPLUMBER_AVAILABLE:
+                fichier.seek(0)
+                # Seules les premières pages sont chargées par pdfplumber (numérotées à partir de 1)
+                with _charger_module("pdfplumber").open(fichier, pages=list(range(1, nb_pages + 1))) as pdf:
+                    contenu = _lire_pages_pdf(pdf.pages, _texte_pdfplumber, budget)
     except Exception as e:
-        logger.debug(f"Erreur pdfplumber pour {chemin_fichier}: {e}")
-        
-        # Fallback avec PyPDF2
-        try:
-            with open(chemin_fichier, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for i, page in enumerate(pdf_reader.pages[:3]):
-                    contenu += page.extract_text() + "\n"
-                    if len(contenu) > 2000:
-                        break
-        except Exception as e2:
-            logger.warning(f"Impossible d'extraire le contenu PDF de {chemin_fichier}: {e2}")
+        logger.warning(f"Impossible d'extraire le contenu PDF de {chemin_fichier}: {e}")
     
     return contenu
 
@@ -131,7 +207,7 @@ def extraire_contenu_docx(chemin_fichier):
         return contenu
     
     try:
-        doc = DocxDocument(chemin_fichier)
+        doc = _charger_module("docx").Document(chemin_fichier)
         
         # Extraire le titre et les propriétés du document
         proprietes = doc.core_properties
@@ -162,12 +238,36 @@ def extraire_contenu_docx(chemin_fichier):
     
     return contenu
 
-def extraire_contenu_excel(chemin_fichier):
+def _resumer_feuille(lignes):
+    """
+    Résume les premières lignes d'une feuille : noms des colonnes (première ligne)
+    et, pour les 5 premières colonnes, leurs 3 premières valeurs distinctes non vides.
+    """
+    lignes = iter(lignes)
+    entete = next(lignes, None) or ()
+    colonnes = [str(valeur) if valeur is not None else f"Unnamed: {i}" for i, valeur in enumerate(entete)]
+    valeurs = [[] for _ in colonnes[:5]]
+    
+    for ligne in lignes:
+        for i, valeur in enumerate(ligne[:len(valeurs)]):
+            if valeur is not None and valeur != "" and valeur not in valeurs[i] and len(valeurs[i]) < 3:
+                valeurs[i].append(valeur)
+    
+    resume = f"COLONNES: {', '.join(colonnes)}\n"
+    for colonne, valeurs_uniques in zip(colonnes, valeurs):
+        if valeurs_uniques:
+            resume += f"{colonne}: {', '.join(str(v) for v in valeurs_uniques)}\n"
+    return resume
+
+def extraire_contenu_excel(chemin_fichier, nb_lignes=LIGNES_EXCEL_MAX):
     """
     Extrait le contenu d'un fichier Excel.
+    Le classeur est ouvert une seule fois en lecture seule : seules les premières lignes
+    de chaque feuille sont lues, sans charger le reste du fichier.
     
     Args:
         chemin_fichier: Chemin vers le fichier Excel
+        nb_lignes: Nombre de lignes de données lues par feuille
         
     Returns:
         str: Contenu textuel du fichier Excel
@@ -175,13 +275,16 @@ def extraire_contenu_excel(chemin_fichier):
     contenu = ""
     
     if not EXCEL_AVAILABLE:
-        logger.warning("openpyxl et pandas non installés. Installation: pip install openpyxl pandas")
+        logger.warning("openpyxl non installé. Installation: pip install openpyxl")
+        return contenu
+    
+    try:
+        workbook = _charger_module("openpyxl").load_workbook(chemin_fichier, read_only=True, data_only=True)
+    except Exception as e:
+        logger.warning(f"Impossible d'extraire le contenu Excel de {chemin_fichier}: {e}")
         return contenu
     
     try:
-        # Utiliser openpyxl pour les propriétés et pandas pour le contenu
-        workbook = openpyxl.load_workbook(chemin_fichier, read_only=True)
-        
         # Extraire les propriétés du document
         proprietes = workbook.properties
         if proprietes.title:
@@ -196,26 +299,22 @@ def extraire_contenu_excel(chemin_fichier):
         # Extraire quelques données de chaque feuille
         for nom_feuille in noms_feuilles[:3]:  # Limiter aux 3 premières feuilles
             try:
-                df = pd.read_excel(chemin_fichier, sheet_name=nom_feuille, nrows=10)
+                feuille = workbook[nom_feuille]
+                # Les dimensions enregistrées dans le fichier peuvent être fausses : lire les lignes telles quelles
+                feuille.reset_dimensions()
                 contenu += f"\nFEUILLE {nom_feuille}:\n"
-                contenu += f"COLONNES: {', '.join(df.columns.astype(str))}\n"
-                
-                # Ajouter quelques valeurs
-                for col in df.columns[:5]:  # Limiter aux 5 premières colonnes
-                    valeurs_uniques = df[col].dropna().unique()[:3]  # 3 premières valeurs uniques
-                    if len(valeurs_uniques) > 0:
-                        contenu += f"{col}: {', '.join(str(v) for v in valeurs_uniques)}\n"
+                contenu += _resumer_feuille(feuille.iter_rows(max_row=nb_lignes + 1, values_only=True))
                 
-                if len(contenu) > 2000:
+                if len(contenu) > TAILLE_MAX_CONTENU:
                     break
             except Exception as e:
                 logger.debug(f"Erreur lecture feuille {nom_feuille}: {e}")
                 continue
-        
-        workbook.close()
     
     except Exception as e:
         logger.warning(f"Impossible d'extraire le contenu Excel de {chemin_fichier}: {e}")
+    finally:
+        workbook.close()
     
     return contenu
 
@@ -235,7 +334,7 @@ def extraire_metadonnees_image(chemin_fichier):
         return contenu
     
     try:
-        with Image.open(chemin_fichier) as image:
+        with _charger_module("PIL.Image").open(chemin_fichier) as image:
             # Informations de base
             contenu += f"FORMAT: {image.format}\n"
             contenu += f"TAILLE: {image.size[0]}x{image.size[1]}\n"
@@ -244,8 +343,9 @@ def extraire_metadonnees_image(chemin_fichier):
             # Extraire les métadonnées EXIF
             exifdata = image.getexif()
             if exifdata:
+                tags = _charger_module("PIL.ExifTags").TAGS
                 for tag_id in exifdata:
-                    tag = TAGS.get(tag_id, tag_id)
+                    tag = tags.get(tag_id, tag_id)
                     data = exifdata.get(tag_id)
                     if isinstance(data, str) and len(data) < 100:
                         contenu += f"{tag}: {data}\n"
@@ -255,6 +355,48 @@ def extraire_metadonnees_image(chemin_fichier):
     
     return contenu
 
+def extraire_contenu_texte(chemin_fichier):
+    """
+    Lit le début d'un fichier texte simple (.txt, .csv, .json, .xml).
+    
+    Args:
+        chemin_fichier: Chemin vers le fichier texte
+        
+    Returns:
+        str: Contenu du fichier, limité à TAILLE_MAX_CONTENU caractères
+    """
+    try:
+        with open(chemin_fichier, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read(TAILLE_MAX_CONTENU)
+    except Exception as e:
+        logger.debug(f"Impossible de lire {chemin_fichier}: {e}")
+        return ""
+
+# Registre des extracteurs par extension. Chaque extracteur importe sa bibliothèque au premier
+# fichier traité : les types absents d'un dossier ne chargent rien.
+EXTRACTEURS = {}
+
+def enregistrer_extracteur(extensions, extracteur):
+    """
+    Associe un extracteur de contenu (chemin -> texte) à une ou plusieurs extensions.
+    
+    Args:
+        extensions: Extensions en minuscules, point compris (ex: ['.pdf'])
+        extracteur: Fonction recevant le chemin du fichier et retournant son contenu textuel
+    """
+    for extension in extensions:
+        EXTRACTEURS[extension] = extracteur
+
+enregistrer_extracteur(['.pdf'], extraire_contenu_pdf)
+enregistrer_extracteur(['.docx', '.doc'], extraire_contenu_docx)
+enregistrer_extracteur(['.xlsx', '.xls'], extraire_contenu_excel)
+enregistrer_extracteur(['.jpg', '.jpeg', '.png', '.tiff', '.bmp'], extraire_metadonnees_image)
+enregistrer_extracteur(['.txt', '.csv', '.json', '.xml'], extraire_contenu_texte)
+
+def extraction_possible(chemin_fichier):
+    """Indique si un extracteur est enregistré pour l'extension du fichier."""
+    return os.path.splitext(chemin_fichier)[1].lower() in EXTRACTEURS
+
 def analyser_contenu_fichier(chemin_fichier):
     """
     Analyse le contenu d'un fichier selon son type.
@@ -263,31 +405,13 @@ def analyser_contenu_fichier(chemin_fichier):
         chemin_fichier: Chemin complet vers le fichier
         
     Returns:
-        str: Contenu analysé du fichier
+        str: Contenu analysé du fichier (vide si aucun extracteur n'est enregistré pour son extension)
     """
     _, extension = os.path.splitext(chemin_fichier)
-    extension = extension.lower()
-    
-    contenu = ""
-    
-    if extension == '.pdf':
-        contenu = extraire_contenu_pdf(chemin_fichier)
-    elif extension in ['.docx', '.doc']:
-        contenu = extraire_contenu_docx(chemin_fichier)
-    elif extension in ['.xlsx', '.xls']:
-        contenu = extraire_contenu_excel(chemin_fichier)
-    elif extension in ['.jpg', '.jpeg', '.png', '.tiff', '.bmp']:
-        contenu = extraire_metadonnees_image(chemin_fichier)
-    else:
-        # Pour les fichiers texte simples
-        if extension in ['.txt', '.csv', '.json', '.xml']:
-            try:
-                with open(chemin_fichier, 'r', encoding='utf-8', errors='ignore') as f:
-                    contenu = f.read(2000)  # Limiter à 2000 caractères
-            except Exception as e:
-                logger.debug(f"Impossible de lire {chemin_fichier}: {e}")
-    
-    return contenu
+    extracteur = EXTRACTEURS.get(extension.lower())
+    if extracteur is None:
+        return ""
+    return extracteur(chemin_fichier)
 
 def extraire_mots_cles(contenu, langue='fr'):
     """
@@ -348,12 +472,47 @@ def extraire_mots_cles(contenu, langue='fr'):
     # Retourner les 5 mots les plus fréquents
     return [mot[0] for mot in mots_tries[:5]]
 
-def generer_nom_intelligent(chemin_fichier):
+def detecter_type_document(contenu):
     """
-    Génère un nom de fichier intelligent basé sur le contenu.
+    Détecte le type d'un document (facture, rapport, contrat...) d'après son contenu.
+    
+    Args:
+        contenu: Contenu textuel du document
+        
+    Returns:
+        str: Type de document, ou None s'il n'est pas identifié
+    """
+    contenu_minuscule = contenu.lower()
+    for type_doc, pattern in PATTERNS_TYPE_DOCUMENT.items():
+        if re.search(pattern, contenu_minuscule):
+            return type_doc
+    return None
+
+def analyser_document(chemin_fichier):
+    """
+    Analyse le contenu d'un fichier : extrait du texte, mots-clés et type de document.
+    
+    Args:
+        chemin_fichier: Chemin complet vers le fichier
+        
+    Returns:
+        dict: {"extrait", "mots_cles", "type_document"}, tel que mémorisé dans le cache d'extraction
+    """
+    contenu = analyser_contenu_fichier(chemin_fichier)
+    mots_cles = extraire_mots_cles(contenu)
+    return {
+        'extrait': contenu[:EXTRACTION_CACHE_TAILLE_EXTRAIT],
+        'mots_cles': mots_cles,
+        'type_document': detecter_type_document(contenu) if mots_cles else None
+    }
+
+def construire_nom(chemin_fichier, analyse):
+    """
+    Construit le nouveau nom d'un fichier à partir de l'analyse de son contenu.
     
     Args:
         chemin_fichier: Chemin complet vers le fichier
+        analyse: Résultat de analyser_document
         
     Returns:
         str: Nouveau nom suggéré pour le fichier
@@ -361,39 +520,16 @@ def generer_nom_intelligent(chemin_fichier):
     nom_original = os.path.basename(chemin_fichier)
     nom_base, extension = os.path.splitext(nom_original)
     
-    # Analyser le contenu
-    contenu = analyser_contenu_fichier(chemin_fichier)
-    
-    if not contenu:
+    if not analyse['extrait']:
         logger.info(f"Aucun contenu extractible pour {nom_original}")
         return nom_original
     
-    # Extraire les mots-clés
-    mots_cles = extraire_mots_cles(contenu)
-    
+    mots_cles = analyse['mots_cles']
     if not mots_cles:
         logger.info(f"Aucun mot-clé trouvé pour {nom_original}")
         return nom_original
     
-    # Chercher des patterns spécifiques dans le contenu
-    patterns_specifiques = {
-        'facture': r'facture|invoice|bill',
-        'rapport': r'rapport|report|bilan',
-        'contrat': r'contrat|contract|accord',
-        'presentation': r'présentation|presentation|slide',
-        'budget': r'budget|finance|cost',
-        'planning': r'planning|schedule|agenda',
-        'analyse': r'analyse|analysis|étude',
-        'procedure': r'procédure|procedure|process',
-        'manuel': r'manuel|manual|guide',
-        'specification': r'spécification|specification|spec'
-    }
-    
-    type_document = None
-    for type_doc, pattern in patterns_specifiques.items():
-        if re.search(pattern, contenu.lower()):
-            type_document = type_doc
-            break
+    type_document = analyse['type_document']
     
     # Construire le nouveau nom
     elements_nom = []
@@ -425,16 +561,92 @@ def generer_nom_intelligent(chemin_fichier):
     
     return nouveau_nom
 
-def verifier_conflit_fichier(chemin_fichier):
+def generer_nom_intelligent(chemin_fichier):
+    """
+    Génère un nom de fichier intelligent basé sur le contenu.
+    
+    Args:
+        chemin_fichier: Chemin complet vers le fichier
+        
+    Returns:
+        str: Nouveau nom suggéré pour le fichier
+    """
+    return construire_nom(chemin_fichier, analyser_document(chemin_fichier))
+
+def generer_noms_intelligents(chemins, progression=None, annulation=None):
+    """
+    Génère les noms intelligents d'un lot de fichiers.
+    Les fichiers sans extracteur gardent leur nom, sans être lus. Les analyses déjà présentes dans
+    le cache d'extraction sont réutilisées ; les autres fichiers sont analysés sur le pool de
+    processus, puis leurs analyses sont ajoutées au cache.
+    
+    Args:
+        chemins: Chemins complets des fichiers
+        progression: Fonction appelée avec (fichiers_termines, total)
+        annulation: threading.Event ; une fois positionné, plus aucun fichier n'est analysé
+        
+    Yields:
+        Triplets (chemin, nouveau_nom, erreur), `erreur` valant None en cas de succès
+    """
+    chemins = list(chemins)
+    total = len(chemins)
+    cache = charger_cache_extraction(VERSION_ANALYSE)
+    empreintes = {}
+    a_analyser = []
+    reutilisees = 0
+    
+    for chemin in chemins:
+        if not extraction_possible(chemin):
+            yield chemin, os.path.basename(chemin), None
+            continue
+        empreinte = empreinte_fichier(chemin)
+        analyse = rechercher_analyse(cache, empreinte) if empreinte else None
+        if analyse is not None:
+            reutilisees += 1
+            yield chemin, construire_nom(chemin, analyse), None
+        else:
+            empreintes[chemin] = empreinte
+            a_analyser.append(chemin)
+    
+    deja_connus = total - len(a_analyser)
+    if reutilisees:
+        logger.info(f"Cache d'extraction: {reutilisees}/{reutilisees + len(a_analyser)} analyse(s) réutilisée(s)")
+    if progression:
+        progression(deja_connus, total)
+    if not a_analyser:
+        sauvegarder_cache_extraction(cache)
+        return
+    
+    def signaler(termines, _):
+        progression(deja_connus + termines, total)
+    
+    try:
+        for chemin, analyse, erreur in executer_isole(analyser_document, a_analyser,
+                                                      progression=signaler if progression else None,
+                                                      annulation=annulation):
+            if erreur is not None:
+                yield chemin, None, erreur
+                continue
+            if empreintes[chemin]:
+                enregistrer_analyse(cache, empreintes[chemin], analyse)
+            yield chemin, construire_nom(chemin, analyse), None
+    finally:
+        sauvegarder_cache_extraction(cache)
+
+def verifier_conflit_fichier(chemin_fichier, registre=None):
     """
     Vérifie s'il y a un conflit de nom et génère un nom unique si nécessaire.
     
     Args:
         chemin_fichier: Chemin complet du fichier
+        registre: RegistreNoms optionnel ; le suffixe libre est alors obtenu sans sonder le disque
         
     Returns:
         str: Chemin unique (modifié si nécessaire)
     """
+    if registre is not None:
+        return registre.reserver(chemin_fichier, FORMAT_SUFFIXE_RENOMMAGE)
+    
     if not os.path.exists(chemin_fichier):
         return chemin_fichier
     
@@ -456,32 +668,32 @@ def verifier_conflit_fichier(chemin_fichier):
     
     return chemin_fichier
 
-def renommer_fichiers(dossier, mode_simulation=False, limite_traitement=None, 
-                     filtres_extension=None, exclure_motifs=None):
+def planifier_renommage_intelligent(dossier, limite_traitement=None, filtres_extension=None,
+                                    exclure_motifs=None, resultats=None, progression=None, annulation=None):
     """
-    Renomme les fichiers selon leur contenu dans le dossier spécifié.
+    Calcule le plan de renommage des fichiers selon leur contenu, sans rien renommer.
     
     Args:
         dossier (str): Le dossier contenant les fichiers à renommer
-        mode_simulation (bool): Si True, montre les actions sans les exécuter
         limite_traitement (int): Nombre maximum de fichiers à traiter (None pour tous)
         filtres_extension (list): Liste des extensions à traiter (ex: ['.pdf', '.docx'])
         exclure_motifs (list): Liste de motifs à exclure du renommage
+        resultats (dict): Dictionnaire de résultats à compléter (fichiers ignorés, erreurs)
+        progression: Fonction appelée avec (fichiers_analyses, total, etape) pendant l'analyse du contenu
+        annulation: threading.Event ; une fois positionné, l'analyse s'interrompt (OrganisationAnnulee)
         
     Returns:
-        dict: Résultats du traitement
+        PlanDeplacement
     """
-    # Vérifier que le dossier existe
-    if not os.path.exists(dossier):
-        logger.error(f"Le dossier {dossier} n'existe pas")
-        return {'erreur': 'Dossier inexistant', 'fichiers_traites': 0}
+    if resultats is None:
+        resultats = {'fichiers_ignores': 0, 'erreurs': 0, 'erreurs_details': []}
     
-    # Extensions supportées
-    extensions_supportees = {'.pdf', '.docx', '.doc', '.xlsx', '.xls', '.txt', '.csv', 
-                           '.jpg', '.jpeg', '.png', '.tiff', '.bmp', '.json', '.xml'}
+    # Extensions supportées : celles du registre des extracteurs
+    extensions_supportees = set(EXTRACTEURS)
     
     # Obtenir la liste des fichiers
-    tous_fichiers = [f for f in os.listdir(dossier) if os.path.isfile(os.path.join(dossier, f))]
+    entrees = {entree.name: entree for entree in lister_fichiers(dossier)}
+    tous_fichiers = list(entrees)
     
     # Filtrer par extensions supportées si aucun filtre spécifique
     if not filtres_extension:
@@ -521,28 +733,27 @@ def renommer_fichiers(dossier, mode_simulation=False, limite_traitement=None,
         logger.info(f"Limitation à {limite_traitement} fichiers sur {len(tous_fichiers)} au total")
         tous_fichiers = tous_fichiers[:limite_traitement]
     
-    # Résultats du traitement
-    resultats = {
-        'fichiers_traites': 0,
-        'fichiers_ignores': 0,
-        'erreurs': 0,
-        'renommages': [],
-        'erreurs_details': []
-    }
+    resultats['fichiers_analyses'] = len(tous_fichiers)
+    plan = PlanDeplacement(dossier, mode="renommage intelligent")
     
-    logger.info(f"Début du {'simulation de ' if mode_simulation else ''}renommage intelligent...")
+    # Analyser le contenu des fichiers : cache d'extraction, puis un processus par cœur et délai maximal par fichier
+    chemins = [os.path.join(dossier, fichier) for fichier in tous_fichiers]
+    def signaler(termines, total):
+        progression(termines, total, "Analyse du contenu")
+    
+    noms_generes = {chemin: (nom, erreur) for chemin, nom, erreur in generer_noms_intelligents(
+        chemins, progression=signaler if progression else None, annulation=annulation)}
+    if annulation is not None and annulation.is_set():
+        raise OrganisationAnnulee()
     
     for i, fichier in enumerate(tous_fichiers, 1):
         chemin_complet = os.path.join(dossier, fichier)
         
         try:
-            # Générer le nouveau nom basé sur le contenu
-            nouveau_nom = generer_nom_intelligent(chemin_complet)
-            nouveau_chemin = os.path.join(dossier, nouveau_nom)
-            
-            # Vérifier s'il y a déjà un fichier avec ce nom
-            nouveau_chemin = verifier_conflit_fichier(nouveau_chemin)
-            nouveau_nom = os.path.basename(nouveau_chemin)
+            # Nouveau nom basé sur le contenu
+            nouveau_nom, erreur = noms_generes[chemin_complet]
+            if erreur is not None:
+                raise erreur
             
             # Vérifier si le renommage est nécessaire
             if fichier == nouveau_nom:
@@ -550,42 +761,12 @@ def renommer_fichiers(dossier, mode_simulation=False, limite_traitement=None,
                 resultats['fichiers_ignores'] += 1
                 continue
             
-            # Enregistrer l'action prévue
-            action = {
-                'ancien_nom': fichier,
-                'nouveau_nom': nouveau_nom,
-                'taille_fichier': os.path.getsize(chemin_complet)
-            }
-            
-            if mode_simulation:
-                logger.info(f"[{i}/{len(tous_fichiers)}] [SIMULATION] Renommage: {fichier} → {nouveau_nom}")
-                resultats['renommages'].append(action)
-                resultats['fichiers_traites'] += 1
-            else:
-                # Tenter le renommage réel
-                try:
-                    os.rename(chemin_complet, nouveau_chemin)
-                    logger.info(f"[{i}/{len(tous_fichiers)}] Renommé: {fichier} → {nouveau_nom}")
-                    resultats['renommages'].append(action)
-                    resultats['fichiers_traites'] += 1
-                    
-                except Exception as e:
-                    logger.warning(f"Erreur lors du renommage de {fichier}: {e}")
-                    # Attendre et réessayer une fois
-                    try:
-                        time.sleep(1)
-                        os.rename(chemin_complet, nouveau_chemin)
-                        logger.info(f"[{i}/{len(tous_fichiers)}] Renommé après reprise: {fichier} → {nouveau_nom}")
-                        resultats['renommages'].append(action)
-                        resultats['fichiers_traites'] += 1
-                    except Exception as e2:
-                        erreur_msg = f"Échec définitif pour {fichier}: {e2}"
-                        logger.error(erreur_msg)
-                        resultats['erreurs'] += 1
-                        resultats['erreurs_details'].append({
-                            'fichier': fichier,
-                            'erreur': str(e2)
-                        })
+            # Le plan résout les conflits avec les fichiers existants et les autres renommages prévus ;
+            # la taille vient du stat mis en cache lors du parcours
+            stat_fichier = stat_entree(entrees[fichier])
+            plan.ajouter(chemin_complet, os.path.join(dossier, nouveau_nom), "Renommage intelligent",
+                         format_suffixe=FORMAT_SUFFIXE_RENOMMAGE,
+                         taille=stat_fichier.st_size if stat_fichier else None)
         
         except Exception as e:
             erreur_msg = f"Erreur inattendue avec {fichier}: {e}"
@@ -596,12 +777,69 @@ def renommer_fichiers(dossier, mode_simulation=False, limite_traitement=None,
                 'erreur': str(e)
             })
     
+    return plan
+
+def renommer_fichiers(dossier, mode_simulation=False, limite_traitement=None, 
+                     filtres_extension=None, exclure_motifs=None, progression=None, annulation=None):
+    """
+    Renomme les fichiers selon leur contenu dans le dossier spécifié.
+    
+    Args:
+        dossier (str): Le dossier contenant les fichiers à renommer
+        mode_simulation (bool): Si True, montre les actions sans les exécuter
+        limite_traitement (int): Nombre maximum de fichiers à traiter (None pour tous)
+        filtres_extension (list): Liste des extensions à traiter (ex: ['.pdf', '.docx'])
+        exclure_motifs (list): Liste de motifs à exclure du renommage
+        progression: Fonction appelée avec (fichiers_traites, total, etape) au fil de l'analyse et des renommages
+        annulation: threading.Event ; une fois positionné, l'analyse s'interrompt (OrganisationAnnulee)
+            ou les renommages restants ne sont pas effectués
+        
+    Returns:
+        dict: Résultats du traitement
+    """
+    # Vérifier que le dossier existe
+    if not os.path.exists(dossier):
+        logger.error(f"Le dossier {dossier} n'existe pas")
+        return {'erreur': 'Dossier inexistant', 'fichiers_traites': 0}
+    
+    # Résultats du traitement
+    resultats = {
+        'fichiers_traites': 0,
+        'fichiers_ignores': 0,
+        'erreurs': 0,
+        'renommages': [],
+        'erreurs_details': []
+    }
+    
+    logger.info(f"Début du {'simulation de ' if mode_simulation else ''}renommage intelligent...")
+    
+    plan = planifier_renommage_intelligent(dossier, limite_traitement, filtres_extension,
+                                           exclure_motifs, resultats, progression, annulation)
+    reussis, echecs = executer_plan(plan, mode_simulation, progression, annulation)
+    if mode_simulation:
+        reussis = plan.deplacements
+    
+    for deplacement in reussis:
+        resultats['renommages'].append({
+            'ancien_nom': os.path.basename(deplacement.source),
+            'nouveau_nom': os.path.basename(deplacement.destination),
+            'taille_fichier': deplacement.taille or 0
+        })
+        resultats['fichiers_traites'] += 1
+    
+    for deplacement, erreur in echecs:
+        resultats['erreurs'] += 1
+        resultats['erreurs_details'].append({
+            'fichier': os.path.basename(deplacement.source),
+            'erreur': str(erreur)
+        })
+    
     # Rapport final
     logger.info("="*60)
     logger.info("RAPPORT DE RENOMMAGE INTELLIGENT")
     logger.info("="*60)
     logger.info(f"Mode: {'SIMULATION' if mode_simulation else 'RÉEL'}")
-    logger.info(f"Fichiers analysés: {len(tous_fichiers)}")
+    logger.info(f"Fichiers analysés: {resultats.get('fichiers_analyses', 0)}")
     logger.info(f"Fichiers traités: {resultats['fichiers_traites']}")
     logger.info(f"Fichiers ignorés: {resultats['fichiers_ignores']}")
     logger.info(f"Erreurs: {resultats['erreurs']}")
@@ -635,13 +873,13 @@ def installer_dependances():
     print("pip install python-docx")
     print()
     print("# Pour les fichiers Excel:")
-    print("pip install openpyxl pandas")
+    print("pip install openpyxl")
     print()
     print("# Pour les images:")
     print("pip install Pillow")
     print()
     print("# Installation complète:")
-    print("pip install PyPDF2 pdfplumber python-docx openpyxl pandas Pillow")
+    print("pip install PyPDF2 pdfplumber python-docx openpyxl Pillow")
     print()
     print("="*60)
 
@@ -0,0 +1,148 @@
+# coding: utf-8
+# Ce fichier fournit le parcours de dossier partagé par tous les organiseurs.
+# Il s'appuie sur os.scandir : le type de chaque entrée est connu sans appel système supplémentaire
+# et le résultat de stat() est mis en cache dans l'entrée, si bien qu'un organiseur n'interroge
+# le système de fichiers qu'une seule fois par fichier.
+# Le parcours récursif répartit les sous-dossiers sur un pool de threads : chaque thread libre prend
+# le prochain sous-dossier découvert, quelle que soit sa branche.
+
+import os
+import stat
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from logs.logger import logger
+from config import SCAN_NB_WORKERS, SCAN_EXCLUSIONS
+
+
+def scanner_dossier(dossier, fichiers_seulement=True):
+    """
+    Parcourt le dossier une seule fois et produit ses entrées (os.DirEntry).
+
+    Args:
+        dossier: Le dossier à parcourir (non récursif)
+        fichiers_seulement: Si True, ignore les sous-dossiers et les entrées spéciales
+
+    Yields:
+        os.DirEntry dont `stat()` est mis en cache après le premier appel
+
+    Raises:
+        OSError: Si le dossier lui-même est illisible (seules les entrées illisibles sont ignorées)
+    """
+    with os.scandir(dossier) as entrees:
+        for entree in entrees:
+            try:
+                if fichiers_seulement and not entree.is_file():
+                    continue
+            except OSError as e:
+                logger.warning(f"Entrée illisible ignorée: {entree.path}: {e}")
+                continue
+            yield entree
+
+
+def _est_exclu(entree, racine, exclusions):
+    """Indique si un sous-dossier correspond à l'un des motifs d'exclusion (nom ou chemin relatif)."""
+    chemin_relatif = os.path.relpath(entree.path, racine).replace(os.sep, "/")
+    return any(fnmatch.fnmatch(entree.name, motif) or fnmatch.fnmatch(chemin_relatif, motif)
+               for motif in exclusions)
+
+
+def _lire_dossier(dossier, racine, exclusions):
+    """
+    Lit un dossier et sépare ses fichiers de ses sous-dossiers à parcourir.
+    Un sous-dossier illisible est ignoré ; l'erreur est propagée s'il s'agit de la racine.
+    """
+    fichiers = []
+    sous_dossiers = []
+    try:
+        for entree in scanner_dossier(dossier, fichiers_seulement=False):
+            try:
+                if entree.is_dir(follow_symlinks=False):
+                    if not _est_exclu(entree, racine, exclusions):
+                        sous_dossiers.append(entree.path)
+                elif entree.is_file():
+                    fichiers.append(entree)
+            except OSError as e:
+                logger.warning(f"Entrée illisible ignorée: {entree.path}: {e}")
+    except OSError as e:
+        if dossier == racine:
+            raise
+        logger.warning(f"Sous-dossier illisible ignoré: {dossier}: {e}")
+        return [], []
+    return fichiers, sous_dossiers
+
+
+def parcourir_arborescence(dossier, profondeur_max=None, exclusions=None, nb_workers=None):
+    """
+    Parcourt récursivement le dossier en parallèle et produit les fichiers au fil de leur découverte.
+
+    Args:
+        dossier: Le dossier racine
+        profondeur_max: Profondeur maximale (0 = racine seulement, None = illimitée)
+        exclusions: Motifs glob des sous-dossiers à ignorer (SCAN_EXCLUSIONS par défaut)
+        nb_workers: Nombre de threads (SCAN_NB_WORKERS par défaut)
+
+    Yields:
+        os.DirEntry des fichiers trouvés (ordre non déterministe)
+    """
+    exclusions = SCAN_EXCLUSIONS if exclusions is None else exclusions
+    nb_workers = nb_workers or SCAN_NB_WORKERS
+
+    with ThreadPoolExecutor(max_workers=nb_workers, thread_name_prefix="scan") as executeur:
+        en_cours = {executeur.submit(_lire_dossier, dossier, dossier, exclusions): 0}
+        while en_cours:
+            terminees, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+            for future in terminees:
+                profondeur = en_cours.pop(future)
+                fichiers, sous_dossiers = future.result()
+                if profondeur_max is None or profondeur < profondeur_max:
+                    for sous_dossier in sous_dossiers:
+                        en_cours[executeur.submit(_lire_dossier, sous_dossier, dossier, exclusions)] = profondeur + 1
+                yield from fichiers
+
+
+def lister_fichiers(dossier, recursif=False, profondeur_max=None, exclusions=None):
+    """
+    Retourne la liste des fichiers (os.DirEntry) du dossier, triée par chemin.
+    En mode récursif, les sous-dossiers sont parcourus en parallèle (voir parcourir_arborescence).
+    """
+    if recursif:
+        return sorted(parcourir_arborescence(dossier, profondeur_max, exclusions), key=lambda entree: entree.path)
+    return sorted(scanner_dossier(dossier), key=lambda entree: entree.name)
+
+
+class EntreeFichier:
+    """Équivalent minimal d'os.DirEntry pour un fichier connu par son chemin (ex: signalé par le watcher)."""
+
+    __slots__ = ("path", "name", "_stat")
+
+    def __init__(self, chemin):
+        self.path = chemin
+        self.name = os.path.basename(chemin)
+        self._stat = None
+
+    def stat(self):
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+    def is_file(self):
+        try:
+            return stat.S_ISREG(self.stat().st_mode)
+        except OSError:
+            return False
+
+
+def stat_entree(entree):
+    """Retourne le stat mis en cache d'une entrée, ou None s'il est indisponible."""
+    try:
+        return entree.stat()
+    except OSError as e:
+        logger.warning(f"Impossible de lire les informations de {entree.path}: {e}")
+        return None
+
+
+def est_dans_dossier(entree, dossier):
+    """Indique si l'entrée se trouve directement dans le dossier (chemins absolus, casse normalisée)."""
+    return (os.path.normcase(os.path.abspath(os.path.dirname(entree.path)))
+            == os.path.normcase(os.path.abspath(dossier)))
@@ -0,0 +1,205 @@
+# coding: utf-8
+# Ce fichier gère la planification persistante des réorganisations des dossiers surveillés.
+# Chaque dossier a une expression cron (champ "cron") ou une fréquence et une heure d'exécution
+# ("frequence" + "heure", l'heure par défaut étant execution_time de config.json).
+# La date de la dernière exécution de chaque dossier est conservée dans json/ : un redémarrage ne
+# déclenche plus de réorganisation, et les exécutions manquées pendant un arrêt sont rattrapées une
+# seule fois. Chaque dossier est décalé d'un délai fixe, propre à son chemin, pour que tous les
+# dossiers ne soient pas relus en même temps à l'heure prévue.
+
+import os
+import json
+import hashlib
+from datetime import datetime, timedelta
+
+from logs.logger import logger
+from config import PLANIFICATION_ETALEMENT_MAX
+
+
+PLANIFICATION_FILE = r"json/planification.json"
+os.makedirs(os.path.dirname(PLANIFICATION_FILE), exist_ok=True)
+
+HEURE_PAR_DEFAUT = "09:00"
+
+# Fréquences reconnues (preferences.json en français, config.json en anglais) et jour cron associé
+FREQUENCES = {
+    "journalier": "{minute} {heure} * * *",
+    "daily": "{minute} {heure} * * *",
+    "hebdomadaire": "{minute} {heure} * * 1",
+    "weekly": "{minute} {heure} * * 1",
+    "mensuel": "{minute} {heure} 1 * *",
+    "monthly": "{minute} {heure} 1 * *",
+}
+
+
+class ExpressionCron:
+    """Expression cron à cinq champs : minute, heure, jour du mois, mois, jour de la semaine (0 ou 7 = dimanche)."""
+
+    LIMITES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, texte):
+        champs = texte.split()
+        if len(champs) != 5:
+            raise ValueError(f"Expression cron invalide (5 champs attendus) : {texte}")
+        self.texte = texte
+        valeurs = [self._analyser_champ(champ, *limites) for champ, limites in zip(champs, self.LIMITES)]
+        self.minutes, self.heures, self.jours, self.mois, jours_semaine = valeurs
+        self.jours_semaine = {0 if jour == 7 else jour for jour in jours_semaine}
+        self.jours_restreints = champs[2] != "*"
+        self.jours_semaine_restreints = champs[4] != "*"
+
+    @staticmethod
+    def _analyser_champ(champ, minimum, maximum):
+        valeurs = set()
+        for partie in champ.split(","):
+            plage, _, pas = partie.partition("/")
+            pas = int(pas) if pas else 1
+            if plage == "*":
+                debut, fin = minimum, maximum
+            elif "-" in plage:
+                debut, fin = (int(borne) for borne in plage.split("-", 1))
+            else:
+                debut = int(plage)
+                fin = maximum if pas > 1 else debut
+            if not (minimum <= debut <= fin <= maximum) or pas < 1:
+                raise ValueError(f"Champ cron invalide : {champ}")
+            valeurs.update(range(debut, fin + 1, pas))
+        return sorted(valeurs)
+
+    def _jour_valide(self, jour):
+        dans_mois = jour.day in self.jours
+        dans_semaine = (jour.weekday() + 1) % 7 in self.jours_semaine
+        # Comme cron : si les deux champs sont restreints, l'un ou l'autre suffit
+        if self.jours_restreints and self.jours_semaine_restreints:
+            return dans_mois or dans_semaine
+        return dans_mois and dans_semaine
+
+    def prochaine(self, apres):
+        """Retourne la première date correspondant à l'expression strictement après `apres`."""
+        debut = apres.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        jour = debut.date()
+        for _ in range(366 * 5):
+            if jour.month in self.mois and self._jour_valide(jour):
+                for heure in self.heures:
+                    for minute in self.minutes:
+                        candidat = datetime(jour.year, jour.month, jour.day, heure, minute)
+                        if candidat >= debut:
+                            return candidat
+            jour += timedelta(days=1)
+        raise ValueError(f"L'expression cron ne se produit jamais : {self.texte}")
+
+
+def charger_heure_execution(chemin="config.json"):
+    """Retourne l'heure d'exécution par défaut (execution_time de config.json, sinon 09:00)."""
+    try:
+        with open(chemin, "r", encoding="utf-8") as f:
+            return json.load(f).get("execution_time") or HEURE_PAR_DEFAUT
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return HEURE_PAR_DEFAUT
+
+
+def expression_pour(config, heure_defaut=HEURE_PAR_DEFAUT):
+    """
+    Retourne l'ExpressionCron d'un dossier, ou None s'il n'a pas de planification.
+    Le champ "cron" est prioritaire sur "frequence" + "heure".
+    """
+    if config.get("cron"):
+        return ExpressionCron(config["cron"])
+    modele = FREQUENCES.get((config.get("frequence") or "").lower())
+    if modele is None:
+        return None
+    heure, _, minute = (config.get("heure") or heure_defaut).partition(":")
+    return ExpressionCron(modele.format(heure=int(heure), minute=int(minute or 0)))
+
+
+def decalage_dossier(chemin, etalement_max=PLANIFICATION_ETALEMENT_MAX):
+    """Retourne le décalage (timedelta) propre à un dossier : stable d'un redémarrage à l'autre."""
+    if etalement_max <= 0:
+        return timedelta(0)
+    empreinte = int(hashlib.sha1(os.path.normcase(os.path.abspath(chemin)).encode("utf-8")).hexdigest()[:8], 16)
+    return timedelta(seconds=empreinte % (int(etalement_max) + 1))
+
+
+class Planificateur:
+    """Calcule les échéances des dossiers et mémorise leurs dernières exécutions dans un fichier JSON."""
+
+    def __init__(self, dossiers, chemin_etat=PLANIFICATION_FILE, heure_defaut=None,
+                 etalement_max=PLANIFICATION_ETALEMENT_MAX):
+        """
+        Args:
+            dossiers: Liste de dictionnaires {"chemin", "mode", "frequence" ou "cron", "heure" optionnelle}
+            chemin_etat: Fichier JSON des dernières exécutions
+            heure_defaut: Heure des fréquences sans "heure" (execution_time de config.json par défaut)
+            etalement_max: Décalage maximal entre dossiers, en secondes
+        """
+        self.chemin_etat = chemin_etat
+        heure_defaut = heure_defaut or charger_heure_execution()
+        self.etat = self._charger()
+        self.planifies = {}
+        maintenant = datetime.now()
+
+        for config in dossiers:
+            try:
+                expression = expression_pour(config, heure_defaut)
+            except ValueError as e:
+                logger.error(f"Planification ignorée pour {config['chemin']}: {e}")
+                continue
+            if expression is None:
+                continue
+            cle = os.path.abspath(config["chemin"])
+            self.planifies[cle] = (config, expression, decalage_dossier(cle, etalement_max))
+            if cle not in self.etat:
+                # Dossier jamais planifié : l'exécution passée n'est pas rattrapée, on attend la prochaine
+                self.etat[cle] = {"derniere_execution": maintenant.isoformat(timespec="seconds")}
+
+        self._sauvegarder()
+
+    def _charger(self):
+        if not os.path.exists(self.chemin_etat):
+            return {}
+        try:
+            with open(self.chemin_etat, "r", encoding="utf-8") as f:
+                etat = json.load(f)
+            return etat if isinstance(etat, dict) else {}
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"État de planification illisible, réinitialisation : {e}")
+            return {}
+
+    def _sauvegarder(self):
+        chemin_temp = self.chemin_etat + ".tmp"
+        try:
+            with open(chemin_temp, "w", encoding="utf-8") as f:
+                json.dump(self.etat, f, indent=4, ensure_ascii=False)
+            os.replace(chemin_temp, self.chemin_etat)
+        except OSError as e:
+            logger.error(f"Erreur lors de la sauvegarde de la planification : {e}")
+
+    def echeance(self, cle):
+        """
+        Retourne la date de la prochaine exécution d'un dossier, décalage compris.
+        Si plusieurs exécutions ont été manquées, l'échéance est dans le passé : une seule est rattrapée.
+        """
+        _, expression, decalage = self.planifies[cle]
+        derniere = datetime.fromisoformat(self.etat[cle]["derniere_execution"])
+        return expression.prochaine(derniere - decalage) + decalage
+
+    def prochaine_echeance(self):
+        """Retourne la plus proche échéance parmi tous les dossiers (None si aucun n'est planifié)."""
+        return min((self.echeance(cle) for cle in self.planifies), default=None)
+
+    def dossiers_dus(self, maintenant=None):
+        """
+        Retourne la configuration des dossiers dont l'échéance est atteinte et enregistre leur exécution.
+        """
+        maintenant = maintenant or datetime.now()
+        dus = []
+        for cle, (config, _, _) in self.planifies.items():
+            echeance = self.echeance(cle)
+            if echeance <= maintenant:
+                if maintenant - echeance > timedelta(minutes=5):
+                    logger.info(f"Rattrapage de l'exécution manquée du {echeance:%d/%m/%Y %H:%M} pour {config['chemin']}")
+                self.etat[cle] = {"derniere_execution": maintenant.isoformat(timespec="seconds")}
+                dus.append(config)
+        if dus:
+            self._sauvegarder()
+        return dus
@@ -1,11 +1,281 @@
+# coding: utf-8
+# Ce fichier gère la surveillance des dossiers.
+# Les fichiers créés ou déplacés dans un dossier surveillé sont signalés par le système (inotify,
+# FSEvents ou ReadDirectoryChangesW via watchdog) et classés dès qu'ils sont complets, sans relire le dossier :
+# aucun réveil périodique quand rien ne change. Les réorganisations planifiées (cron ou fréquence,
+# voir core.scheduler) sont effectuées en mode incrémental.
+
 import os
 import time
 import json
-from datetime import datetime, timedelta
-from .organizer_type import classer_fichier_par_type
-from .organizer_date import classer_par_date
-from .organizer_name import classer_fichier_par_nom
+import queue
+import threading
+from functools import partial
+from datetime import datetime
+from .organizer_type import planifier_par_type
+from .organizer_date import planifier_par_date
+from .organizer_name import planifier_par_nom
+from .plan import Deplacement, executer_plan
+from .scanner import EntreeFichier
+from .journal_etat import charger_journal, sauvegarder_journal, parcourir_nouveautes, oublier_entrees
+from .worker_pool import PoolEquitable
+from .scheduler import Planificateur
 from logs.logger import logger
+from config import get_setting, load_settings
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+from config import (WATCHER_SUFFIXES_TEMPORAIRES, WATCHER_PREFIXES_TEMPORAIRES, WATCHER_NB_WORKERS,
+                    WATCHER_TAILLE_LOT)
+
+# Planificateurs utilisables par la réorganisation incrémentale, par mode. Les nouveaux fichiers
+# classés par nom rejoignent les dossiers de groupe créés par les passages précédents.
+PLANIFICATEURS = {
+    "type": planifier_par_type,
+    "date": planifier_par_date,
+    "nom": partial(planifier_par_nom, rejoindre_groupes=True),
+}
+
+
+def est_temporaire(chemin):
+    """Indique si un fichier est un fichier temporaire (téléchargement ou copie en cours, verrou...)."""
+    nom = os.path.basename(chemin).lower()
+    return nom.endswith(tuple(WATCHER_SUFFIXES_TEMPORAIRES)) or nom.startswith(tuple(WATCHER_PREFIXES_TEMPORAIRES))
+
+
+class FolderHandler(FileSystemEventHandler):
+    """
+    Reçoit les évènements d'un dossier surveillé et classe les fichiers créés ou déplacés dans ce dossier.
+    Les évènements sont mis en file par le thread de watchdog et regroupés par chemin par un thread
+    dédié : un fichier n'est classé qu'après `delai` secondes sans nouvel évènement et si sa taille
+    n'a pas changé entre-temps (téléchargement ou copie terminés). Les fichiers temporaires
+    (.part, .crdownload, .tmp...) sont ignorés ; le fichier final est signalé quand il est renommé.
+    """
+
+    def __init__(self, dossier, delai=1, mode=None, rappel=None, pool=None):
+        """
+        Args:
+            dossier: Le dossier surveillé (non récursif)
+            delai: Durée (secondes) sans évènement ni changement de taille avant de classer un fichier
+            mode: Mode d'organisation ("type", "date" ou "nom" ; paramètre organization_mode par défaut)
+            rappel: Fonction appelée avec la liste des chemins traités après chaque classement
+            pool: PoolEquitable partagé auquel confier les classements (sinon, classement dans ce thread)
+        """
+        super().__init__()
+        self.dossier = os.path.abspath(dossier)
+        self.delai = delai
+        self.mode = mode or get_setting("organization_mode", "type")
+        if self.mode not in PLANIFICATEURS:
+            logger.warning(f"Mode d'organisation inconnu '{self.mode}', classement par type")
+            self.mode = "type"
+        self.rappel = rappel
+        self.pool = pool
+        self.file = queue.Queue()
+        self.en_attente = {}  # chemin -> [échéance, taille au dernier évènement]
+        self._thread = threading.Thread(target=self._traiter_file, name="watcher", daemon=True)
+        self._thread.start()
+
+    # --- Évènements watchdog (thread de l'observateur) ---
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._signaler(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._signaler(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.file.put(("retire", os.path.abspath(event.src_path)))
+            self._signaler(event.dest_path)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.file.put(("retire", os.path.abspath(event.src_path)))
+
+    def _signaler(self, chemin):
+        chemin = os.path.abspath(chemin)
+        # Seuls les fichiers arrivés directement dans le dossier sont classés (pas ceux déjà rangés)
+        if os.path.dirname(chemin) == self.dossier and not est_temporaire(chemin):
+            self.file.put(("activite", chemin))
+
+    # --- Traitement (thread dédié) ---
+
+    def arreter(self):
+        """Arrête le thread de traitement ; les fichiers pas encore stabilisés sont abandonnés."""
+        self.file.put(None)
+        self._thread.join()
+
+    def _taille(self, chemin):
+        try:
+            return os.stat(chemin).st_size
+        except OSError:
+            return None
+
+    def _prendre_evenement(self, evenement):
+        action, chemin = evenement
+        if action == "retire":
+            self.en_attente.pop(chemin, None)
+        else:
+            # Chaque évènement repousse l'échéance du fichier : les rafales sont fusionnées
+            self.en_attente[chemin] = [time.monotonic() + self.delai, self._taille(chemin)]
+
+    def _fichiers_stabilises(self):
+        """Retire et retourne les fichiers dont l'échéance est passée et la taille stable."""
+        maintenant = time.monotonic()
+        prets = []
+        for chemin, (echeance, taille) in list(self.en_attente.items()):
+            if echeance > maintenant:
+                continue
+            taille_actuelle = self._taille(chemin)
+            if taille_actuelle is None:
+                del self.en_attente[chemin]  # Disparu (fichier temporaire supprimé, déjà déplacé...)
+            elif taille_actuelle != taille:
+                self.en_attente[chemin] = [maintenant + self.delai, taille_actuelle]  # Encore en écriture
+            else:
+                del self.en_attente[chemin]
+                prets.append(chemin)
+        return sorted(prets)
+
+    def _traiter_file(self):
+        while True:
+            # Sans fichier en attente, le thread dort jusqu'au prochain évènement
+            attente = None
+            if self.en_attente:
+                attente = max(0, min(echeance for echeance, _ in self.en_attente.values()) - time.monotonic())
+            try:
+                evenement = self.file.get(timeout=attente)
+                while True:
+                    if evenement is None:
+                        return
+                    self._prendre_evenement(evenement)
+                    evenement = self.file.get_nowait()  # Vider la file avant de vérifier les échéances
+            except queue.Empty:
+                pass
+
+            prets = self._fichiers_stabilises()
+            if not prets:
+                continue
+            if self.pool is not None:
+                # Par lots bornés : le pool peut servir d'autres dossiers entre deux lots
+                for debut in range(0, len(prets), WATCHER_TAILLE_LOT):
+                    self.pool.soumettre(self.dossier, partial(self.organiser, prets[debut:debut + WATCHER_TAILLE_LOT]))
+                continue
+            try:
+                self.organiser(prets)
+            except Exception as e:
+                logger.error(f"Erreur lors du classement des nouveaux fichiers de {self.dossier}: {e}")
+
+    def organiser(self, chemins):
+        """Classe les fichiers indiqués (ceux qui ont disparu entre-temps sont ignorés)."""
+        entrees = [entree for entree in map(EntreeFichier, chemins) if entree.is_file()]
+        if not entrees:
+            return 0
+        plan = PLANIFICATEURS[self.mode](self.dossier, entrees=entrees)
+        reussis, _ = executer_plan(plan)
+        logger.info(f"Surveillance de {self.dossier}: {len(reussis)} nouveau(x) fichier(s) classé(s) par {self.mode}")
+        if self.rappel:
+            self.rappel([deplacement.source for deplacement in reussis])
+        return len(reussis)
+
+
+def demarrer_surveillance(dossier, delai=1, mode=None, rappel=None):
+    """
+    Démarre la surveillance d'un dossier.
+
+    Returns:
+        Couple (observateur, gestionnaire) à passer à arreter_surveillance
+    """
+    if not WATCHDOG_AVAILABLE:
+        raise RuntimeError("La surveillance en temps réel nécessite le paquet watchdog (pip install watchdog)")
+    gestionnaire = FolderHandler(dossier, delai, mode, rappel)
+    observateur = Observer()
+    observateur.schedule(gestionnaire, gestionnaire.dossier, recursive=False)
+    observateur.start()
+    return observateur, gestionnaire
+
+
+def arreter_surveillance(observateur, gestionnaire):
+    """Arrête l'observateur puis le thread de traitement du dossier."""
+    observateur.stop()
+    observateur.join()
+    gestionnaire.arreter()
+
+class ServiceSurveillance:
+    """
+    Surveille plusieurs dossiers avec un seul observateur et un seul pool de threads borné.
+    Les nouveaux fichiers et les passages planifiés de chaque dossier sont confiés au pool,
+    qui sert les dossiers à tour de rôle : un dossier lent ne bloque pas les autres.
+    """
+
+    def __init__(self, dossiers, nb_workers=None, delai=1, rappel=None):
+        """
+        Args:
+            dossiers: Liste de dictionnaires {"chemin", "mode"} (voir charger_dossiers_surveilles)
+            nb_workers: Nombre de threads du pool partagé (WATCHER_NB_WORKERS par défaut)
+            delai: Délai de stabilisation des fichiers, en secondes
+            rappel: Fonction appelée avec la liste des chemins classés
+        """
+        self.dossiers = dossiers
+        self.nb_workers = nb_workers or WATCHER_NB_WORKERS
+        self.delai = delai
+        self.rappel = rappel
+        self.pool = None
+        self.observateur = None
+        self.gestionnaires = {}
+
+    def demarrer(self):
+        """Démarre le pool et, si watchdog est installé, la surveillance en temps réel des dossiers valides."""
+        self.pool = PoolEquitable(self.nb_workers, nom="surveillance")
+        if not WATCHDOG_AVAILABLE:
+            logger.warning("watchdog n'est pas installé : seuls les passages planifiés seront effectués")
+            return
+
+        self.observateur = Observer()
+        for config in self.dossiers:
+            chemin = config["chemin"]
+            if not os.path.isdir(chemin) or config.get("mode") not in PLANIFICATEURS:
+                logger.warning(f"Dossier non surveillé (introuvable ou mode inconnu) : {chemin}")
+                continue
+            gestionnaire = FolderHandler(chemin, self.delai, config["mode"], self.rappel, self.pool)
+            self.observateur.schedule(gestionnaire, gestionnaire.dossier, recursive=False)
+            self.gestionnaires[gestionnaire.dossier] = gestionnaire
+        self.observateur.start()
+        logger.info(f"Surveillance de {len(self.gestionnaires)} dossier(s) avec {self.nb_workers} thread(s)")
+
+    def planifier_passage(self, chemin, mode):
+        """Confie au pool une réorganisation incrémentale du dossier."""
+        self.pool.soumettre(os.path.abspath(chemin), partial(organiser_incremental, chemin, mode))
+
+    def arreter(self):
+        """Arrête l'observateur, les threads de stabilisation puis le pool."""
+        if self.observateur is not None:
+            self.observateur.stop()
+            self.observateur.join()
+        for gestionnaire in self.gestionnaires.values():
+            gestionnaire.arreter()
+        if self.pool is not None:
+            self.pool.arreter()
+
+
+def charger_dossiers_surveilles(path="preferences.json"):
+    """
+    Retourne les dossiers à surveiller : ceux de preferences.json (chemin, fréquence, mode) s'il existe,
+    sinon les watched_folders des paramètres, avec le mode organization_mode et sans passage planifié.
+    """
+    if os.path.exists(path):
+        return charger_preferences(path)
+    settings = load_settings()
+    return [{"chemin": chemin, "mode": settings.get("organization_mode", "type"), "frequence": None}
+            for chemin in settings["watched_folders"]]
 
 def charger_preferences(path="preferences.json"):
     if not os.path.exists(path):
@@ -13,50 +283,96 @@ def charger_preferences(path="preferences.json"):
     with open(path, "r") as f:
         return json.load(f)["dossiers"]
 
-def doit_organiser(derniere_exec, frequence):
-    maintenant = datetime.now()
-    if frequence == "journalier":
-        return maintenant.date() > derniere_exec.date()
-    elif frequence == "hebdomadaire":
-        return maintenant - derniere_exec >= timedelta(weeks=1)
-    elif frequence == "mensuel":
-        return maintenant.month != derniere_exec.month or maintenant.year != derniere_exec.year
-    return False
-
-def lancer_watch():
-    try:
-        prefs = charger_preferences()
+def organiser_incremental(chemin, mode, mode_simulation=False):
+    """
+    Organise uniquement les fichiers apparus dans le dossier depuis le passage précédent.
+    Le premier passage (aucun journal d'état) traite tout le dossier ; ensuite, un dossier
+    inchangé n'est même pas relu. Le mode "nom" regroupe les fichiers entre eux : dès qu'un fichier
+    est apparu, il est appliqué à tout le dossier, et un fichier isolé rejoint le dossier de son
+    groupe créé par un passage précédent.
+    Les fichiers dont le déplacement a échoué restent nouveaux pour le passage suivant ; ceux que
+    le planificateur a laissés en place sont mémorisés comme connus.
 
-        # Initialise l'état d'exécution pour chaque dossier
-        etat_exec = {p["chemin"]: datetime.now() - timedelta(days=1) for p in prefs}
+    Args:
+        chemin: Le dossier à organiser
+        mode: Mode d'organisation ("type", "date" ou "nom")
+        mode_simulation: Si True, montre les actions sans les exécuter ni mettre à jour le journal
 
-        print("🛡️ Surveillance multi-dossiers activée.\n")
+    Returns:
+        Nombre de fichiers traités
+    """
+    journal = charger_journal(chemin)
+    nouveautes = parcourir_nouveautes(chemin, journal)
+    if not nouveautes:
+        if not mode_simulation:
+            sauvegarder_journal(journal)
+        return 0
 
-        while True:
-            for config in prefs:
-                chemin = config["chemin"]
-                frequence = config["frequence"]
-                mode = config["mode"]
-                derniere_exec = etat_exec.get(chemin, datetime.min)
+    if mode == "nom":
+        plan = PLANIFICATEURS[mode](chemin)
+    else:
+        plan = PLANIFICATEURS[mode](chemin, entrees=nouveautes)
+    reussis, echecs = executer_plan(plan, mode_simulation)
+    if mode_simulation:
+        return len(reussis)
+
+    # Enregistrer l'état après les déplacements, sans marquer comme connus les fichiers arrivés
+    # entre-temps ni ceux dont le déplacement a échoué
+    sources_en_echec = [EntreeFichier(operation.source) for operation, _ in echecs
+                        if isinstance(operation, Deplacement)]
+    arrives = parcourir_nouveautes(chemin, journal)
+    oublier_entrees(journal, arrives + sources_en_echec)
+    sauvegarder_journal(journal)
+    return len(reussis)
 
-                if not os.path.isdir(chemin):
-                    print(f"⚠️ Dossier non valide : {chemin}")
-                    continue
+def boucle_planification(service, prefs, arret):
+    """
+    Confie au service les réorganisations planifiées des dossiers (voir core.scheduler), en dormant
+    jusqu'à la prochaine échéance, jusqu'à ce que `arret` soit positionné.
+    """
+    planificateur = Planificateur(prefs)
 
-                if doit_organiser(derniere_exec, frequence):
-                    print(f"[{datetime.now()}] 📁 Organisation de '{chemin}' par {mode}...")
+    while not arret.is_set():
+        for config in planificateur.dossiers_dus():
+            chemin = config["chemin"]
+            mode = config["mode"]
+            if not os.path.isdir(chemin):
+                logger.warning(f"Dossier non valide : {chemin}")
+            elif mode in PLANIFICATEURS:
+                logger.info(f"Organisation de '{chemin}' par {mode} planifiée")
+                service.planifier_passage(chemin, mode)
+            else:
+                logger.warning(f"Mode d'organisation inconnu pour {chemin} : {mode}")
 
-                    if mode == "type":
-                        classer_fichier_par_type(chemin)
-                    elif mode == "date":
-                        classer_par_date(chemin)
-                    elif mode == "nom":
-                        classer_fichier_par_nom(chemin)
+        echeance = planificateur.prochaine_echeance()
+        if echeance is None:
+            arret.wait()  # Rien de planifié : seule la surveillance en temps réel reste active
+            break
+        attente = (echeance - datetime.now()).total_seconds()
+        arret.wait(max(1, attente))
 
-                    etat_exec[chemin] = datetime.now()
-                    print(f"[{datetime.now()}] ✅ Organisation de '{chemin}' terminée.\n")
+def lancer_watch(arret=None):
+    """
+    Surveille les dossiers de preferences.json (ou watched_folders) : les nouveaux fichiers sont classés
+    dès leur arrivée (si watchdog est installé), et chaque dossier est réorganisé selon sa fréquence.
+    Tout le travail passe par le pool partagé de ServiceSurveillance ; ce thread ne fait que dormir
+    jusqu'à la prochaine échéance.
 
-            time.sleep(60)
+    Args:
+        arret: threading.Event optionnel permettant d'arrêter la surveillance
+    """
+    arret = arret or threading.Event()
+    service = None
+    try:
+        prefs = charger_dossiers_surveilles()
+        service = ServiceSurveillance(prefs)
+        service.demarrer()
+
+        print("🛡️ Surveillance multi-dossiers activée.\n")
+        boucle_planification(service, prefs, arret)
 
     except Exception as e:
         print(f"❌ Erreur dans le watcher : {e}")
+    finally:
+        if service is not None:
+            service.arreter()
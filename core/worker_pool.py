@@ -0,0 +1,75 @@
+# coding: utf-8
+# Ce fichier fournit le pool de threads partagé par les dossiers surveillés.
+# Les tâches sont rangées dans une file par dossier et les dossiers sont servis à tour de rôle :
+# un dossier qui accumule des milliers de fichiers (partage réseau lent...) n'occupe jamais plus
+# d'un thread et ne retarde les autres dossiers que d'une tâche au plus.
+# Les tâches d'un même dossier s'exécutent l'une après l'autre, jamais en parallèle.
+
+import threading
+from collections import deque
+
+from logs.logger import logger
+
+
+class PoolEquitable:
+    """Pool de threads de taille fixe, équitable entre les clés (dossiers) qui lui soumettent des tâches."""
+
+    def __init__(self, nb_workers, nom="pool"):
+        self._condition = threading.Condition()
+        self._files = {}       # clé -> deque des tâches en attente
+        self._tour = deque()   # clés ayant des tâches en attente et aucune en cours, dans l'ordre de service
+        self._actives = set()  # clés dont une tâche est en cours
+        self._arret = False
+        self._threads = [threading.Thread(target=self._travailler, name=f"{nom}-{i}", daemon=True)
+                         for i in range(max(1, nb_workers))]
+        for thread in self._threads:
+            thread.start()
+
+    def soumettre(self, cle, tache):
+        """Ajoute `tache` (fonction sans argument) à la file de la clé `cle`."""
+        with self._condition:
+            if self._arret:
+                return
+            self._files.setdefault(cle, deque()).append(tache)
+            if cle not in self._actives and cle not in self._tour:
+                self._tour.append(cle)
+                self._condition.notify()
+
+    def en_attente(self):
+        """Retourne le nombre de tâches en attente par clé."""
+        with self._condition:
+            return {cle: len(file) for cle, file in self._files.items() if file}
+
+    def _travailler(self):
+        while True:
+            with self._condition:
+                while not self._tour and not self._arret:
+                    self._condition.wait()
+                if self._arret:
+                    return
+                cle = self._tour.popleft()
+                tache = self._files[cle].popleft()
+                self._actives.add(cle)
+
+            try:
+                tache()
+            except Exception as e:
+                logger.error(f"Erreur dans une tâche de {cle}: {e}")
+
+            with self._condition:
+                self._actives.discard(cle)
+                if self._files.get(cle):
+                    self._tour.append(cle)  # En fin de tour : les autres dossiers passent avant
+                    self._condition.notify()
+                else:
+                    self._files.pop(cle, None)
+
+    def arreter(self):
+        """Abandonne les tâches en attente et attend la fin des tâches en cours."""
+        with self._condition:
+            self._arret = True
+            self._files.clear()
+            self._tour.clear()
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
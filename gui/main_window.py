@@ -28,17 +28,17 @@ from core.rename import renommer_fichiers
 from core.organizer_date import classer_par_date
 from core.organizer_type import classer_fichier_par_type
 from core.organizer_name import organiser_par_nom
+from core.planner import MODES_ORGANISATION
 
 
 from logs.logger import logger
 import time
 
-from .threads import LoadFilesWorker
+from .threads import LoadFilesWorker, OrganizeWorker, WatcherThread
 
 from core.undo_redo import undo, redo
 
 
-from core.watcher import lancer_watch
 
 
 from .settings_gui import SettingsDialog
@@ -95,6 +95,8 @@ class FileManager(QMainWindow):
         self.icon_provider = QFileIconProvider()  # Pour obtenir les icônes des fichiers
         self.thumbs_cache = {}  # Cache pour les miniatures
         self.thumbnail_workers = []  # Liste pour suivre les threads de génération de miniatures
+        self.organize_worker = None  # Thread d'organisation en cours
+        self.watcher_thread = None  # Thread de surveillance du dossier courant
         
         # Initialiser la bibliothèque mimetypes
         mimetypes.init()
@@ -506,7 +508,7 @@ class FileManager(QMainWindow):
                 background-color: #1e874b;
             }}
         """)
-        self.watch_btn.clicked.connect(lancer_watch)
+        self.watch_btn.clicked.connect(self.toggle_watch)
         watch_layout.addWidget(self.watch_btn)
         
         # Bouton de configuration de surveillance avec style moderne
@@ -1218,15 +1220,46 @@ class FileManager(QMainWindow):
                 self.loader.start()
 
 
-    def organize_from_watcher(self, path):
-            if self.organize_by_type.isChecked():
-                classer_fichier_par_type(path)
-            if self.organize_by_date.isChecked():
-                classer_par_date(path)
-            if self.remove_duplicates.isChecked():
-                supprimer_doublons(path)
-            if self.rename_files.isChecked():
-                renommer_fichiers(path)
+    def toggle_watch(self):
+            """Démarre ou arrête la surveillance en temps réel du dossier courant."""
+            if self.watcher_thread is not None:
+                # Arrêt asynchrone : _on_watch_stopped est appelé à la fin du thread
+                self.watch_btn.setEnabled(False)
+                self.watch_status_label.setText("État: Arrêt en cours...")
+                self.watcher_thread.stop()
+                return
+
+            # Le classement en temps réel suit la première case cochée parmi type / date / nom
+            # (le paramètre organization_mode si aucune ne l'est)
+            mode = None
+            for coche, mode_coche in ((self.organize_by_type, "type"), (self.organize_by_date, "date"),
+                                      (self.organize_by_name, "nom")):
+                if coche.isChecked():
+                    mode = mode_coche
+                    break
+
+            self.watcher_thread = WatcherThread(self.current_directory, mode=mode)
+            self.watcher_thread.status_update.connect(self.watch_status_label.setText)
+            self.watcher_thread.file_changed.connect(self.load_files)
+            self.watcher_thread.finished.connect(self._on_watch_stopped)
+            self.watcher_thread.start()
+            self.watch_btn.setText("Arrêter la surveillance")
+
+    def _on_watch_stopped(self):
+            """Fin du thread de surveillance (arrêt demandé ou impossible de démarrer)."""
+            self.watcher_thread = None
+            self.watch_btn.setEnabled(True)
+            self.watch_btn.setText("Surveiller le dossier")
+
+    def closeEvent(self, event):
+            """Arrête les threads de surveillance et d'organisation avant de fermer la fenêtre."""
+            if self.watcher_thread is not None:
+                self.watcher_thread.stop()
+                self.watcher_thread.wait()
+            if self.organize_worker is not None and self.organize_worker.isRunning():
+                self.organize_worker.cancel()
+                self.organize_worker.wait()
+            super().closeEvent(event)
 
     def donate(self):
             """
@@ -1577,178 +1610,67 @@ class FileManager(QMainWindow):
                 QMessageBox.information(self, "Aucune option sélectionnée", "Veuillez cocher au moins une option.")
                 return
 
-            # Estimer le nombre de fichiers pour calculer le temps
-            try:
-                file_count = sum([len(files) for _, _, files in os.walk(self.current_directory)])
-            except:
-                file_count = 100  # Estimation par défaut
-            
+            if self.organize_worker is not None and self.organize_worker.isRunning():
+                QMessageBox.information(self, "Organisation en cours", "Une organisation est déjà en cours.")
+                return
+
+            # Toutes les options cochées sont combinées : un seul parcours et un seul déplacement par fichier
+            options = {mode for mode, coche in zip(MODES_ORGANISATION, selected_options) if coche}
+
             # Créer une notification de progression
             notification = QProgressDialog("Initialisation...", "Annuler", 0, 100, self)
             notification.setWindowTitle("Organisation des fichiers")
             notification.setWindowModality(Qt.WindowModality.WindowModal)
             notification.setMinimumDuration(0)
+            notification.setAutoReset(False)  # L'analyse puis l'exécution atteignent chacune 100 %
+            notification.setAutoClose(False)
             notification.setValue(0)
             notification.show()
-            
-            # Variables pour le calcul du temps restant
+
             start_time = time.time()
-            tasks_completed = 0
-            total_tasks = sum(selected_options)
-            
-            def update_remaining_time(current_progress, task_name):
-                """Met à jour l'affichage avec le temps restant estimé."""
-                nonlocal tasks_completed, start_time
-                
-                if current_progress > 0:
-                    elapsed_time = time.time() - start_time
-                    if current_progress < 100:
-                        estimated_total_time = elapsed_time * (100 / current_progress)
-                        remaining_time = estimated_total_time - elapsed_time
-                        
-                        if remaining_time > 60:
-                            time_str = f"{int(remaining_time // 60)}m {int(remaining_time % 60)}s"
-                        else:
-                            time_str = f"{int(remaining_time)}s"
-                        
-                        notification.setLabelText(f"{task_name}\nTemps restant estimé: {time_str}")
+            worker = OrganizeWorker(self.current_directory, options)
+            self.organize_worker = worker
+
+            def update_progress(done, total, task_name, remaining_time):
+                """Met à jour l'affichage avec l'avancement réel et le temps restant estimé."""
+                if notification.wasCanceled():
+                    return
+                label = f"{task_name} ({done}/{total})"
+                if remaining_time >= 0 and done < total:
+                    if remaining_time > 60:
+                        time_str = f"{int(remaining_time // 60)}m {int(remaining_time % 60)}s"
                     else:
-                        notification.setLabelText(f"{task_name}\nTerminé!")
-                else:
-                    notification.setLabelText(task_name)
-                
-                notification.setValue(current_progress)
-                QApplication.processEvents()
-                
-                # Vérifier si l'utilisateur a annulé
-                return not notification.wasCanceled()
+                        time_str = f"{int(remaining_time)}s"
+                    label += f"\nTemps restant estimé: {time_str}"
+                notification.setLabelText(label)
+                notification.setValue(int(done * 100 / total) if total else 100)
 
-            try:
-                progress = 0
-                step = 100 // total_tasks
-                
-                # Estimation du temps par tâche basée sur le nombre de fichiers
-                base_time_per_file = 0.01  # 10ms par fichier (estimation conservative)
-                
-                if self.organize_by_type.isChecked():
-                    if not update_remaining_time(progress, "Classement des fichiers par type..."):
-                        return
-                    
-                    task_start = time.time()
-                    
-                    # Simulation de progression pour les gros dossiers
-                    if file_count > 50:
-                        for i in range(0, step, max(1, step // 10)):
-                            if notification.wasCanceled():
-                                return
-                            update_remaining_time(progress + i, "Classement des fichiers par type...")
-                            time.sleep(0.1)  # Petite pause pour éviter le gel
-                    
-                    classer_fichier_par_type(self.current_directory)
-                    progress += step
-                    tasks_completed += 1
-                    
-                    if not update_remaining_time(progress, "Classement par type terminé"):
-                        return
-                    
+            def on_finished(count, cancelled):
+                notification.close()
+                self.organize_worker = None
+                self.load_files(self.current_directory)
 
-                if self.organize_by_date.isChecked():
-                    if not update_remaining_time(progress, "Classement des fichiers par date..."):
-                        return
-                    
-                    # Simulation de progression pour les gros dossiers
-                    if file_count > 50:
-                        for i in range(0, step, max(1, step // 10)):
-                            if notification.wasCanceled():
-                                return
-                            update_remaining_time(progress + i, "Classement des fichiers par date...")
-                            time.sleep(0.1)
-                    
-                    classer_par_date(self.current_directory)
-                    progress += step
-                    tasks_completed += 1
-                    
-                    if not update_remaining_time(progress, "Classement par date terminé"):
-                        return
-         
-                if self.organize_by_name.isChecked():
-                    if not update_remaining_time(progress, "Organisation des fichiers par nom..."):
-                        return
-                    
-                    # Simulation de progression pour les gros dossiers
-                    if file_count > 50:
-                        for i in range(0, step, max(1, step // 10)):
-                            if notification.wasCanceled():
-                                return
-                            update_remaining_time(progress + i, "Organisation des fichiers par nom...")
-                            time.sleep(0.1)
-                    
-                    organiser_par_nom(self.current_directory)
-                    progress += step
-                    tasks_completed += 1
-                    
-                    if not update_remaining_time(progress, "Organisation par nom terminée"):
-                        return
-                if self.rename_files.isChecked():
-                    if not update_remaining_time(progress, "Renommage des fichiers..."):
-                        return
-                    
-                    # Simulation de progression pour les gros dossiers
-                    if file_count > 50:
-                        for i in range(0, step, max(1, step // 10)):
-                            if notification.wasCanceled():
-                                return
-                            update_remaining_time(progress + i, "Renommage des fichiers...")
-                            time.sleep(0.1)
-                    
-                    renommer_fichiers(self.current_directory)
-                    progress += step
-                    tasks_completed += 1
-                    
-                    if not update_remaining_time(progress, "Renommage terminé"):
-                        return
+                total_time = time.time() - start_time
+                time_message = f"Temps total: {int(total_time // 60)}m {int(total_time % 60)}s" if total_time > 60 else f"Temps total: {int(total_time)}s"
 
-                if self.remove_duplicates.isChecked():
-                    if not update_remaining_time(progress, "Suppression des doublons..."):
-                        return
-                    
-                    # Cette tâche peut être plus longue, simulation plus détaillée
-                    if file_count > 30:
-                        for i in range(0, step, max(1, step // 15)):
-                            if notification.wasCanceled():
-                                return
-                            update_remaining_time(progress + i, "Analyse et suppression des doublons...")
-                            time.sleep(0.1)
-                    
-                    supprimer_doublons(self.current_directory)
-                    progress += step
-                    tasks_completed += 1
-                    
-                    if not update_remaining_time(progress, "Suppression des doublons terminée"):
-                        return
+                if cancelled:
+                    QMessageBox.information(self, "Organisation annulée",
+                                        f"Organisation interrompue : {count} fichier(s) traité(s).\n{time_message}")
+                else:
+                    QMessageBox.information(self, "Organisation automatique",
+                                        f"Les fichiers ont été organisés avec succès!\n{count} fichier(s) traité(s).\n{time_message}")
 
-                # Finalisation
-                update_remaining_time(100, "Organisation terminée avec succès!")
-                self.load_files(self.current_directory)
-                time.sleep(0.5)  # Laisser le temps de voir le message final
-                
+            def on_error(message):
                 notification.close()
-                
-                total_time = time.time() - start_time
-                time_message = f"Temps total: {int(total_time // 60)}m {int(total_time % 60)}s" if total_time > 60 else f"Temps total: {int(total_time)}s"
-                
-                QMessageBox.information(self, "Organisation automatique", 
-                                    f"Les fichiers ont été organisés avec succès!\n{time_message}")
+                self.organize_worker = None
                 self.load_files(self.current_directory)
-            except Exception as e:
-                if 'notification' in locals():
-                    notification.close()
-                QMessageBox.critical(self, "Erreur", f"Une erreur s'est produite : {str(e)}")
-            
-            finally:
-                # S'assurer que la notification est fermée
-                if 'notification' in locals() and notification:
-                    notification.close()
+                QMessageBox.critical(self, "Erreur", f"Une erreur s'est produite : {message}")
+
+            worker.progress.connect(update_progress)
+            worker.finished.connect(on_finished)
+            worker.error.connect(on_error)
+            notification.canceled.connect(worker.cancel)
+            worker.start()
     
     
     
@@ -7,6 +7,9 @@ from core.organizer_utils import (renommer_fichiers,
                       supprimer_doublons)
 from core.organizer_type import classer_fichier_par_type
 from core.organizer_date import classer_par_date
+from core.scanner import scanner_dossier
+from core.planner import organiser_dossier
+from core.executor import OrganisationAnnulee
 
 
 from logs.logger import logger
@@ -14,6 +17,7 @@ import time
 
 import os
 import time
+import threading
 from PyQt6.QtCore import QThread, pyqtSignal, Qt, QSize
 from PyQt6.QtGui import QPixmap, QImage
 import json
@@ -25,31 +29,37 @@ class WatcherThread(QThread):
     status_update = pyqtSignal(str)
     file_changed = pyqtSignal(str)
 
-    def __init__(self, directory, delay=30):
+    def __init__(self, directory, delay=1, mode=None):
         super().__init__()
         self.directory = directory
         self.running = True
-        self.delay = delay  # Délai en secondes (peut ne pas être directement utilisé ici)
+        self.delay = delay  # Délai de regroupement des évènements, en secondes
+        self.mode = mode  # "type", "date" ou "nom" ; None pour le paramètre organization_mode
+        self._arret = threading.Event()
         self.observer = None
         self.event_handler = None
 
     def run(self):
-        from core.watcher import FolderHandler, Observer, logger  # Importez ici pour éviter les problèmes de dépendances cycliques potentiels
+        from core.watcher import FolderHandler, Observer, logger, WATCHDOG_AVAILABLE  # Importez ici pour éviter les problèmes de dépendances cycliques potentiels
+
+        if not WATCHDOG_AVAILABLE:
+            self.status_update.emit("❌ Surveillance indisponible : installez le paquet watchdog.")
+            return
 
         if not os.path.exists(self.directory):
             self.status_update.emit(f"❌ Le dossier {self.directory} n'existe pas.")
             return
 
-        self.event_handler = FolderHandler(self.directory, self.delay) # Utilisez le délai du WatcherThread
+        self.event_handler = FolderHandler(self.directory, self.delay, self.mode, rappel=self._fichiers_classes)
         self.observer = Observer()
         self.observer.schedule(self.event_handler, self.directory, recursive=False)
 
-        self.status_update.emit(f"👁️ Surveillance activée sur le dossier: {self.directory}")
+        self.status_update.emit(f"👁️ Surveillance ({self.event_handler.mode}) activée sur le dossier: {self.directory}")
         self.observer.start()
 
         try:
             while self.running:
-                time.sleep(1)
+                self._arret.wait(1)
         except Exception as e:
             logger.error(f"Erreur dans le thread de surveillance: {e}")
             self.status_update.emit(f"⚠️ Erreur de surveillance: {str(e)}")
@@ -57,11 +67,17 @@ class WatcherThread(QThread):
             if self.observer and self.observer.is_alive():
                 self.observer.stop()
                 self.observer.join()
+                self.event_handler.arreter()
                 self.status_update.emit("🛑 Surveillance arrêtée.")
 
+    def _fichiers_classes(self, chemins):
+        if chemins:
+            self.file_changed.emit(self.directory)  # Un seul rafraîchissement par lot de fichiers classés
+
     def stop(self):
+        """Demande l'arrêt sans bloquer l'appelant : le signal finished est émis une fois la surveillance arrêtée."""
         self.running = False
-        self.wait()
+        self._arret.set()
 class LoadFilesWorker(QThread):
     file_found = pyqtSignal(tuple)
     files_loaded = pyqtSignal(list)  # ✅ Nouveau signal pour envoyer tous les fichiers
@@ -75,46 +91,45 @@ class LoadFilesWorker(QThread):
     def run(self):
         all_files = []  # ✅ Liste pour stocker toutes les infos
         try:
-            for file_name in os.listdir(self.directory):
-                file_path = os.path.join(self.directory, file_name)
-                if os.path.isfile(file_path):
-                    try:
-                        file_info = os.stat(file_path)
-                        file_hash = "N/A"  # Placeholder, à remplacer si calcul de hash
-
-                        _, extension = os.path.splitext(file_name)
-                        extension = extension.lower()
-
-                        file_type = "Autres"
-                        for type_name, extensions in {
-                            "Documents": [".pdf", ".doc", ".docx", ".txt", ".odt"],
-                            "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp"],
-                            "Vidéos": [".mp4", ".avi", ".mov", ".mkv"],
-                            "Musique": [".mp3", ".wav", ".aac", ".flac"],
-                            "Archives": [".zip", ".rar", ".tar", ".gz", ".7z"],
-                            "Exécutables": [".exe", ".msi", ".bat", ".sh", ".apk"],
-                            "Feuilles de calcul": [".xls", ".xlsx", ".csv", ".ods"],
-                            "Présentations": [".ppt", ".pptx", ".odp"],
-                            "Code": [".py", ".java", ".c", ".cpp", ".js", ".html", ".css"],
-                        }.items():
-                            if extension in extensions:
-                                file_type = type_name
-                                break
-
-                        size_kb = file_info.st_size / 1024
-                        if size_kb < 1024:
-                            size_str = f"{size_kb:.2f} KB"
-                        else:
-                            size_mb = size_kb / 1024
-                            size_str = f"{size_mb:.2f} MB" if size_mb < 1024 else f"{size_mb / 1024:.2f} GB"
-
-                        mod_date = datetime.fromtimestamp(file_info.st_mtime).strftime("%d/%m/%Y %H:%M")
-
-                        file_data = (file_name, file_type, size_str, mod_date, file_hash, size_kb)
-                        self.file_found.emit(file_data)    # Emission individuelle
-                        all_files.append(file_data)        # Stockage pour le signal groupé
-                    except Exception as e:
-                        print(f"Erreur pour {file_name}: {e}")
+            for entry in scanner_dossier(self.directory):
+                file_name = entry.name
+                try:
+                    file_info = entry.stat()
+                    file_hash = "N/A"  # Placeholder, à remplacer si calcul de hash
+
+                    _, extension = os.path.splitext(file_name)
+                    extension = extension.lower()
+
+                    file_type = "Autres"
+                    for type_name, extensions in {
+                        "Documents": [".pdf", ".doc", ".docx", ".txt", ".odt"],
+                        "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp"],
+                        "Vidéos": [".mp4", ".avi", ".mov", ".mkv"],
+                        "Musique": [".mp3", ".wav", ".aac", ".flac"],
+                        "Archives": [".zip", ".rar", ".tar", ".gz", ".7z"],
+                        "Exécutables": [".exe", ".msi", ".bat", ".sh", ".apk"],
+                        "Feuilles de calcul": [".xls", ".xlsx", ".csv", ".ods"],
+                        "Présentations": [".ppt", ".pptx", ".odp"],
+                        "Code": [".py", ".java", ".c", ".cpp", ".js", ".html", ".css"],
+                    }.items():
+                        if extension in extensions:
+                            file_type = type_name
+                            break
+
+                    size_kb = file_info.st_size / 1024
+                    if size_kb < 1024:
+                        size_str = f"{size_kb:.2f} KB"
+                    else:
+                        size_mb = size_kb / 1024
+                        size_str = f"{size_mb:.2f} MB" if size_mb < 1024 else f"{size_mb / 1024:.2f} GB"
+
+                    mod_date = datetime.fromtimestamp(file_info.st_mtime).strftime("%d/%m/%Y %H:%M")
+
+                    file_data = (file_name, file_type, size_str, mod_date, file_hash, size_kb)
+                    self.file_found.emit(file_data)    # Emission individuelle
+                    all_files.append(file_data)        # Stockage pour le signal groupé
+                except Exception as e:
+                    print(f"Erreur pour {file_name}: {e}")
 
             self.files_loaded.emit(all_files)  # ✅ Emission groupée pour populate_file_table
             self.finished.emit()
@@ -126,6 +141,56 @@ class LoadFilesWorker(QThread):
         return ext[1:].upper() if ext else "Fichier"
 
 
+class OrganizeWorker(QThread):
+    """Exécute l'organisation d'un dossier hors du thread graphique, avec progression réelle et annulation."""
+    progress = pyqtSignal(int, int, str, float)  # fichiers traités, total, étape, secondes restantes (-1 si inconnu)
+    finished = pyqtSignal(int, bool)  # nombre de fichiers traités, annulé
+    error = pyqtSignal(str)
+
+    INTERVALLE_PROGRESSION = 0.1  # Secondes minimum entre deux signaux de progression
+
+    def __init__(self, directory, options, mode_simulation=False):
+        super().__init__()
+        self.directory = directory
+        self.options = set(options)
+        self.mode_simulation = mode_simulation
+        self.annulation = threading.Event()
+        self._etape = None
+        self._debut_etape = 0.0
+        self._dernier_signal = 0.0
+
+    def cancel(self):
+        """Demande l'arrêt de l'organisation ; le fichier en cours est terminé proprement."""
+        self.annulation.set()
+
+    def _signaler(self, fait, total, etape):
+        # Appelé depuis le worker ou depuis les threads de déplacement (déjà sérialisés par l'exécuteur)
+        maintenant = time.monotonic()
+        if etape != self._etape:
+            self._etape = etape
+            self._debut_etape = maintenant
+        elif fait < total and maintenant - self._dernier_signal < self.INTERVALLE_PROGRESSION:
+            return
+        self._dernier_signal = maintenant
+
+        restant = -1.0
+        if fait and total:
+            restant = (maintenant - self._debut_etape) / fait * (total - fait)
+        self.progress.emit(fait, total, etape, restant)
+
+    def run(self):
+        try:
+            nombre = organiser_dossier(self.directory, self.options, self.mode_simulation,
+                                       progression=self._signaler, annulation=self.annulation)
+            self.finished.emit(nombre, self.annulation.is_set())
+        except OrganisationAnnulee:
+            logger.info(f"Organisation annulée avant tout déplacement : {self.directory}")
+            self.finished.emit(0, True)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'organisation de {self.directory}: {e}")
+            self.error.emit(str(e))
+
+
 class ThumbnailGenerator(QThread):
     thumbnail_ready = pyqtSignal(str, QPixmap)
     
@@ -2,11 +2,15 @@
 # -*- coding: utf-8 -*-
 
 
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from gui.main_window import FileManager 
 import sys
 
 if __name__ == "__main__":
+    # Dans l'exécutable cx_Freeze, les processus d'extraction relancent TITO.exe : ils doivent
+    # exécuter leur tâche au lieu d'ouvrir une nouvelle fenêtre
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = FileManager()
     window.show()
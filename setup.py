@@ -1,7 +1,13 @@
+import importlib.util
 from cx_Freeze import setup, Executable
 
+# Bibliothèques d'extraction importées à la demande par core.rename (importlib.import_module) :
+# cx_Freeze ne peut pas les détecter, elles sont incluses explicitement lorsqu'elles sont installées
+PACKAGES_EXTRACTION = ["pypdf", "PyPDF2", "pdfplumber", "docx", "openpyxl", "PIL"]
+
 build_exe_options = {
     "include_files": ["assets"],
+    "packages": [nom for nom in PACKAGES_EXTRACTION if importlib.util.find_spec(nom) is not None],
     "excludes": ["tkinter", "unittest", "email", "xmlrpc", "sqlite3", "PyQt5", "PySide2", "PySide6"]
 }
 
@@ -0,0 +1,91 @@
+# coding: utf-8
+# Tests de la suppression des doublons : choix du fichier conservé et fichiers réellement supprimés.
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+
+class TestDoublons(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # L'index des empreintes (json/hash_index.json) est créé dans le dossier courant : travailler à part
+        cls.dossier_travail = tempfile.mkdtemp(prefix="test_doublons_")
+        cls.cwd = os.getcwd()
+        os.chdir(cls.dossier_travail)
+        try:
+            from core import organizer_utils
+        except Exception as e:  # Dépendances de l'application absentes (send2trash, locale fr...)
+            os.chdir(cls.cwd)
+            raise unittest.SkipTest(f"core.organizer_utils non importable : {e}")
+        cls.organizer_utils = organizer_utils
+        from core import plan
+        cls.plan = plan
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.dossier_travail, ignore_errors=True)
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp(prefix="dossier_", dir=self.dossier_travail)
+
+    def ecrire(self, relatif, contenu):
+        chemin = os.path.join(self.dossier, relatif)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        with open(chemin, "wb") as f:
+            f.write(contenu)
+        return chemin
+
+    def test_le_fichier_le_moins_profond_est_conserve(self):
+        racine = self.ecrire("photo.jpg", b"meme contenu")
+        sauvegarde = self.ecrire(os.path.join("Backup", "photo.jpg"), b"meme contenu")
+        profond = self.ecrire(os.path.join("a", "b", "photo.jpg"), b"meme contenu")
+
+        plan = self.organizer_utils.planifier_suppression_doublons(self.dossier)
+
+        self.assertEqual({s.original for s in plan.suppressions}, {racine})
+        self.assertEqual(sorted(s.chemin for s in plan.suppressions), sorted([sauvegarde, profond]))
+
+    def supprimer(self, mode_simulation=False):
+        """Lance supprimer_doublons en supprimant directement au lieu de passer par la corbeille."""
+        with mock.patch.object(self.plan.send2trash, "send2trash", side_effect=os.remove) as corbeille:
+            supprimes = self.organizer_utils.supprimer_doublons(self.dossier, mode_simulation)
+        return supprimes, corbeille
+
+    def fichiers_restants(self):
+        return sorted(os.path.relpath(os.path.join(racine, nom), self.dossier)
+                      for racine, _, noms in os.walk(self.dossier) for nom in noms)
+
+    def test_seuls_les_vrais_doublons_sont_supprimes(self):
+        bloc = self.organizer_utils.TAILLE_BLOC_PARTIEL
+        grand = os.urandom(bloc) + b"a" * bloc + os.urandom(bloc)
+        self.ecrire("original.txt", b"contenu")
+        self.ecrire(os.path.join("sous", "copie.txt"), b"contenu")
+        self.ecrire("meme_taille.txt", b"CONTENU")  # Même taille, contenu différent
+        self.ecrire("grand.bin", grand)
+        self.ecrire(os.path.join("sous", "grand_copie.bin"), grand)
+        # Mêmes premiers et derniers blocs (hash partiel identique), milieu différent
+        self.ecrire("grand_variante.bin", grand[:bloc] + b"b" * bloc + grand[-bloc:])
+
+        supprimes, corbeille = self.supprimer()
+
+        self.assertEqual(supprimes, 2)
+        self.assertEqual(corbeille.call_count, 2)
+        self.assertEqual(self.fichiers_restants(), ["grand.bin", "grand_variante.bin", "meme_taille.txt", "original.txt"])
+
+    def test_simulation_ne_supprime_rien(self):
+        self.ecrire("original.txt", b"contenu")
+        self.ecrire(os.path.join("sous", "copie.txt"), b"contenu")
+
+        _, corbeille = self.supprimer(mode_simulation=True)
+
+        corbeille.assert_not_called()
+        self.assertEqual(self.fichiers_restants(), ["original.txt", os.path.join("sous", "copie.txt")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+# coding: utf-8
+# Tests de l'exécuteur de déplacements : une destination n'est jamais écrasée, et un déplacement
+# en échec ne laisse ni copie partielle ni fichier en double.
+
+import os
+import errno
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+class TestExecuteurDeplacements(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Le logger crée son fichier (logs/...) dans le dossier courant : travailler à part
+        cls.dossier_travail = tempfile.mkdtemp(prefix="test_executor_")
+        cls.cwd = os.getcwd()
+        os.chdir(cls.dossier_travail)
+        try:
+            from core import executor
+        except Exception as e:  # Dépendances de l'application absentes
+            os.chdir(cls.cwd)
+            raise unittest.SkipTest(f"core.executor non importable : {e}")
+        cls.executor = executor
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.dossier_travail, ignore_errors=True)
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp(prefix="test_executor_")
+        self.addCleanup(shutil.rmtree, self.dossier, ignore_errors=True)
+        self.source = self.ecrire("source.txt", b"source")
+        self.destination = os.path.join(self.dossier, "rangement", "source.txt")
+
+    def ecrire(self, relatif, contenu):
+        chemin = os.path.join(self.dossier, relatif)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        with open(chemin, "wb") as f:
+            f.write(contenu)
+        return chemin
+
+    def lire(self, chemin):
+        with open(chemin, "rb") as f:
+            return f.read()
+
+    def deplacer(self, **options):
+        options.setdefault("delai_initial", 0)
+        deplacement = SimpleNamespace(source=self.source, destination=self.destination)
+        [(_, erreur)] = self.executor.executer_deplacements([deplacement], **options)
+        return erreur
+
+    def fichiers_restants(self):
+        return sorted(os.path.relpath(os.path.join(racine, nom), self.dossier)
+                      for racine, _, noms in os.walk(self.dossier) for nom in noms)
+
+    def forcer_copie(self):
+        """Traite le déplacement comme s'il changeait de périphérique."""
+        patch = mock.patch.object(self.executor._CachePeripheriques, "meme_peripherique", return_value=False)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_deplacement_simple(self):
+        self.assertIsNone(self.deplacer())
+        self.assertEqual(self.lire(self.destination), b"source")
+        self.assertFalse(os.path.exists(self.source))
+
+    def test_destination_existante_jamais_ecrasee(self):
+        self.ecrire(os.path.join("rangement", "source.txt"), b"deja la")
+        self.assertIsInstance(self.deplacer(), FileExistsError)
+        self.assertEqual(self.lire(self.destination), b"deja la")
+        self.assertEqual(self.lire(self.source), b"source")
+
+    def test_sans_liens_physiques(self):
+        # Système de fichiers sans liens physiques (FAT...) : le nom est réservé par O_EXCL
+        with mock.patch.object(self.executor.os, "link", side_effect=OSError(errno.EPERM, "liens refusés")):
+            self.assertIsNone(self.deplacer())
+            self.assertEqual(self.lire(self.destination), b"source")
+
+            self.source = self.ecrire("autre.txt", b"autre")
+            self.destination = os.path.join(self.dossier, "rangement", "source.txt")
+            self.assertIsInstance(self.deplacer(), FileExistsError)
+        self.assertEqual(self.lire(self.destination), b"source")
+        self.assertEqual(self.lire(self.source), b"autre")
+
+    def test_copie_destination_apparue_pendant_la_copie(self):
+        self.forcer_copie()
+        copie = shutil.copy2
+
+        def copier_puis_occuper(source, cible, **options):
+            copie(source, cible, **options)
+            self.ecrire(os.path.join("rangement", "source.txt"), b"arrive entre-temps")
+
+        with mock.patch.object(self.executor.shutil, "copy2", side_effect=copier_puis_occuper):
+            self.assertIsInstance(self.deplacer(), FileExistsError)
+        self.assertEqual(self.lire(self.destination), b"arrive entre-temps")
+        self.assertEqual(self.lire(self.source), b"source")
+        self.assertEqual(self.fichiers_restants(), [os.path.join("rangement", "source.txt"), "source.txt"])
+
+    def test_copie_reprise_apres_erreur(self):
+        self.forcer_copie()
+        copie = shutil.copy2
+        essais = []
+
+        def echouer_une_fois(source, cible, **options):
+            essais.append(cible)
+            if len(essais) == 1:
+                with open(cible, "wb") as f:
+                    f.write(b"sour")  # Copie partielle
+                raise OSError(errno.EIO, "erreur d'entrée/sortie")
+            return copie(source, cible, **options)
+
+        with mock.patch.object(self.executor.shutil, "copy2", side_effect=echouer_une_fois):
+            self.assertIsNone(self.deplacer(tentatives=3))
+        self.assertEqual(len(essais), 2)
+        self.assertEqual(self.lire(self.destination), b"source")
+        self.assertEqual(self.fichiers_restants(), [os.path.join("rangement", "source.txt")])
+
+    def test_copie_annulee_si_source_non_supprimable(self):
+        self.forcer_copie()
+        suppression = os.remove
+
+        def refuser_source(chemin, *args, **kwargs):
+            if chemin == self.source:
+                raise PermissionError(errno.EACCES, "fichier verrouillé", chemin)
+            return suppression(chemin, *args, **kwargs)
+
+        with mock.patch.object(self.executor.os, "remove", side_effect=refuser_source):
+            self.assertIsInstance(self.deplacer(tentatives=2), PermissionError)
+        # Aucun doublon : la copie est retirée et la source reste en place
+        self.assertEqual(self.fichiers_restants(), ["source.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# coding: utf-8
+# Tests de l'index persistant des empreintes : invalidation d'une entrée quand le fichier ou
+# l'algorithme change, et éviction des entrées les moins récemment utilisées.
+
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+
+def stat_fictif(inode, taille=10, mtime_ns=1000):
+    return SimpleNamespace(st_dev=1, st_ino=inode, st_size=taille, st_mtime_ns=mtime_ns)
+
+
+class TestIndexHash(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Les modules créent leurs fichiers (json/..., logs/...) dans le dossier courant : travailler à part
+        cls.dossier_travail = tempfile.mkdtemp(prefix="test_hash_index_")
+        cls.cwd = os.getcwd()
+        os.chdir(cls.dossier_travail)
+        try:
+            from core import hash_index
+        except Exception as e:  # Dépendances de l'application absentes
+            os.chdir(cls.cwd)
+            raise unittest.SkipTest(f"core.hash_index non importable : {e}")
+        cls.hash_index = hash_index
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.dossier_travail, ignore_errors=True)
+
+    def test_empreinte_reutilisee_si_fichier_inchange(self):
+        index = {}
+        self.hash_index.enregistrer_hash(index, stat_fictif(1), "abc", "blake2b", "/a")
+        self.assertEqual(self.hash_index.rechercher_hash(index, stat_fictif(1), "blake2b"), "abc")
+
+    def test_invalidation(self):
+        cas = {
+            "taille": (stat_fictif(1, taille=11), "blake2b"),
+            "date de modification": (stat_fictif(1, mtime_ns=2000), "blake2b"),
+            "algorithme": (stat_fictif(1), "md5"),
+        }
+        for changement, (stat_fichier, algorithme) in cas.items():
+            with self.subTest(changement=changement):
+                index = {}
+                self.hash_index.enregistrer_hash(index, stat_fictif(1), "abc", "blake2b")
+                self.assertIsNone(self.hash_index.rechercher_hash(index, stat_fichier, algorithme))
+                # L'entrée périmée est oubliée
+                self.assertEqual(index, {})
+
+    def test_eviction_des_moins_recemment_utilisees(self):
+        index = {}
+        for inode in range(3):
+            self.hash_index.enregistrer_hash(index, stat_fictif(inode), f"h{inode}", "blake2b")
+        # Une consultation rend l'entrée la plus récente : c'est l'entrée 1 qui sera oubliée
+        self.hash_index.rechercher_hash(index, stat_fictif(0), "blake2b")
+
+        chemin = os.path.join(self.dossier_travail, "index.json")
+        with mock.patch.object(self.hash_index, "HASH_INDEX_MAX_ENTREES", 2):
+            self.hash_index.sauvegarder_index_hash(index, chemin)
+
+        recharge = self.hash_index.charger_index_hash(chemin)
+        self.assertEqual(list(recharge), [self.hash_index.cle_index(stat_fictif(i)) for i in (2, 0)])
+        self.assertEqual(self.hash_index.rechercher_hash(recharge, stat_fictif(0), "blake2b"), "h0")
+
+    def test_index_corrompu(self):
+        chemin = os.path.join(self.dossier_travail, "corrompu.json")
+        with open(chemin, "w", encoding="utf-8") as f:
+            f.write("{pas du json")
+        self.assertEqual(self.hash_index.charger_index_hash(chemin), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# coding: utf-8
+# Tests du registre des noms : attribution des suffixes (_1, _2, ...) sans écraser un nom occupé
+# sur le disque ou déjà réservé par le plan.
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+
+class TestRegistreNoms(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Le logger crée son fichier (logs/...) dans le dossier courant : travailler à part
+        cls.dossier_travail = tempfile.mkdtemp(prefix="test_name_registry_")
+        cls.cwd = os.getcwd()
+        os.chdir(cls.dossier_travail)
+        try:
+            from core import name_registry
+        except Exception as e:  # Dépendances de l'application absentes
+            os.chdir(cls.cwd)
+            raise unittest.SkipTest(f"core.name_registry non importable : {e}")
+        cls.name_registry = name_registry
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.dossier_travail, ignore_errors=True)
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp(prefix="destination_", dir=self.dossier_travail)
+        self.registre = self.name_registry.RegistreNoms()
+
+    def chemin(self, nom):
+        return os.path.join(self.dossier, nom)
+
+    def creer(self, nom):
+        open(self.chemin(nom), "w").close()
+
+    def test_nom_libre_conserve(self):
+        self.assertEqual(self.registre.reserver(self.chemin("a.txt")), self.chemin("a.txt"))
+        # Réservé : le même nom reçoit ensuite un suffixe
+        self.assertEqual(self.registre.reserver(self.chemin("a.txt")), self.chemin("a_1.txt"))
+
+    def test_suffixes_successifs(self):
+        self.creer("a.txt")
+        noms = [os.path.basename(self.registre.reserver(self.chemin("a.txt"))) for _ in range(3)]
+        self.assertEqual(noms, ["a_1.txt", "a_2.txt", "a_3.txt"])
+
+    def test_suffixes_occupes_sur_le_disque_ignores(self):
+        for nom in ("a.txt", "a_1.txt", "a_2.txt"):
+            self.creer(nom)
+        self.assertEqual(self.registre.reserver(self.chemin("a.txt")), self.chemin("a_3.txt"))
+
+    def test_fichier_sans_extension_et_format_personnalise(self):
+        self.creer("notes")
+        self.creer("b.txt")
+        self.assertEqual(self.registre.reserver(self.chemin("notes")), self.chemin("notes_1"))
+        self.assertEqual(self.registre.reserver(self.chemin("b.txt"), "{base} ({numero}){extension}"),
+                         self.chemin("b (1).txt"))
+
+    def test_nom_libere(self):
+        self.creer("a.txt")
+        self.registre.liberer(self.chemin("a.txt"))
+        self.assertEqual(self.registre.reserver(self.chemin("a.txt")), self.chemin("a.txt"))
+
+    def test_dossier_liste_une_seule_fois(self):
+        self.creer("a.txt")
+        with mock.patch.object(self.name_registry.os, "listdir", wraps=os.listdir) as listdir:
+            for _ in range(5):
+                self.registre.reserver(self.chemin("a.txt"))
+        self.assertEqual(listdir.call_count, 1)
+
+    def test_dossier_absent(self):
+        chemin = os.path.join(self.dossier, "nouveau", "a.txt")
+        self.assertEqual(self.registre.reserver(chemin), chemin)
+
+
+if __name__ == "__main__":
+    unittest.main()
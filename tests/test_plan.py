@@ -0,0 +1,50 @@
+# coding: utf-8
+# Tests du plan de déplacement : sauvegarde JSON puis rechargement à l'identique.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestPlanDeplacement(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Les modules créent leurs fichiers (json/..., logs/...) dans le dossier courant : travailler à part
+        cls.dossier_travail = tempfile.mkdtemp(prefix="test_plan_")
+        cls.cwd = os.getcwd()
+        os.chdir(cls.dossier_travail)
+        try:
+            from core import plan
+        except Exception as e:  # Dépendances de l'application absentes (send2trash...)
+            os.chdir(cls.cwd)
+            raise unittest.SkipTest(f"core.plan non importable : {e}")
+        cls.plan = plan
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.dossier_travail, ignore_errors=True)
+
+    def test_aller_retour_json(self):
+        racine = tempfile.mkdtemp(prefix="racine_", dir=self.dossier_travail)
+        plan = self.plan.PlanDeplacement(racine, mode="type+date")
+        plan.ajouter(os.path.join(racine, "a.pdf"), os.path.join(racine, "Documents", "a.pdf"), "type", taille=42)
+        plan.ajouter(os.path.join(racine, "b.pdf"), os.path.join(racine, "Documents", "a.pdf"), "type")
+        plan.ajouter_suppression(os.path.join(racine, "sous", "c.jpg"), os.path.join(racine, "c.jpg"))
+
+        chemin = os.path.join(self.dossier_travail, "plan.json")
+        plan.sauvegarder(chemin)
+        recharge = self.plan.PlanDeplacement.charger(chemin)
+
+        self.assertEqual((recharge.racine, recharge.mode, recharge.date), (plan.racine, plan.mode, plan.date))
+        self.assertEqual(recharge.deplacements, plan.deplacements)
+        self.assertEqual(recharge.suppressions, plan.suppressions)
+        # Les destinations rechargées restent réservées : un nouveau conflit reçoit le suffixe suivant
+        self.assertEqual(recharge.destination_libre(os.path.join(racine, "Documents", "a.pdf")),
+                         os.path.join(racine, "Documents", "a_2.pdf"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# coding: utf-8
+# Test de fumée des passages planifiés du service de surveillance : planifier_passage doit réellement
+# organiser le dossier à travers le pool partagé (et pas seulement y déposer une tâche).
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+
+class TestPlanifierPassage(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Les modules créent leurs fichiers JSON (json/...) dans le dossier courant : travailler à part
+        cls.dossier_travail = tempfile.mkdtemp(prefix="test_watcher_")
+        cls.cwd = os.getcwd()
+        os.chdir(cls.dossier_travail)
+        try:
+            from core import watcher, journal_etat
+        except Exception as e:  # Dépendances de l'application absentes (send2trash, locale fr...)
+            os.chdir(cls.cwd)
+            raise unittest.SkipTest(f"core.watcher non importable : {e}")
+        cls.watcher = watcher
+        cls.journal_etat = journal_etat
+        journal_etat.JOURNAL_ETAT_DIR = os.path.join(cls.dossier_travail, "etats")
+        os.makedirs(journal_etat.JOURNAL_ETAT_DIR, exist_ok=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.dossier_travail, ignore_errors=True)
+
+    def test_passage_planifie_organise_le_dossier(self):
+        dossier = tempfile.mkdtemp(prefix="surveille_", dir=self.dossier_travail)
+        for nom in ("rapport.pdf", "photo.jpg"):
+            with open(os.path.join(dossier, nom), "w") as f:
+                f.write(nom)
+
+        service = self.watcher.ServiceSurveillance([{"chemin": dossier, "mode": "type"}], nb_workers=1)
+        service.pool = self.watcher.PoolEquitable(1, nom="test")
+        termine = threading.Event()
+        try:
+            service.planifier_passage(dossier, "type")
+            # Les tâches d'un même dossier s'exécutent dans l'ordre : celle-ci passe après le passage planifié
+            service.pool.soumettre(os.path.abspath(dossier), termine.set)
+            self.assertTrue(termine.wait(30))
+        finally:
+            service.arreter()
+
+        self.assertEqual([nom for nom in os.listdir(dossier) if os.path.isfile(os.path.join(dossier, nom))], [])
+        self.assertEqual(os.listdir(os.path.join(dossier, "Documents")), ["rapport.pdf"])
+        self.assertEqual(os.listdir(os.path.join(dossier, "Images")), ["photo.jpg"])
+
+    def test_passage_incremental_par_nom_stable(self):
+        dossier = tempfile.mkdtemp(prefix="surveille_", dir=self.dossier_travail)
+        for nom in ("facture_001.pdf", "facture_002.pdf", "seul.jpg"):
+            with open(os.path.join(dossier, nom), "w") as f:
+                f.write(nom)
+
+        self.assertEqual(self.watcher.organiser_incremental(dossier, "nom"), 2)
+        self.assertIn("seul.jpg", os.listdir(dossier))
+        # Le fichier laissé en place par le planificateur est connu : il n'est plus rendu comme nouveau
+        journal = self.journal_etat.charger_journal(dossier)
+        self.assertEqual(self.journal_etat.parcourir_nouveautes(dossier, journal), [])
+
+
+if __name__ == "__main__":
+    unittest.main()